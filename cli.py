@@ -0,0 +1,252 @@
+"""Headless batch export: runs a JSON job manifest without Qt.
+
+Usage:
+    python cli.py manifest.json [-o OUTPUT_DIR] [-j WORKERS] [--mode copy|smart] [--force] [-q]
+
+Manifest:
+    {
+        "output_dir": "D:/out",
+        "workers": 2,
+        "mode": "smart",
+        "items": [
+            {"path": "a.mp4", "start": 5.0, "end": 120.0},
+            {"path": "b.mp4", "start": 5.0, "end_offset": 3.0},
+            {"path": "match.mp4", "ranges": [[60.0, 95.5], [1800.0, 1830.0]]}
+        ],
+        "groups": [
+            {"name": "Cam A", "start": 2.0, "end_offset": 1.5, "items": ["c.mp4", "d.mp4"]}
+        ]
+    }
+
+"end" is an absolute out point; "end_offset" is seconds cut from the end
+(the same relative rule groups use in the GUI). "ranges" exports several
+clips from one source in a single pass (name_01.mp4, name_02.mp4, ...);
+a range that starts past the end of the source fails that item, an end
+past it is clamped (and logged).
+Relative paths are resolved against the manifest's folder. "mode" is
+"copy" (cut on the keyframe at or before each mark) or "smart"
+(frame-accurate, re-encodes only the edge GOPs).
+
+Running the same manifest again after a crash or Ctrl+C resumes the batch:
+jobs whose outputs were already finished are skipped. Outputs are tagged with
+a key of their source, cut points and settings, so re-running an edited
+manifest only exports the clips that changed (--force exports everything).
+
+Exit codes: 0 all jobs exported, 1 some jobs failed, 2 bad arguments or
+manifest, 130 interrupted.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from core.engine import ExportEngine, EXPORT_MODES
+from core.ffmpeg_core import FFmpegWorker
+from core.models import MediaItem
+from utils.settings import SettingsManager
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+class ManifestError(Exception):
+    pass
+
+def _number(entry, key, where):
+    value = entry.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ManifestError(f"{where}: '{key}' must be a non-negative number")
+    return float(value)
+
+def _ranges(entry, where):
+    value = entry.get("ranges")
+    if value is None:
+        return None
+    if not isinstance(value, list) or not value:
+        raise ManifestError(f"{where}: 'ranges' must be a non-empty list of [start, end] pairs")
+    ranges = []
+    for i, pair in enumerate(value):
+        if (not isinstance(pair, list) or len(pair) != 2
+                or any(isinstance(v, bool) or not isinstance(v, (int, float)) or v < 0 for v in pair)
+                or pair[1] <= pair[0]):
+            raise ManifestError(f"{where}: ranges[{i}] must be [start, end] with end > start >= 0")
+        ranges.append((float(pair[0]), float(pair[1])))
+    return ranges
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Cannot read manifest: {e}")
+    if not isinstance(manifest, dict):
+        raise ManifestError("Manifest must be a JSON object")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = [] # (path, start, end, end_offset, ranges)
+
+    def resolve(p, where):
+        if not isinstance(p, str) or not p:
+            raise ManifestError(f"{where}: 'path' must be a non-empty string")
+        return os.path.normpath(os.path.join(base_dir, p))
+
+    items = manifest.get("items", [])
+    if not isinstance(items, list):
+        raise ManifestError("'items' must be a list")
+    for i, entry in enumerate(items):
+        where = f"items[{i}]"
+        if not isinstance(entry, dict):
+            raise ManifestError(f"{where}: must be an object")
+        jobs.append((resolve(entry.get("path"), where), _number(entry, "start", where) or 0.0,
+                     _number(entry, "end", where), _number(entry, "end_offset", where), _ranges(entry, where)))
+
+    groups = manifest.get("groups", [])
+    if not isinstance(groups, list):
+        raise ManifestError("'groups' must be a list")
+    for g, group in enumerate(groups):
+        where = f"groups[{g}]"
+        if not isinstance(group, dict) or not isinstance(group.get("items"), list):
+            raise ManifestError(f"{where}: must be an object with an 'items' list")
+        start = _number(group, "start", where) or 0.0
+        end = _number(group, "end", where)
+        end_offset = _number(group, "end_offset", where)
+        for i, p in enumerate(group["items"]):
+            jobs.append((resolve(p, f"{where}.items[{i}]"), start, end, end_offset, None))
+
+    if not jobs:
+        raise ManifestError("Manifest has no items")
+    return manifest, jobs
+
+def build_items(jobs, workers, log, cancel_event=None):
+    """Probes the sources in parallel and returns (MediaItems, number of unreadable files).
+
+    On Ctrl+C sets cancel_event (which kills the running ffprobes), drops the
+    probes not started yet and re-raises KeyboardInterrupt.
+    """
+    cancel_event = cancel_event or threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(FFmpegWorker.probe, job[0], cancel_event=cancel_event) for job in jobs]
+        # Ожидание с таймаутом: Ctrl+C доходит до главного потока и на Windows
+        pending = futures
+        while pending:
+            pending = wait(pending, timeout=0.2).not_done
+        infos = [future.result() for future in futures]
+    except KeyboardInterrupt:
+        cancel_event.set()
+        raise
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    items = []
+    failed = 0
+    for (path, start, end, end_offset, ranges), info in zip(jobs, infos):
+        if info is None:
+            log(f"Failed to analyze {os.path.basename(path)}")
+            failed += 1
+            continue
+        media = MediaItem(path, fps=info.fps, duration=info.duration, resolution=info.resolution)
+        media.start_time = start
+        if end is not None:
+            media.end_time = min(end, info.duration)
+        else:
+            media.end_time = max(0.0, info.duration - (end_offset or 0.0))
+        if ranges:
+            name = os.path.basename(path)
+            outside = [i for i, (s, e) in enumerate(ranges) if s >= info.duration]
+            if outside:
+                # Без этого отрезка номера выходов съехали бы, а без всех — ушел бы весь файл
+                log(f"{name}: ranges[{outside[0]}] starts at or after the end of the media "
+                    f"({info.duration:.3f}s)")
+                failed += 1
+                continue
+            for i, (s, e) in enumerate(ranges):
+                if e > info.duration:
+                    log(f"{name}: ranges[{i}] end {e:.3f}s clamped to the media duration {info.duration:.3f}s")
+            media.ranges = [(s, min(e, info.duration)) for s, e in ranges]
+            media.start_time, media.end_time = media.ranges[0]
+        media.is_ready = True
+        items.append(media)
+    return items, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description="ClipFlow headless batch export")
+    parser.add_argument("manifest", help="JSON job manifest")
+    parser.add_argument("-o", "--output-dir", help="overrides output_dir from the manifest")
+    parser.add_argument("-j", "--workers", type=int, help="parallel export jobs")
+    parser.add_argument("--mode", choices=EXPORT_MODES, help="copy (keyframe cuts) or smart (frame-accurate)")
+    parser.add_argument("--force", action="store_true", help="re-export clips whose outputs are already up to date")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors and the summary")
+    args = parser.parse_args(argv)
+
+    def log(msg):
+        print(msg, file=sys.stderr, flush=True)
+
+    try:
+        manifest, jobs = load_manifest(args.manifest)
+    except ManifestError as e:
+        log(f"Error: {e}")
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        log("Interrupted")
+        return EXIT_INTERRUPTED
+
+    output_dir = args.output_dir or manifest.get("output_dir")
+    if not output_dir or not isinstance(output_dir, str):
+        log("Error: no output_dir in manifest and no --output-dir given")
+        return EXIT_USAGE
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        log(f"Error: cannot create {output_dir}: {e}")
+        return EXIT_USAGE
+
+    workers = args.workers or manifest.get("workers") or SettingsManager.instance().get("export_workers", 2)
+    if not isinstance(workers, int) or workers < 1:
+        log("Error: workers must be a positive integer")
+        return EXIT_USAGE
+
+    mode = args.mode or manifest.get("mode") or SettingsManager.instance().get("export_mode", "copy")
+    if mode not in EXPORT_MODES:
+        log(f"Error: mode must be one of {', '.join(EXPORT_MODES)}")
+        return EXIT_USAGE
+
+    try:
+        items, failed = build_items(jobs, workers, log)
+    except KeyboardInterrupt:
+        log("Interrupted, stopping ffprobe...")
+        return EXIT_INTERRUPTED
+
+    def on_progress(done, total, filename):
+        if not args.quiet:
+            log(f"[{done}/{total}] {filename}")
+
+    engine = ExportEngine(items, output_dir, workers, on_progress=on_progress,
+                          on_log=log if not args.quiet else lambda msg: None, on_error=log, mode=mode,
+                          skip_existing=False if args.force else None)
+
+    # Движок крутится в отдельном потоке, чтобы Ctrl+C в главном мог его отменить
+    report = []
+    runner = threading.Thread(target=lambda: report.extend(engine.run()), daemon=True)
+    runner.start()
+    try:
+        while runner.is_alive():
+            runner.join(0.2)
+    except KeyboardInterrupt:
+        log("Interrupted, stopping ffmpeg...")
+        engine.cancel()
+        runner.join()
+        return EXIT_INTERRUPTED
+
+    ok = sum(1 for r in report if r["status"] in ("ok", "skipped"))
+    failed += len(items) - ok
+    log(f"Exported {ok}/{len(jobs)}" + (f", {failed} failed" if failed else ""))
+    return EXIT_OK if failed == 0 else EXIT_FAILED
+
+if __name__ == "__main__":
+    sys.exit(main())
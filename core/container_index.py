@@ -0,0 +1,370 @@
+import mmap
+import os
+import struct
+
+from core.keyframe_index import KeyframeIndex
+
+# Чтение ключевых кадров прямо из индекса контейнера (без прохода по всем пакетам).
+# MP4/MOV: таблицы stss/stts/ctts + edit list. Matroska/WebM: элемент Cues.
+# Если контейнер не поддерживается или индекс неполный — возвращаем None,
+# и FFmpegWorker.probe сканирует пакеты через ffprobe.
+
+MP4_EXTENSIONS = {'.mp4', '.mov', '.m4v', '.3gp'}
+MKV_EXTENSIONS = {'.mkv', '.webm'}
+
+def read_keyframes(path):
+    """Returns a KeyframeIndex of keyframe pts times in seconds, or None if the
+    container index can't be used for this file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in MP4_EXTENSIONS and ext not in MKV_EXTENSIONS:
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if ext in MP4_EXTENSIONS:
+                    return Mp4Index(mm).keyframes()
+                return MatroskaIndex(mm).keyframes()
+    except (OSError, ValueError, struct.error, IndexError):
+        return None
+
+# --- MP4 / MOV ---
+
+class Mp4Index:
+    def __init__(self, mm):
+        self.mm = mm
+
+    def boxes(self, start, end):
+        """Yields (type, payload_start, box_end) for the boxes in [start, end)."""
+        mm = self.mm
+        pos = start
+        while pos + 8 <= end:
+            size, = struct.unpack_from('>I', mm, pos)
+            box_type = bytes(mm[pos + 4:pos + 8])
+            header = 8
+            if size == 1:
+                size, = struct.unpack_from('>Q', mm, pos + 8)
+                header = 16
+            elif size == 0:
+                size = end - pos
+            if size < header or pos + size > end:
+                return
+            yield box_type, pos + header, pos + size
+            pos += size
+
+    def find(self, box_type, start, end):
+        for t, payload, box_end in self.boxes(start, end):
+            if t == box_type:
+                return payload, box_end
+        return None
+
+    def keyframes(self):
+        mm = self.mm
+        moov = None
+        for t, payload, box_end in self.boxes(0, len(mm)):
+            if t == b'moov':
+                moov = (payload, box_end)
+            elif t == b'moof':
+                # Фрагментированный MP4: семплы описаны во фрагментах, а не в stbl
+                return None
+        if moov is None:
+            return None
+
+        movie_timescale = 0
+        mvhd = self.find(b'mvhd', *moov)
+        if mvhd:
+            version = mm[mvhd[0]]
+            movie_timescale, = struct.unpack_from('>I', mm, mvhd[0] + (20 if version == 1 else 12))
+
+        for t, payload, box_end in self.boxes(*moov):
+            if t != b'trak':
+                continue
+            mdia = self.find(b'mdia', payload, box_end)
+            if not mdia:
+                continue
+            hdlr = self.find(b'hdlr', *mdia)
+            if not hdlr or bytes(mm[hdlr[0] + 8:hdlr[0] + 12]) != b'vide':
+                continue
+            # Первая видеодорожка — то же, что ffprobe -select_streams v:0
+            return self.track_keyframes(payload, box_end, mdia, movie_timescale)
+        return None
+
+    def track_keyframes(self, trak_start, trak_end, mdia, movie_timescale):
+        mm = self.mm
+        mdhd = self.find(b'mdhd', *mdia)
+        if not mdhd:
+            return None
+        version = mm[mdhd[0]]
+        timescale, = struct.unpack_from('>I', mm, mdhd[0] + (20 if version == 1 else 12))
+        if not timescale:
+            return None
+
+        minf = self.find(b'minf', *mdia)
+        stbl = self.find(b'stbl', *minf) if minf else None
+        if not stbl:
+            return None
+
+        stts = self.find(b'stts', *stbl)
+        if not stts:
+            return None
+        count, = struct.unpack_from('>I', mm, stts[0] + 4)
+        stts_runs = [struct.unpack_from('>II', mm, stts[0] + 8 + i * 8) for i in range(count)]
+        total_samples = sum(n for n, _ in stts_runs)
+        if not total_samples:
+            return None
+
+        ctts_runs = []
+        ctts = self.find(b'ctts', *stbl)
+        if ctts:
+            count, = struct.unpack_from('>I', mm, ctts[0] + 4)
+            # Смещения в ctts v0 формально беззнаковые, но на практике пишутся со знаком
+            ctts_runs = [struct.unpack_from('>Ii', mm, ctts[0] + 8 + i * 8) for i in range(count)]
+
+        stss = self.find(b'stss', *stbl)
+        if stss:
+            count, = struct.unpack_from('>I', mm, stss[0] + 4)
+            sync = sorted(struct.unpack_from(f'>{count}I', mm, stss[0] + 8))
+        else:
+            # Нет stss — все семплы ключевые (intra-only кодеки)
+            sync = range(1, total_samples + 1)
+
+        shift = self.edit_shift(trak_start, trak_end, timescale, movie_timescale)
+        if shift is None:
+            return None
+
+        if not stss and len(stts_runs) == 1 and not any(off for _, off in ctts_runs):
+            # Intra-only с постоянной длительностью кадра — одна арифметическая серия
+            return KeyframeIndex.from_run(-shift, stts_runs[0][1] / timescale, total_samples)
+
+        times = []
+        stts_i = ctts_i = 0
+        stts_left, delta = stts_runs[0]
+        ctts_left, offset = ctts_runs[0] if ctts_runs else (0, 0)
+        dts = 0
+        sample = 1
+        for target in sync:
+            # Двигаемся по сериям stts/ctts до нужного семпла, не перебирая семплы по одному
+            while sample < target:
+                step = min(target - sample, stts_left)
+                if ctts_runs:
+                    step = min(step, ctts_left)
+                dts += step * delta
+                sample += step
+                stts_left -= step
+                if stts_left == 0 and stts_i + 1 < len(stts_runs):
+                    stts_i += 1
+                    stts_left, delta = stts_runs[stts_i]
+                if ctts_runs:
+                    ctts_left -= step
+                    if ctts_left == 0 and ctts_i + 1 < len(ctts_runs):
+                        ctts_i += 1
+                        ctts_left, offset = ctts_runs[ctts_i]
+                if step == 0:
+                    return None
+            times.append((dts + offset) / timescale - shift)
+
+        return KeyframeIndex(times)
+
+    def edit_shift(self, trak_start, trak_end, timescale, movie_timescale):
+        """Seconds to subtract from media time, per the track's edit list.
+
+        Only the common layouts are supported (leading empty edits followed by
+        one media edit); anything else returns None.
+        """
+        mm = self.mm
+        edts = self.find(b'edts', trak_start, trak_end)
+        elst = self.find(b'elst', *edts) if edts else None
+        if not elst:
+            return 0.0
+
+        version = mm[elst[0]]
+        count, = struct.unpack_from('>I', mm, elst[0] + 4)
+        entry_size = 20 if version == 1 else 12
+        fmt = '>QqI' if version == 1 else '>IiI'
+
+        empty = 0.0
+        media_edits = []
+        for i in range(count):
+            seg_duration, media_time, _rate = struct.unpack_from(fmt, mm, elst[0] + 8 + i * entry_size)
+            if media_time == -1:
+                if movie_timescale:
+                    empty += seg_duration / movie_timescale
+            else:
+                media_edits.append(media_time)
+        if len(media_edits) > 1:
+            return None
+
+        media_time = media_edits[0] if media_edits else 0
+        return media_time / timescale - empty
+
+# --- Matroska / WebM ---
+
+ID_EBML = 0x1A45DFA3
+ID_DOCTYPE = 0x4282
+ID_SEGMENT = 0x18538067
+ID_SEEKHEAD = 0x114D9B74
+ID_SEEK = 0x4DBB
+ID_SEEK_ID = 0x53AB
+ID_SEEK_POSITION = 0x53AC
+ID_INFO = 0x1549A966
+ID_TIMESTAMP_SCALE = 0x2AD7B1
+ID_TRACKS = 0x1654AE6B
+ID_TRACK_ENTRY = 0xAE
+ID_TRACK_NUMBER = 0xD7
+ID_TRACK_TYPE = 0x83
+ID_CUES = 0x1C53BB6B
+ID_CUE_POINT = 0xBB
+ID_CUE_TIME = 0xB3
+ID_CUE_TRACK_POSITIONS = 0xB7
+ID_CUE_TRACK = 0xF7
+ID_CLUSTER = 0x1F43B675
+
+class MatroskaIndex:
+    def __init__(self, mm):
+        self.mm = mm
+
+    def read_vint(self, pos, keep_marker):
+        first = self.mm[pos]
+        length = 1
+        mask = 0x80
+        while length <= 8 and not first & mask:
+            mask >>= 1
+            length += 1
+        if length > 8:
+            raise ValueError("invalid EBML vint")
+        value = first if keep_marker else first & (mask - 1)
+        unknown = (first & (mask - 1)) == mask - 1
+        for i in range(1, length):
+            b = self.mm[pos + i]
+            value = (value << 8) | b
+            unknown = unknown and b == 0xFF
+        return value, length, unknown
+
+    def element(self, pos):
+        """Returns (id, data_start, data_end) for the element at pos."""
+        el_id, id_len, _ = self.read_vint(pos, True)
+        size, size_len, unknown = self.read_vint(pos + id_len, False)
+        data = pos + id_len + size_len
+        end = len(self.mm) if unknown else data + size
+        return el_id, data, min(end, len(self.mm))
+
+    def children(self, start, end):
+        pos = start
+        while pos < end:
+            el_id, data, el_end = self.element(pos)
+            yield el_id, data, el_end
+            if el_end <= pos:
+                return
+            pos = el_end
+
+    def read_uint(self, start, end):
+        value = 0
+        for b in self.mm[start:end]:
+            value = (value << 8) | b
+        return value
+
+    def keyframes(self):
+        el_id, data, end = self.element(0)
+        if el_id != ID_EBML:
+            return None
+        doctype = b''
+        for cid, cstart, cend in self.children(data, end):
+            if cid == ID_DOCTYPE:
+                doctype = bytes(self.mm[cstart:cend])
+        if doctype.rstrip(b'\x00') not in (b'matroska', b'webm'):
+            return None
+
+        el_id, segment, segment_end = self.element(end)
+        if el_id != ID_SEGMENT:
+            return None
+
+        found = {}
+        seek_heads = []
+        for cid, cstart, cend in self.children(segment, segment_end):
+            if cid in (ID_INFO, ID_TRACKS, ID_CUES) and cid not in found:
+                found[cid] = (cstart, cend)
+            elif cid == ID_SEEKHEAD:
+                seek_heads.append((cstart, cend))
+            elif cid == ID_CLUSTER:
+                # Дальше кластеры с данными — остальное ищем через SeekHead
+                break
+
+        visited = set()
+        while seek_heads:
+            head = seek_heads.pop()
+            if head in visited:
+                continue
+            visited.add(head)
+            for target_id, position in self.seek_entries(*head):
+                if target_id in found or target_id not in (ID_INFO, ID_TRACKS, ID_CUES, ID_SEEKHEAD):
+                    continue
+                pos = segment + position
+                if pos >= len(self.mm):
+                    continue
+                cid, cstart, cend = self.element(pos)
+                if cid != target_id:
+                    continue
+                if cid == ID_SEEKHEAD:
+                    seek_heads.append((cstart, cend))
+                else:
+                    found[cid] = (cstart, cend)
+
+        if ID_CUES not in found or ID_TRACKS not in found:
+            return None
+
+        scale = 1000000
+        if ID_INFO in found:
+            for cid, cstart, cend in self.children(*found[ID_INFO]):
+                if cid == ID_TIMESTAMP_SCALE:
+                    scale = self.read_uint(cstart, cend) or scale
+
+        video_track = self.first_video_track(*found[ID_TRACKS])
+        if video_track is None:
+            return None
+
+        times = []
+        for cid, cstart, cend in self.children(*found[ID_CUES]):
+            if cid != ID_CUE_POINT:
+                continue
+            cue_time = None
+            tracks = set()
+            for pid, pstart, pend in self.children(cstart, cend):
+                if pid == ID_CUE_TIME:
+                    cue_time = self.read_uint(pstart, pend)
+                elif pid == ID_CUE_TRACK_POSITIONS:
+                    for tid, tstart, tend in self.children(pstart, pend):
+                        if tid == ID_CUE_TRACK:
+                            tracks.add(self.read_uint(tstart, tend))
+            if cue_time is not None and video_track in tracks:
+                times.append(cue_time * scale / 1e9)
+
+        if not times:
+            return None
+        return KeyframeIndex(times)
+
+    def seek_entries(self, start, end):
+        for cid, cstart, cend in self.children(start, end):
+            if cid != ID_SEEK:
+                continue
+            target_id = position = None
+            for sid, sstart, send in self.children(cstart, cend):
+                if sid == ID_SEEK_ID:
+                    target_id = self.read_uint(sstart, send)
+                elif sid == ID_SEEK_POSITION:
+                    position = self.read_uint(sstart, send)
+            if target_id is not None and position is not None:
+                yield target_id, position
+
+    def first_video_track(self, start, end):
+        for cid, cstart, cend in self.children(start, end):
+            if cid != ID_TRACK_ENTRY:
+                continue
+            number = track_type = None
+            for tid, tstart, tend in self.children(cstart, cend):
+                if tid == ID_TRACK_NUMBER:
+                    number = self.read_uint(tstart, tend)
+                elif tid == ID_TRACK_TYPE:
+                    track_type = self.read_uint(tstart, tend)
+            if track_type == 1:
+                return number
+        return None
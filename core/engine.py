@@ -0,0 +1,590 @@
+import os
+import csv
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.ffmpeg_core import FFmpegWorker
+from core.export_journal import ExportJournal, partial_path, finalize
+from core import smart_render
+from utils.settings import SettingsManager
+
+# Hide console window on Windows
+if sys.platform == 'win32':
+    STARTUPINFO = subprocess.STARTUPINFO()
+    STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+    CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW
+else:
+    STARTUPINFO = None
+    CREATE_NO_WINDOW = 0
+
+EXPORT_MODES = ("copy", "smart")
+# Во сколько раз перекодирование секунды дороже копирования (для шкалы прогресса)
+SMART_ENCODE_WEIGHT = 8.0
+# Запас перед ключевым кадром для -ss выхода: копирование сравнивает dts, а у
+# ключевого кадра с B-кадрами dts раньше pts на глубину переупорядочивания (H.264: до 16 кадров)
+REORDER_LEAD_FRAMES = 16
+
+# Тег выходного файла с ключом задания (см. ExportEngine.job_key); версия меняет все ключи сразу
+JOB_KEY_TAG = "clipflow_job_key"
+JOB_KEY_VERSION = 1
+
+class ExportError(Exception):
+    """An item that can't be exported (analysis failed, nothing left after snapping)."""
+
+def _ignore(*args):
+    pass
+
+class ExportEngine:
+    """Qt-free probe/snap/export pipeline shared by the GUI (ExportThread) and cli.py.
+
+    mode "copy" stream-copies from the keyframe at or before each mark;
+    "smart" cuts on the exact frames (see core.smart_render). An item with
+    several ranges (MediaItem.ranges) gives one output per range; in copy mode
+    they are all written by one ffmpeg run reading the source once.
+
+    ffmpeg writes to a .part file that is renamed into place only when it
+    succeeds, and each job's state goes to the ExportJournal: a batch stopped
+    by a crash or a cancel resumes where it left off on the next run into
+    the same folder.
+
+    Every output is tagged with the job key (source identity, requested and
+    snapped cut points, export settings). With skip_existing, a job whose
+    outputs already exist with the same key is reported as "skipped"
+    instead of being exported again. Without it every job runs, including
+    the ones an interrupted batch already finished.
+
+    Progress is reported through plain callables:
+        on_progress(done, total, filename)           — job started or finished
+        on_job_progress(path, fraction, mbps, eta)   — per source path; 1.0 once the job ends, however it ends
+        on_batch_progress(fraction, eta)
+        on_log(message)
+        on_error(message)                            — a job failed, the report wasn't written
+    They are called from worker threads. on_error defaults to on_log.
+    """
+    REPORT_FIELDS = ["source", "output", "status", "bytes_read_est", "bytes_written", "wall_time", "mb_per_s", "error"]
+    
+    def __init__(self, items, output_dir, workers=None,
+                 on_progress=None, on_job_progress=None, on_batch_progress=None, on_log=None, mode=None,
+                 journal=None, skip_existing=None, on_error=None):
+        self.items = items
+        self.output_dir = output_dir
+        if workers is None:
+            workers = SettingsManager.instance().get("export_workers", 2)
+        self.workers = max(1, int(workers))
+        if mode is None:
+            mode = SettingsManager.instance().get("export_mode", "copy")
+        self.mode = mode if mode in EXPORT_MODES else "copy"
+        if skip_existing is None:
+            skip_existing = SettingsManager.instance().get("export_skip_existing", True)
+        self.skip_existing = bool(skip_existing)
+        self.journal = journal if journal is not None else ExportJournal.instance()
+        self._batch_id = None
+        self._job_ids = {}
+        self._outputs = {}
+        self.is_running = True
+        self._done = 0
+        self._lock = threading.Lock()
+        self._procs = set()
+
+        # Учет прогресса пачки: стоимость (байты) каждого задания и доля выполненного
+        self._costs = {}
+        self._active = {}
+        self._finished_cost = 0.0
+        self._batch_cost = 1.0
+        self._batch_started = 0.0
+        self.report = []
+
+        self.on_progress = on_progress or _ignore
+        self.on_job_progress = on_job_progress or _ignore
+        self.on_batch_progress = on_batch_progress or _ignore
+        self.on_log = on_log or _ignore
+        self.on_error = on_error or self.on_log
+
+    @staticmethod
+    def estimate_cost(item):
+        """Approximate bytes to copy: the marked share of the source file size."""
+        span = sum(max(0.0, end - start) for start, end in item.cut_ranges())
+        try:
+            size = os.path.getsize(item.path)
+        except OSError:
+            return span
+        return size * span / item.duration if item.duration > 0 else size
+
+    def job_id(self, item):
+        """Identity of an item's job in the journal: source (and its size/mtime), ranges and mode."""
+        try:
+            st = os.stat(item.path)
+            stamp = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            stamp = None
+        return json.dumps([item.path, stamp, [list(r) for r in item.cut_ranges()], self.mode])
+
+    def output_paths(self, item):
+        """Final output path for each of item's ranges, unique within the batch (see assign_outputs)."""
+        paths = self._outputs.get(id(item))
+        if paths is None:
+            paths = self._output_paths(item)
+        return paths
+
+    def assign_outputs(self):
+        """Picks the output paths of every item so that no two jobs of the batch
+        write the same file: an item whose names are already taken by an earlier
+        one (same-named clips from different cards) gets _2, _3, ... appended.
+
+        Names depend only on the queue order, so a resumed batch gets the same ones.
+        """
+        taken = set()
+        self._outputs = {}
+        for item in self.items:
+            paths = self._output_paths(item)
+            n = 1
+            while any(os.path.normcase(path) in taken for path in paths):
+                n += 1
+                paths = self._output_paths(item, f"_{n}")
+            taken.update(os.path.normcase(path) for path in paths)
+            self._outputs[id(item)] = paths
+
+    def _output_paths(self, item, suffix=""):
+        name, ext = os.path.splitext(item.filename)
+        # Check if output dir is same as source dir to apply _crop suffix
+        if os.path.normpath(self.output_dir) == os.path.normpath(os.path.dirname(item.path)):
+            name = f"{name}_crop"
+        name += suffix
+        count = len(item.cut_ranges())
+        if count == 1:
+            return [os.path.join(self.output_dir, f"{name}{ext}")]
+        return [os.path.join(self.output_dir, f"{name}_{n:02d}{ext}") for n in range(1, count + 1)]
+
+    def run(self):
+        """Exports all items; returns the per-item report records."""
+        total = len(self.items)
+        self.assign_outputs()
+
+        # Журнал: задания, законченные прерванным прогоном в эту же папку, не повторяются
+        self._job_ids = {id(item): self.job_id(item) for item in self.items}
+        self._batch_id, finished = self.journal.open_batch(self.output_dir, self.mode, list(self._job_ids.values()))
+        if not self.skip_existing:
+            finished = {} # Экспорт всего заново (--force): законченные задания тоже повторяются
+        pending = []
+        for item in self.items:
+            outputs = finished.get(self._job_ids[id(item)])
+            if outputs is None:
+                pending.append(item)
+                continue
+            record = dict.fromkeys(self.REPORT_FIELDS, "")
+            record.update(source=item.path, output="; ".join(outputs), status="skipped",
+                          bytes_read_est=0, bytes_written=0, wall_time=0.0, mb_per_s=0.0)
+            self.report.append(record)
+            self._done += 1
+        if finished:
+            self.on_log(f"Resuming interrupted export: {self._done} of {total} already done")
+            self.on_progress(self._done, total, "")
+
+        # Самые длинные задания первыми (LPT) — меньше простоя воркеров в конце пачки
+        self._costs = {id(item): self.estimate_cost(item) for item in pending}
+        order = sorted(pending, key=lambda item: self._costs[id(item)], reverse=True)
+        self._batch_cost = sum(self._costs.values()) or 1.0
+        self._batch_started = time.monotonic()
+        batch_started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        # Пробы запускаются заранее и идут параллельно с ремуксом предыдущих файлов
+        probe_pool = ThreadPoolExecutor(max_workers=self.workers)
+        export_pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            probes = [probe_pool.submit(FFmpegWorker.probe, item.path) for item in order]
+            jobs = {export_pool.submit(self.run_job, item, probe, total): item
+                    for item, probe in zip(order, probes)}
+            for job in as_completed(jobs):
+                item = jobs[job]
+                try:
+                    job.result()
+                except ExportError as e:
+                    self.on_error(str(e))
+                except Exception as e:
+                    self.on_error(f"Error processing {item.filename}: {str(e)}")
+                # Строка задания в окне прогресса закрывается и при ошибке/отмене
+                self.on_job_progress(item.path, 1.0, 0.0, 0.0)
+                with self._lock:
+                    self._done += 1
+                    done = self._done
+                self.on_progress(done, total, item.filename)
+        finally:
+            export_pool.shutdown(wait=True, cancel_futures=True)
+            probe_pool.shutdown(wait=True, cancel_futures=True)
+
+        # Прогон без отмены и ошибок закрывает пачку; иначе следующий продолжит с незаконченных
+        if self.is_running and sum(1 for r in self.report if r["status"] in ("ok", "skipped")) == total:
+            self.journal.close_batch(self._batch_id)
+
+        self.write_report(batch_started_at, time.monotonic() - self._batch_started)
+        return self.report
+
+    def cancel(self):
+        self.is_running = False
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try: proc.kill()
+            except OSError: pass
+
+    def run_job(self, item, probe, total):
+        if not self.is_running:
+            return
+        with self._lock:
+            done = self._done
+        self.on_progress(done, total, item.filename)
+
+        record = dict.fromkeys(self.REPORT_FIELDS, "")
+        record.update(source=item.path, status="failed", bytes_read_est=0, bytes_written=0)
+        started = time.monotonic()
+        job = self._job_ids.get(id(item)) or self.job_id(item)
+        self.journal.job_started(self._batch_id, job, self.output_paths(item))
+        try:
+            stats = self.process_item(item, probe.result())
+            record["status"] = "ok"
+            record.update(stats)
+            self.journal.job_done(self._batch_id, job, stats["output"].split("; "))
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+            self.journal.job_failed(self._batch_id, job)
+            raise
+        finally:
+            wall_time = time.monotonic() - started
+            record["wall_time"] = round(wall_time, 3)
+            record["mb_per_s"] = round(record["bytes_written"] / wall_time / 1e6, 2) if wall_time > 0 else 0.0
+            with self._lock:
+                self.report.append(record)
+                self._active.pop(id(item), None)
+                self._finished_cost += self._costs.get(id(item), 0.0)
+            self.emit_batch_progress()
+
+    def process_item(self, item, info=None):
+        source_path = item.path
+        filename = item.filename
+        
+        # 1. Get Info (один прогон ffprobe, либо кэш)
+        if info is None:
+            info = FFmpegWorker.probe(source_path)
+        if info is None or not info.keyframes:
+            raise ExportError(f"Failed to analyze {filename}")
+        duration, keyframes = info.duration, info.keyframes
+
+        # 2. Keyframe snapping
+        # item.start_time/end_time (и каждый отрезок в item.ranges) — абсолютные метки от начала файла;
+        # метаданные хранят конец в стиле старого скрипта: сколько секунд отрезано от конца.
+
+        # Calculate tolerance (1 frame duration)
+        try:
+            fps = getattr(item, 'fps', 25.0)
+            if not fps or fps <= 0: fps = 25.0
+            tolerance = 1.0 / fps
+        except:
+            tolerance = 0.05
+
+        encoder_args = None
+        if self.mode == "smart":
+            encoder_args = smart_render.encoder_args(info)
+            if encoder_args is None:
+                self.on_log(f"{filename}: smart render does not support {info.codec_name or 'this codec'}, stream copy used")
+
+        # 3. Metadata
+        existing_meta = info.tags
+        history_index = 1
+        while f"trim_history_{history_index}_source_duration" in existing_meta:
+            history_index += 1
+
+        # Один индекс ключевых кадров на все отрезки; несколько отрезков — name_01, name_02, ...
+        ranges = item.cut_ranges()
+        cuts = [] # (output_path, actual_start, actual_end, segments, output_args)
+        for n, ((desired_start_time, desired_end_time), output_path) in enumerate(zip(ranges, self.output_paths(item)), 1):
+
+            segments = None
+            if encoder_args is not None:
+                # Кадровая точность: перекодируем только края
+                segments = smart_render.plan_smart_cut(keyframes, desired_start_time, min(desired_end_time, duration),
+                                                       tolerance, duration)
+                actual_start_time = segments[0][1]
+                actual_end_time = segments[-1][2]
+            else:
+                actual_start_time = self.find_keyframe_before(keyframes, desired_start_time, tolerance)
+                actual_end_time = self.find_keyframe_before(keyframes, desired_end_time, tolerance)
+
+            if actual_start_time >= actual_end_time:
+                if len(ranges) > 1:
+                    raise ExportError(f"Video {filename}: range {n} too short for trimming.")
+                raise ExportError(f"Video {filename} too short for trimming.")
+
+            requested_start_trim = desired_start_time
+            requested_end_trim = max(0, duration - desired_end_time)
+
+            metadata_args = [
+                "-metadata", f"comment=Trimmed with Pro Video Trimmer 2025",
+                "-metadata", f"trim_history_{history_index}_source_duration={duration:.6f}",
+                "-metadata", f"trim_history_{history_index}_start_requested={requested_start_trim:.3f}",
+                "-metadata", f"trim_history_{history_index}_start_actual={actual_start_time:.6f}",
+                "-metadata", f"trim_history_{history_index}_end_requested={requested_end_trim:.3f}",
+                "-metadata", f"trim_history_{history_index}_end_actual={(duration - actual_end_time):.6f}",
+            ]
+            if segments is not None:
+                metadata_args += ["-metadata", f"trim_history_{history_index}_mode=smart"]
+            cuts.append((output_path, actual_start_time, actual_end_time, segments, metadata_args))
+
+        outputs = [cut[0] for cut in cuts]
+        job_key = self.job_key(item, ranges, cuts, encoder_args)
+        if self.skip_existing and self.is_up_to_date(outputs, job_key):
+            self.on_log(f"Up to date: {filename}")
+            return {"output": "; ".join(outputs), "status": "skipped", "bytes_written": 0, "bytes_read_est": 0}
+
+        for i, (output_path, actual_start_time, actual_end_time, segments, metadata_args) in enumerate(cuts):
+            output_args = []
+            if output_path.lower().endswith(('.mp4', '.mov')):
+                output_args.extend(["-movflags", "use_metadata_tags"])
+            output_args.extend(metadata_args)
+            output_args.extend(["-metadata", f"{JOB_KEY_TAG}={job_key}"])
+            # ffmpeg пишет во временный файл; под итоговым именем появляется только готовый
+            output_args.extend(["-y", partial_path(output_path)])
+            cuts[i] = (output_path, actual_start_time, actual_end_time, segments, output_args)
+
+        # 4. Command
+        try:
+            if encoder_args is not None:
+                # Каждый отрезок — своя склейка; шкала делится по длительности отрезков
+                total = sum(cut[2] - cut[1] for cut in cuts)
+                done = 0.0
+                for _, actual_start_time, actual_end_time, segments, output_args in cuts:
+                    length = actual_end_time - actual_start_time
+                    self.smart_render(item, info, segments, encoder_args, output_args,
+                                      (done / total, (done + length) / total))
+                    done += length
+                read_duration = total
+            else:
+                command, read_duration = self.copy_command(source_path, cuts, keyframes, fps)
+                # Execute with hidden console
+                self.run_ffmpeg(command, item, max(cut[2] - cut[1] for cut in cuts))
+            for output_path in outputs:
+                finalize(output_path)
+        except Exception:
+            # Недописанные файлы не оставляем; прежний файл под итоговым именем не трогаем
+            for output_path in outputs:
+                if os.path.exists(partial_path(output_path)):
+                    try: os.remove(partial_path(output_path))
+                    except OSError: pass
+            raise
+        for output_path in outputs:
+            self.on_log(f"Saved: {os.path.basename(output_path)}")
+
+        try:
+            bytes_written = sum(os.path.getsize(output_path) for output_path in outputs)
+            source_size = os.path.getsize(source_path)
+        except OSError:
+            bytes_written = source_size = 0
+        return {
+            "output": "; ".join(outputs),
+            "bytes_written": bytes_written,
+            # ffmpeg не сообщает прочитанные байты — оцениваем по доле исходника
+            "bytes_read_est": int(source_size * read_duration / duration) if duration > 0 else 0,
+        }
+
+    def job_key(self, item, ranges, cuts, encoder_args):
+        """Hash of everything that determines an item's outputs: source identity,
+        requested and snapped cut points, output names and export settings."""
+        try:
+            st = os.stat(item.path)
+            stamp = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            stamp = None
+        payload = [JOB_KEY_VERSION, item.path, stamp, self.mode, encoder_args,
+                   [[round(start, 6), round(end, 6)] for start, end in ranges],
+                   [[os.path.basename(cut[0]), round(cut[1], 6), round(cut[2], 6)] for cut in cuts]]
+        return hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_up_to_date(outputs, job_key):
+        """True if every output exists and carries job_key in its tags."""
+        for output_path in outputs:
+            if not os.path.isfile(output_path):
+                return False
+        for output_path in outputs:
+            tags = FFmpegWorker.read_tags(output_path)
+            if not tags or tags.get(JOB_KEY_TAG) != job_key:
+                return False
+        return True
+
+    @staticmethod
+    def copy_command(source_path, cuts, keyframes, fps):
+        """One stream-copy ffmpeg run with an output per cut; returns (command, seconds read).
+
+        The source is opened once at the earliest keyframe and read through to
+        the last out point; each output picks its window with output-side -ss/-t.
+        """
+        first = min(cut[1] for cut in cuts)
+        last = max(cut[2] for cut in cuts)
+        command = ["ffmpeg", "-ss", str(first), "-i", source_path]
+        for _, actual_start_time, actual_end_time, _, output_args in cuts:
+            offset = actual_start_time - first
+            lead = 0.0
+            if offset > 0:
+                # Окно открывается чуть раньше ключевого кадра (но после предыдущего):
+                # кадры до него копирование само отбрасывает, пока не встретит ключевой
+                previous = keyframes.before(actual_start_time, strict=True) or 0.0
+                lead = min(REORDER_LEAD_FRAMES / fps, (actual_start_time - previous) / 2)
+                lead = min(lead, offset)
+                command += ["-ss", f"{offset - lead:.6f}"]
+            command += ["-t", str(actual_end_time - actual_start_time + lead),
+                        "-fflags", "+genpts", "-c", "copy"]
+            if lead > 0:
+                # Звук в запасе до ключевого кадра не нужен — начинается вместе с видео
+                command += ["-bsf:a", f"noise=drop=lt(pts*tb\\,{lead:.6f})"]
+            command += output_args
+        return command, last - first
+
+    def smart_render(self, item, info, segments, encoder_args, output_args, span=(0.0, 1.0)):
+        """Renders segments (see smart_render.plan_smart_cut) into pieces, then joins
+        them with the source audio; returns bytes written.
+
+        Progress is reported within span of the job's progress bar.
+        """
+        start, end = segments[0][1], segments[-1][2]
+        # Доля шкалы прогресса на каждый шаг: кодирование дороже копирования, плюс финальная склейка
+        weights = [(t1 - t0) * (SMART_ENCODE_WEIGHT if mode == "encode" else 1.0) for mode, t0, t1 in segments]
+        weights.append(end - start)
+        total_weight = sum(weights) or 1.0
+        scale = lambda weight: span[0] + (span[1] - span[0]) * weight / total_weight
+
+        work_dir = tempfile.mkdtemp(prefix=".smart_", dir=self.output_dir)
+        try:
+            pieces = []
+            done_weight = 0.0
+            for i, (mode, t0, t1) in enumerate(segments):
+                piece = os.path.join(work_dir, f"{i}{smart_render.PIECE_EXTENSION}")
+                length = t1 - t0
+                if mode == "encode":
+                    # Метка между кадрами: -t с запасом в полкадра, а точное число кадров — через -frames:v
+                    fps = info.fps or 25.0
+                    origin = info.keyframes.before(t0 + 1e-6) or 0.0
+                    frames = smart_render.frame_count(t0, t1, origin, fps)
+                    codec_args = encoder_args + ["-frames:v", str(frames)]
+                    length += 0.5 / fps
+                else:
+                    codec_args = smart_render.copy_args(length, info.fps)
+                command = ["ffmpeg", "-ss", f"{t0:.6f}", "-i", item.path, "-t", f"{length:.6f}",
+                           "-map", "0:v:0", "-an", "-sn", "-dn"] + codec_args + ["-f", smart_render.PIECE_MUXER, "-y", piece]
+                self.run_ffmpeg(command, item, t1 - t0, (scale(done_weight), scale(done_weight + weights[i])))
+                pieces.append(piece)
+                done_weight += weights[i]
+
+            list_path = os.path.join(work_dir, "pieces.txt")
+            with open(list_path, 'w', encoding='utf-8') as f:
+                f.write(smart_render.concat_list(pieces))
+
+            # Видео — склейка кусков без перекодирования, звук — копия того же отрезка источника
+            command = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_path,
+                       "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", item.path,
+                       "-map", "0:v:0", "-map", "1:a:0?", "-c", "copy"]
+            if info.codec_name == "hevc" and output_args[-1].lower().endswith(('.mp4', '.mov')):
+                command += ["-tag:v", "hvc1"]
+            command += output_args
+            return self.run_ffmpeg(command, item, end - start, (scale(done_weight), span[1]))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def run_ffmpeg(self, command, item, new_duration, span=(0.0, 1.0)):
+        """Runs ffmpeg with a -progress channel on stdout; returns bytes written.
+
+        The step's own progress is mapped onto span of the job's progress bar.
+        """
+        command = [command[0], "-nostats", "-progress", "pipe:1"] + command[1:]
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, encoding='utf-8', errors='replace',
+                                startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW)
+        with self._lock:
+            self._procs.add(proc)
+
+        started = time.monotonic()
+        out_time = 0.0
+        total_size = 0
+        try:
+            for line in proc.stdout:
+                key, _, value = line.strip().partition('=')
+                try:
+                    if key == "out_time_us":
+                        out_time = int(value) / 1e6
+                    elif key == "total_size":
+                        total_size = int(value)
+                except ValueError:
+                    continue # N/A в начале
+                if key == "progress":
+                    fraction = min(1.0, out_time / new_duration) if new_duration > 0 else 0.0
+                    fraction = span[0] + (span[1] - span[0]) * fraction
+                    self.emit_job_progress(item, fraction, total_size, time.monotonic() - started)
+            proc.wait()
+        finally:
+            proc.stdout.close()
+            with self._lock:
+                self._procs.discard(proc)
+
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, command)
+        return total_size
+
+    def emit_job_progress(self, item, fraction, bytes_written, elapsed):
+        mbps = bytes_written / elapsed / 1e6 if elapsed > 0 else 0.0
+        eta = elapsed * (1.0 - fraction) / fraction if fraction > 0 else -1.0
+        self.on_job_progress(item.path, fraction, mbps, eta)
+
+        with self._lock:
+            self._active[id(item)] = fraction
+        self.emit_batch_progress()
+
+    def emit_batch_progress(self):
+        with self._lock:
+            done_cost = self._finished_cost + sum(self._costs.get(key, 0.0) * f for key, f in self._active.items())
+        fraction = min(1.0, done_cost / self._batch_cost)
+        elapsed = time.monotonic() - self._batch_started
+        eta = elapsed * (1.0 - fraction) / fraction if fraction > 0 else -1.0
+        self.on_batch_progress(fraction, eta)
+
+    def write_report(self, started_at, wall_time):
+        """Writes per-item stats of the batch to config/reports as JSON and CSV."""
+        if not self.report:
+            return
+        reports_dir = os.path.join(SettingsManager.instance().config_dir(), "reports")
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        json_path = os.path.join(reports_dir, f"export_{stamp}.json")
+        csv_path = os.path.join(reports_dir, f"export_{stamp}.csv")
+
+        total_written = sum(r["bytes_written"] for r in self.report)
+        summary = {
+            "started_at": started_at,
+            "output_dir": self.output_dir,
+            "workers": self.workers,
+            "wall_time": round(wall_time, 3),
+            "bytes_written": total_written,
+            "mb_per_s": round(total_written / wall_time / 1e6, 2) if wall_time > 0 else 0.0,
+            "items": self.report,
+        }
+        try:
+            os.makedirs(reports_dir, exist_ok=True)
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=4, ensure_ascii=False)
+            with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.report)
+            self.on_log(f"Report: {json_path}")
+        except OSError as e:
+            self.on_error(f"Error writing report: {e}")
+
+    def find_keyframe_before(self, keyframes, target_time, tolerance=0.0):
+        # Use tolerance to snap to keyframe if we are very close (e.g. floating point error)
+        # or if user selected a "nearest" point which is technically just before the keyframe.
+        best_keyframe = keyframes.before(target_time + tolerance)
+        return best_keyframe if best_keyframe is not None else 0.0
@@ -0,0 +1,177 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+
+from utils.settings import SettingsManager
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+def partial_path(path):
+    """Name ffmpeg writes to before the finished file is renamed into place.
+
+    The extension is kept so ffmpeg still picks the muxer from it.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.part{ext}"
+
+def finalize(path):
+    """Moves the finished partial file onto path in one step (flushed to disk first)."""
+    partial = partial_path(path)
+    with open(partial, 'rb+') as f:
+        os.fsync(f.fileno()) # После сбоя питания под итоговым именем не окажется пустой файл
+    os.replace(partial, path)
+
+class ExportJournal:
+    """On-disk record of export batches and the state of each job in them.
+
+    Lives in config/export_journal.db. Every state change is committed right
+    away, so after a crash, a reboot or a cancel the next export into the same
+    folder knows which jobs already produced their outputs and only runs the
+    rest. A batch in which every job finished is closed and forgotten.
+    """
+    _instance = None
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = os.path.join(SettingsManager.instance().config_dir(), 'export_journal.db')
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+
+        db_dir = os.path.dirname(self._db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Пишут воркеры экспорта из разных потоков — сериализуем через self._lock
+        conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            conn.executescript("DROP TABLE IF EXISTS jobs; DROP TABLE IF EXISTS batches;")
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                output_dir TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                started REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                batch_id INTEGER NOT NULL,
+                job TEXT NOT NULL,
+                state TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (batch_id, job)
+            );
+        """)
+        conn.commit()
+        self._conn = conn
+        return conn
+
+    def open_batch(self, output_dir, mode, jobs):
+        """Starts a batch of jobs (opaque strings, see ExportEngine.job_id) writing to output_dir.
+
+        If an earlier batch into the same folder was interrupted, it is resumed:
+        returns (batch_id, {job: [outputs]}) with the jobs it already finished
+        whose outputs are still on disk. Partial files of jobs that were
+        running when it stopped are deleted.
+        """
+        output_dir = os.path.normcase(os.path.abspath(output_dir))
+        wanted = set(jobs)
+        finished = {}
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT id FROM batches WHERE output_dir = ? AND mode = ? ORDER BY id DESC LIMIT 1",
+                    (output_dir, mode)).fetchone()
+                if row is None:
+                    batch_id = conn.execute("INSERT INTO batches (output_dir, mode, started) VALUES (?, ?, ?)",
+                                            (output_dir, mode, time.time())).lastrowid
+                else:
+                    batch_id = row[0]
+                    for job, state, outputs, nbytes in conn.execute(
+                            "SELECT job, state, outputs, bytes FROM jobs WHERE batch_id = ?", (batch_id,)).fetchall():
+                        outputs = json.loads(outputs)
+                        if state == DONE and job in wanted and self._intact(outputs, nbytes):
+                            finished[job] = outputs
+                            continue
+                        for path in outputs:
+                            # Недописанный файл прерванного прогона
+                            try: os.remove(partial_path(path))
+                            except OSError: pass
+                new = [(batch_id, job, PENDING, "[]", 0, time.time()) for job in jobs if job not in finished]
+                conn.executemany("INSERT OR REPLACE INTO jobs (batch_id, job, state, outputs, bytes, updated) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", new)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Export journal error: {e}")
+                return None, {}
+        return batch_id, finished
+
+    @staticmethod
+    def _intact(outputs, nbytes):
+        try:
+            return bool(outputs) and sum(os.path.getsize(path) for path in outputs) == nbytes
+        except OSError:
+            return False
+
+    def _set(self, batch_id, job, state, outputs=None, nbytes=0):
+        if batch_id is None:
+            return
+        with self._lock:
+            try:
+                conn = self._connect()
+                if outputs is None:
+                    conn.execute("UPDATE jobs SET state = ?, updated = ? WHERE batch_id = ? AND job = ?",
+                                 (state, time.time(), batch_id, job))
+                else:
+                    conn.execute("UPDATE jobs SET state = ?, outputs = ?, bytes = ?, updated = ? "
+                                 "WHERE batch_id = ? AND job = ?",
+                                 (state, json.dumps(outputs), nbytes, time.time(), batch_id, job))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Export journal error: {e}")
+
+    def job_started(self, batch_id, job, outputs):
+        self._set(batch_id, job, RUNNING, outputs)
+
+    def job_done(self, batch_id, job, outputs):
+        try:
+            nbytes = sum(os.path.getsize(path) for path in outputs)
+        except OSError:
+            nbytes = -1 # Проверку целостности при возобновлении не пройдет — задание повторится
+        self._set(batch_id, job, DONE, outputs, nbytes)
+
+    def job_failed(self, batch_id, job):
+        self._set(batch_id, job, FAILED)
+
+    def close_batch(self, batch_id):
+        """Forgets a batch whose jobs all finished."""
+        if batch_id is None:
+            return
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM jobs WHERE batch_id = ?", (batch_id,))
+                conn.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Export journal error: {e}")
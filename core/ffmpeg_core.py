@@ -1,5 +1,11 @@
 import subprocess
 import sys
+import time
+
+from core.container_index import read_keyframes
+from core.keyframe_index import KeyframeIndex
+from core.models import ProbeResult
+from core.probe_cache import ProbeCache
 
 # Hide console window on Windows
 if sys.platform == 'win32':
@@ -11,38 +17,195 @@ else:
     STARTUPINFO = None
     CREATE_NO_WINDOW = 0
 
+# Поля, которые запрашиваем у ffprobe за один проход
+HEADER_ENTRIES = ("stream=codec_name,profile,pix_fmt,width,height,r_frame_rate,avg_frame_rate,bit_rate"
+                  ":format=format_name,duration,bit_rate:format_tags")
+PACKET_ENTRIES = "packet=pts_time,flags"
+
+# Как часто отдавать найденные ключевые кадры наружу при потоковом сканировании
+KEYFRAME_BATCH_SIZE = 2000
+KEYFRAME_BATCH_INTERVAL = 0.25
+
+def split_compact_line(line):
+    """Splits one line of `-of compact` output into (section, {key: value}).
+
+    ffprobe escapes '|', '\\' and control characters in values with a backslash.
+    """
+    parts = []
+    buf = []
+    escapes = {'n': '\n', 'r': '\r', 't': '\t', 'b': '\b', 'f': '\f'}
+    i, n = 0, len(line)
+    while i < n:
+        ch = line[i]
+        if ch == '\\' and i + 1 < n:
+            buf.append(escapes.get(line[i + 1], line[i + 1]))
+            i += 2
+            continue
+        if ch == '|':
+            parts.append(''.join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+        i += 1
+    parts.append(''.join(buf))
+
+    entries = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition('=')
+        if sep:
+            entries[key] = value
+    return parts[0], entries
+
+def parse_rate(value):
+    try:
+        if '/' in value:
+            num, den = map(int, value.split('/'))
+            return num / den if den else 0.0
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
 class FFmpegWorker:
     @staticmethod
-    def get_video_info(path):
-        fps = 25.0
-        try:
-            fps_cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", 
-                       "-show_entries", "stream=r_frame_rate", "-of", "csv=p=0", path]
-            res = subprocess.run(fps_cmd, capture_output=True, text=True,
-                               startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW).stdout.strip()
-            if '/' in res:
-                num, den = map(int, res.split('/'))
-                fps = num / den if den != 0 else 25.0
-            else:
-                fps = float(res)
-        except: pass
-
-        duration = 0.0
+    def probe(path, use_cache=True, on_keyframes=None, cancel_event=None):
+        """Returns a ProbeResult for path, or None if ffprobe can't read it.
+
+        Stream info, format info, container tags and packet flags all come from
+        a single ffprobe run; the result is stored in ProbeCache. When the
+        container carries its own keyframe index (MP4/MOV sync samples,
+        Matroska Cues) it is read directly and ffprobe only parses headers.
+
+        ffprobe output is read as a stream: on_keyframes(list) receives batches
+        of keyframe times while the scan runs, and setting cancel_event kills
+        ffprobe and returns None. A container index is complete up front and is
+        passed to on_keyframes once, as the KeyframeIndex itself (still
+        run-encoded for fixed-GOP and intra-only tracks).
+        """
+        if use_cache:
+            cached = ProbeCache.instance().get(path)
+            if cached is not None:
+                return cached
+
+        index_keyframes = read_keyframes(path)
+        if index_keyframes is not None and on_keyframes:
+            on_keyframes(index_keyframes)
+        show_entries = HEADER_ENTRIES if index_keyframes is not None else f"{PACKET_ENTRIES}:{HEADER_ENTRIES}"
+
+        command = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+                   "-show_entries", show_entries, "-of", "compact=p=1", path]
         try:
-            dur_cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", 
-                       "-show_entries", "format=duration", "-of", "csv=p=0", path]
-            res = subprocess.run(dur_cmd, capture_output=True, text=True,
-                               startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW).stdout.strip()
-            duration = float(res)
-        except: pass
+            proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    text=True, encoding='utf-8', errors='replace',
+                                    startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW)
+        except OSError:
+            return None
 
         keyframes = []
+        batch = []
+        header_lines = []
+        last_flush = time.monotonic()
+        try:
+            for line in proc.stdout:
+                if cancel_event is not None and cancel_event.is_set():
+                    proc.kill()
+                    return None
+
+                # Пакеты идут первыми и их больше всего — берем только ключевые, без полного парсера
+                if line.startswith("packet|"):
+                    if "flags=K" not in line:
+                        continue
+                    try:
+                        batch.append(float(line.split("pts_time=", 1)[1].split("|", 1)[0]))
+                    except (IndexError, ValueError):
+                        continue
+                    if len(batch) >= KEYFRAME_BATCH_SIZE or time.monotonic() - last_flush >= KEYFRAME_BATCH_INTERVAL:
+                        keyframes.extend(batch)
+                        if on_keyframes:
+                            on_keyframes(batch)
+                        batch = []
+                        last_flush = time.monotonic()
+                    continue
+
+                header_lines.append(line.rstrip('\n'))
+        finally:
+            proc.stdout.close()
+            proc.wait()
+
+        if batch:
+            keyframes.extend(batch)
+            if on_keyframes:
+                on_keyframes(batch)
+
+        result = ProbeResult(path=path)
+        for line in header_lines:
+            section, entries = split_compact_line(line)
+            if section == "stream":
+                fps = parse_rate(entries.get("r_frame_rate")) or parse_rate(entries.get("avg_frame_rate"))
+                if fps > 0:
+                    result.fps = fps
+                result.codec_name = entries.get("codec_name", "")
+                result.profile = entries.get("profile", "")
+                result.pix_fmt = entries.get("pix_fmt", "")
+                try: result.width = int(entries.get("width", 0))
+                except ValueError: pass
+                try: result.height = int(entries.get("height", 0))
+                except ValueError: pass
+                try: result.bit_rate = int(entries.get("bit_rate", 0))
+                except ValueError: pass
+            elif section == "format":
+                result.format_name = entries.get("format_name", "")
+                try: result.duration = float(entries.get("duration", 0.0))
+                except ValueError: pass
+                if not result.bit_rate:
+                    try: result.bit_rate = int(entries.get("bit_rate", 0))
+                    except ValueError: pass
+                result.tags = {k[4:]: v for k, v in entries.items() if k.startswith("tag:")}
+
+        if result.duration <= 0:
+            return None
+
+        if index_keyframes is not None:
+            result.keyframes = index_keyframes
+            result.keyframe_source = "index"
+        else:
+            result.keyframes = KeyframeIndex(keyframes)
+            result.keyframe_source = "packets"
+        ProbeCache.instance().put(result)
+        return result
+
+    @staticmethod
+    def read_tags(path, timeout=15):
+        """Container tags of path (headers only, no packet scan), or None if it can't be read."""
+        command = ["ffprobe", "-v", "error", "-show_entries", "format_tags", "-of", "compact=p=1", path]
+        try:
+            proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout,
+                                  text=True, encoding='utf-8', errors='replace',
+                                  startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if proc.returncode != 0:
+            return None
+        for line in proc.stdout.splitlines():
+            section, entries = split_compact_line(line)
+            if section == "format":
+                return {k[4:]: v for k, v in entries.items() if k.startswith("tag:")}
+        return {}
+
+    @staticmethod
+    def extract_frame(path, t, height, quality=5, timeout=15):
+        """JPEG bytes of the frame at t scaled to height, or None.
+
+        Seeking before -i jumps straight to the nearest keyframe, so asking
+        for keyframe times decodes a single frame.
+        """
+        command = ["ffmpeg", "-v", "error", "-ss", f"{max(0.0, t):.6f}", "-i", path,
+                   "-an", "-sn", "-frames:v", "1", "-vf", f"scale=-2:{int(height)}",
+                   "-c:v", "mjpeg", "-q:v", str(quality), "-f", "image2pipe", "pipe:1"]
         try:
-            kf_cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", 
-                      "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path]
-            res = subprocess.run(kf_cmd, capture_output=True, text=True,
-                               startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW)
-            keyframes = [float(l.split(',')[0]) for l in res.stdout.splitlines() if 'K' in l]
-        except: pass
-        
-        return fps, duration, keyframes
\ No newline at end of file
+            proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout,
+                                  startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if proc.returncode != 0 or not proc.stdout:
+            return None
+        return proc.stdout
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.ffmpeg_core import FFmpegWorker
+from core.fingerprint import FingerprintService
+from core.models import MediaItem
+from utils.settings import SettingsManager
+
+class IngestThread(QThread):
+    """Probes a batch of files on a worker pool and streams MediaItems back as they finish.
+
+    Every file ends in exactly one item_ready or item_failed, which is what the
+    main window counts for its progress bar.
+    """
+    item_ready = pyqtSignal(object)      # MediaItem
+    item_failed = pyqtSignal(str, str)   # path, error
+
+    def __init__(self, paths, workers=None):
+        super().__init__()
+        self.paths = list(paths)
+        if workers is None:
+            workers = SettingsManager.instance().get("ingest_workers", 4)
+        self.workers = max(1, int(workers))
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_canceled(self):
+        return self._cancel.is_set()
+
+    def probe_one(self, path):
+        info = FFmpegWorker.probe(path, cancel_event=self._cancel)
+        if info is None:
+            return None
+        media = MediaItem(path, fps=info.fps, duration=info.duration, resolution=info.resolution)
+        # Для поиска дубликатов при добавлении (после промаха кэша проб уже посчитан)
+        media.fingerprint = FingerprintService.instance().get(path)
+        return media
+
+    def run(self):
+        # ffprobe — внешний процесс, поэтому потоков достаточно (GIL не мешает)
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {pool.submit(self.probe_one, p): p for p in self.paths}
+            for future in as_completed(futures):
+                if self._cancel.is_set():
+                    break
+                path = futures[future]
+                try:
+                    media = future.result()
+                except Exception as e:
+                    self.item_failed.emit(path, str(e))
+                else:
+                    if media is None:
+                        self.item_failed.emit(path, "ffprobe could not read the file")
+                    else:
+                        self.item_ready.emit(media)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,206 @@
+import bisect
+import math
+from array import array
+
+# Допуск при проверке, лежит ли время на арифметической прогрессии (секунды)
+RUN_EPSILON = 1e-5
+
+class KeyframeIndex:
+    """Sorted keyframe times with O(log n) before/after/range queries.
+
+    Times are kept in an array('d'). Sources with a fixed GOP or all-intra
+    sources (every frame is a keyframe) are stored instead as runs of an
+    arithmetic progression (start, step, count), so a 10-hour ProRes file
+    costs a handful of numbers instead of millions of floats.
+    """
+
+    def __init__(self, times=()):
+        self._times = array('d')
+        # Режим серий: параллельные массивы start/step/count и индекс первого кадра серии
+        self._run_start = None
+        self._run_step = None
+        self._run_count = None
+        self._run_offset = None
+        self._len = 0
+        if times:
+            self._build(sorted(times))
+
+    @classmethod
+    def from_times(cls, times):
+        return cls(times)
+
+    @classmethod
+    def from_run(cls, start, step, count):
+        """Index of count keyframes at start, start + step, ..."""
+        index = cls()
+        if count > 0:
+            index._set_runs([start], [step if count > 1 else 0.0], [count])
+        return index
+
+    def _build(self, times):
+        runs_start, runs_step, runs_count = [], [], []
+        i, n = 0, len(times)
+        while i < n:
+            start = times[i]
+            if i + 1 < n:
+                step = times[i + 1] - start
+                j = i + 2
+                while j < n and abs(times[j] - (start + (j - i) * step)) < RUN_EPSILON:
+                    j += 1
+                count = j - i
+            else:
+                step, count = 0.0, 1
+            runs_start.append(start)
+            runs_step.append(step if count > 1 else 0.0)
+            runs_count.append(count)
+            i += count
+
+        # Серии выгодны только если сжимают заметно, иначе — обычный массив
+        if len(runs_start) * 8 <= n:
+            self._set_runs(runs_start, runs_step, runs_count)
+        else:
+            self._times = array('d', times)
+            self._len = n
+
+    def _set_runs(self, starts, steps, counts):
+        self._times = array('d')
+        self._run_start = array('d', starts)
+        self._run_step = array('d', steps)
+        self._run_count = array('q', counts)
+        self._run_offset = array('q')
+        total = 0
+        for c in counts:
+            self._run_offset.append(total)
+            total += c
+        self._len = total
+
+    @property
+    def is_run_encoded(self):
+        return self._run_start is not None
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("keyframe index out of range")
+        if self._run_start is None:
+            return self._times[i]
+        r = bisect.bisect_right(self._run_offset, i) - 1
+        return self._run_start[r] + (i - self._run_offset[r]) * self._run_step[r]
+
+    def __iter__(self):
+        if self._run_start is None:
+            return iter(self._times)
+        return self._iter_runs(0, self._len)
+
+    def _iter_runs(self, lo, hi):
+        if lo >= hi:
+            return
+        r = bisect.bisect_right(self._run_offset, lo) - 1
+        i = lo
+        while i < hi:
+            start, step, offset = self._run_start[r], self._run_step[r], self._run_offset[r]
+            end = min(hi, offset + self._run_count[r])
+            for k in range(i - offset, end - offset):
+                yield start + k * step
+            i = end
+            r += 1
+
+    def __eq__(self, other):
+        if isinstance(other, KeyframeIndex):
+            return len(self) == len(other) and all(abs(a - b) < RUN_EPSILON for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        mode = "runs" if self.is_run_encoded else "array"
+        return f"KeyframeIndex({self._len} keyframes, {mode})"
+
+    def count_le(self, t):
+        """Number of keyframes <= t."""
+        if self._run_start is None:
+            return bisect.bisect_right(self._times, t)
+        r = bisect.bisect_right(self._run_start, t) - 1
+        if r < 0:
+            return 0
+        step = self._run_step[r]
+        count = self._run_count[r]
+        if step > 0:
+            k = min(count - 1, int(math.floor((t - self._run_start[r]) / step + 1e-9)))
+        else:
+            k = count - 1
+        return self._run_offset[r] + k + 1
+
+    def count_lt(self, t):
+        """Number of keyframes < t."""
+        if self._run_start is None:
+            return bisect.bisect_left(self._times, t)
+        r = bisect.bisect_left(self._run_start, t) - 1
+        if r < 0:
+            return 0
+        step = self._run_step[r]
+        count = self._run_count[r]
+        if step > 0:
+            k = max(0, min(count, int(math.ceil((t - self._run_start[r]) / step - 1e-9))))
+        else:
+            k = count
+        return self._run_offset[r] + k
+
+    def before(self, t, strict=False):
+        """Last keyframe <= t (< t if strict), or None."""
+        i = self.count_lt(t) if strict else self.count_le(t)
+        return self[i - 1] if i > 0 else None
+
+    def after(self, t, strict=True):
+        """First keyframe > t (>= t if not strict), or None."""
+        i = self.count_le(t) if strict else self.count_lt(t)
+        return self[i] if i < self._len else None
+
+    def range(self, t0, t1):
+        """Iterates keyframes with t0 <= t <= t1."""
+        lo, hi = self.count_lt(t0), self.count_le(t1)
+        if self._run_start is None:
+            return iter(self._times[lo:hi])
+        return self._iter_runs(lo, hi)
+
+    def extend(self, batch):
+        """Appends times from a running scan (kept sorted)."""
+        if not batch:
+            return
+        if self._run_start is not None:
+            self._times = array('d', self)
+            self._run_start = self._run_step = self._run_count = self._run_offset = None
+        batch = sorted(batch)
+        if self._times and batch[0] < self._times[-1]:
+            self._times = array('d', sorted(self._times.tolist() + batch))
+        else:
+            self._times.extend(batch)
+        self._len = len(self._times)
+
+    def tolist(self):
+        return list(self)
+
+    def to_bytes(self):
+        if self._run_start is None:
+            return b'A' + self._times.tobytes()
+        runs = array('d')
+        for r in range(len(self._run_start)):
+            runs.extend((self._run_start[r], self._run_step[r], float(self._run_count[r])))
+        return b'R' + runs.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        index = cls()
+        values = array('d')
+        values.frombytes(data[1:])
+        if data[:1] == b'R':
+            index._set_runs(values[0::3], values[1::3], [int(c) for c in values[2::3]])
+        else:
+            index._times = values
+            index._len = len(values)
+        return index
@@ -0,0 +1,13 @@
+def apply_markers(items, start=None, end_offset=None):
+    """Marks a group's clips: start is the shared IN point, end_offset the OUT
+    distance from the end of each clip (None leaves that side alone).
+
+    Only the fields change here; the caller refreshes the queue once for the
+    whole group (QueueModel.refresh_group).
+    """
+    for media in items:
+        if start is not None:
+            media.start_time = start
+        if end_offset is not None:
+            media.end_time = max(0.0, media.duration - end_offset)
+        media.is_ready = True
@@ -0,0 +1,102 @@
+import sys
+
+from core.models import MediaItem
+
+class MediaStore:
+    """Registry of the queue's items: every MediaItem/GroupItem by integer id,
+    and clips by path and by content fingerprint (when known).
+
+    Items are __slots__ records; the id is assigned on add() and is what the
+    queue model stores in its indexes, so views hold plain integers instead
+    of references to Python objects. The footprint of each record is measured
+    when it is added and again by resize() after an edit that changes it (the
+    queue model calls it on refresh), so memory_bytes() is O(1) at any size.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_path = {}
+        self._by_fingerprint = {}
+        self._next_id = 1
+        self._sizes = {} # id -> байты записи на момент последнего замера
+        self._record_bytes = 0
+
+    def __len__(self):
+        return len(self._by_path)
+
+    def __contains__(self, path):
+        return path in self._by_path
+
+    def get(self, item_id):
+        return self._by_id.get(item_id)
+
+    def by_path(self, path):
+        return self._by_path.get(path)
+
+    def by_fingerprint(self, fp):
+        return self._by_fingerprint.get(fp)
+
+    def media(self):
+        return self._by_path.values()
+
+    def add(self, obj):
+        """Registers obj (a new id unless it already has one here); returns its id."""
+        if obj.id is None or self._by_id.get(obj.id) is not obj:
+            obj.id = self._next_id
+            self._next_id += 1
+        if obj.id not in self._by_id:
+            size = self._sizeof(obj)
+            self._sizes[obj.id] = size
+            self._record_bytes += size
+        self._by_id[obj.id] = obj
+        if isinstance(obj, MediaItem):
+            self._by_path[obj.path] = obj
+            if obj.fingerprint:
+                self._by_fingerprint.setdefault(obj.fingerprint, obj)
+        return obj.id
+
+    def discard(self, obj):
+        if self._by_id.pop(obj.id, None) is None:
+            return
+        self._record_bytes -= self._sizes.pop(obj.id, 0)
+        if isinstance(obj, MediaItem) and self._by_path.get(obj.path) is obj:
+            del self._by_path[obj.path]
+        if isinstance(obj, MediaItem) and self._by_fingerprint.get(obj.fingerprint) is obj:
+            del self._by_fingerprint[obj.fingerprint]
+
+    def clear(self):
+        self._by_id.clear()
+        self._by_path.clear()
+        self._by_fingerprint.clear()
+        self._sizes.clear()
+        self._record_bytes = 0
+
+    def resize(self, obj):
+        """Re-measures obj after an edit of its size-changing fields (ranges,
+        path, group name or clip list); returns True if the footprint changed."""
+        old = self._sizes.get(obj.id)
+        if old is None or self._by_id.get(obj.id) is not obj:
+            return False
+        size = self._sizeof(obj)
+        self._sizes[obj.id] = size
+        self._record_bytes += size - old
+        return size != old
+
+    def memory_bytes(self):
+        """Approximate bytes held by the records, their strings and the indexes."""
+        return (self._record_bytes + sys.getsizeof(self._by_id) + sys.getsizeof(self._by_path)
+                + sys.getsizeof(self._by_fingerprint))
+
+    @staticmethod
+    def _sizeof(obj):
+        size = sys.getsizeof(obj)
+        if isinstance(obj, MediaItem):
+            size += sys.getsizeof(obj.path) + sys.getsizeof(obj.filename) + sys.getsizeof(obj.resolution)
+            size += 3 * sys.getsizeof(0.0) # duration, start_time, end_time (fps часто общий)
+            size += sys.getsizeof(obj.ranges)
+            size += len(obj.ranges) * (sys.getsizeof((0.0, 0.0)) + 2 * sys.getsizeof(0.0))
+            if obj.fingerprint:
+                size += sys.getsizeof(obj.fingerprint)
+        else:
+            size += sys.getsizeof(obj.name) + sys.getsizeof(obj.uid) + sys.getsizeof(obj.items)
+        return size
@@ -1,7 +1,16 @@
 import os
+import uuid
+from dataclasses import dataclass, field
+
+from core.keyframe_index import KeyframeIndex
 
 class MediaItem:
+    # Слоты вместо __dict__: очередь на 100k клипов (см. MediaStore)
+    __slots__ = ('id', 'path', 'filename', 'fps', 'duration', 'resolution',
+                 'start_time', 'end_time', 'ranges', 'is_ready', 'group', 'fingerprint')
+
     def __init__(self, path, fps=25.0, duration=0.0, resolution="Unknown"):
+        self.id = None # Выдается MediaStore
         self.path = path
         self.filename = os.path.basename(path)
         self.fps = fps
@@ -9,12 +18,46 @@ class MediaItem:
         self.resolution = resolution
         self.start_time = 0.0
         self.end_time = duration
+        self.ranges = [] # Сохраненные отрезки (start, end) для экспорта нескольких клипов из файла
         self.is_ready = False  # Статус (Зеленый/Красный)
+        self.group = None # GroupItem, в которой клип стоит в очереди
+        self.fingerprint = None # Отпечаток содержимого (core.fingerprint), если известен
+
+    def cut_ranges(self):
+        """(start, end) pairs to export: the saved ranges, or the IN/OUT marks if there are none."""
+        return list(self.ranges) if self.ranges else [(self.start_time, self.end_time)]
 
 class GroupItem:
+    __slots__ = ('id', 'uid', 'name', 'items', 'start_time', 'end_time', 'is_ready')
+
     def __init__(self, name):
+        self.id = None # Выдается MediaStore
+        self.uid = uuid.uuid4().hex # Стабильный ключ группы в файле проекта
         self.name = name
         self.items = [] # Список MediaItem
         self.start_time = 0.0
         self.end_time = 0.0
-        self.is_ready = False
\ No newline at end of file
+        self.is_ready = False
+
+@dataclass
+class ProbeResult:
+    """Everything ClipFlow needs to know about a source, from a single ffprobe run."""
+    path: str
+    fps: float = 25.0
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+    codec_name: str = ""
+    profile: str = ""
+    pix_fmt: str = ""
+    bit_rate: int = 0
+    format_name: str = ""
+    tags: dict = field(default_factory=dict)      # Теги контейнера (format tags)
+    keyframes: KeyframeIndex = field(default_factory=KeyframeIndex) # pts_time ключевых кадров
+    keyframe_source: str = ""                     # "index" (таблицы контейнера) или "packets" (ffprobe)
+
+    @property
+    def resolution(self):
+        if self.width and self.height:
+            return f"{self.width}x{self.height}"
+        return "Unknown"
@@ -0,0 +1,83 @@
+import os
+import threading
+from PyQt6.QtCore import QThread
+
+from core.ffmpeg_core import FFmpegWorker
+from utils.settings import SettingsManager
+
+READ_BLOCK = 1024 * 1024
+# Доля бюджета на конец файла: индекс MP4 (moov) без faststart лежит в хвосте
+TAIL_SHARE = 0.25
+
+def warm_file(path, budget, cancel_event=None):
+    """Pulls the head and tail of path (budget bytes in total) into the OS page
+    cache, so opening it and decoding the first frames don't wait on the disk.
+
+    Uses posix_fadvise(WILLNEED) where available (the kernel reads ahead in
+    the background), otherwise reads the blocks and throws them away.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError:
+        return
+    try:
+        size = os.fstat(fd).st_size
+        if size <= budget:
+            spans = [(0, size)]
+        else:
+            tail = int(budget * TAIL_SHARE)
+            spans = [(0, budget - tail), (size - tail, tail)]
+
+        if hasattr(os, 'posix_fadvise'):
+            for offset, length in spans:
+                os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+            return
+
+        for offset, length in spans:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while length > 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                chunk = os.read(fd, min(READ_BLOCK, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class PreloadThread(QThread):
+    """Warms the clips the user is likely to open next, one file at a time:
+    the keyframe index (ProbeCache) and the bytes needed to open the file and
+    show its first frames (see warm_file).
+
+    How many clips is the preload_items setting (applied by the caller), how
+    much of each is preload_mb. Only one file is open at a time; cancel()
+    stops before the next step.
+    """
+
+    def __init__(self, paths, budget=None):
+        super().__init__()
+        self.paths = list(paths)
+        if budget is None:
+            budget = int(SettingsManager.instance().get("preload_mb", 32)) * 1024 * 1024
+        self.budget = max(0, int(budget))
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_canceled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        for path in self.paths:
+            if self._cancel.is_set():
+                return
+            # Файл с диска первым: ffprobe читает его уже из кэша
+            if self.budget:
+                warm_file(path, self.budget, self._cancel)
+            if self._cancel.is_set():
+                return
+            FFmpegWorker.probe(path, cancel_event=self._cancel)
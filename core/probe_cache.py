@@ -0,0 +1,245 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import fields
+
+from core.fingerprint import FingerprintService
+from core.keyframe_index import KeyframeIndex
+from core.models import ProbeResult
+from utils.settings import SettingsManager
+
+class ProbeCache:
+    """Persistent store of ffprobe results keyed on path, size and mtime.
+
+    Lives in config/probe_cache.db so that re-opening a file (ingest, preview,
+    export) is a lookup instead of a new packet scan. Entries whose size or
+    mtime no longer match the file on disk are dropped on read.
+
+    Entries also carry the file's content fingerprint (core.fingerprint): a
+    renamed or moved file, or another copy of it, misses on path but is found
+    by content and gets its own entry without a new ffprobe run.
+    """
+    _instance = None
+
+    # Увеличивать при изменении схемы: старая база просто пересоздается
+    SCHEMA_VERSION = 4
+
+    def __init__(self, db_path=None, max_bytes=None):
+        if db_path is None:
+            db_path = os.path.join(SettingsManager.instance().config_dir(), 'probe_cache.db')
+        if max_bytes is None:
+            max_bytes = int(SettingsManager.instance().get("probe_cache_max_mb", 256)) * 1024 * 1024
+
+        self._db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+
+        db_dir = os.path.dirname(self._db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Доступ из QThread экспорта и из GUI — сериализуем через self._lock
+        conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS probes")
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS probes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                info TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                keyframes BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                accessed REAL NOT NULL,
+                fingerprint TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_probes_accessed ON probes(accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_probes_fingerprint ON probes(fingerprint)")
+        conn.commit()
+        self._conn = conn
+        return conn
+
+    @staticmethod
+    def _stat(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path):
+        """Returns the cached ProbeResult for path, or None on a miss."""
+        try:
+            size, mtime_ns = self._stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT size, mtime_ns, info, tags, keyframes FROM probes WHERE path = ?",
+                    (path,)).fetchone()
+                if row is not None and (row[0] != size or row[1] != mtime_ns):
+                    # Файл изменился — запись устарела
+                    conn.execute("DELETE FROM probes WHERE path = ?", (path,))
+                    conn.commit()
+                    row = None
+
+                if row is not None:
+                    conn.execute("UPDATE probes SET accessed = ? WHERE path = ?", (time.time(), path))
+                    conn.commit()
+            except sqlite3.Error as e:
+                print(f"Probe cache read error: {e}")
+                return None
+
+        if row is None:
+            row = self._get_by_content(path, size, mtime_ns)
+            if row is None:
+                return None
+
+        known = {f.name for f in fields(ProbeResult)}
+        info = {k: v for k, v in json.loads(row[2]).items() if k in known}
+        keyframes = KeyframeIndex.from_bytes(row[4])
+
+        return ProbeResult(path=path, tags=json.loads(row[3]), keyframes=keyframes, **info)
+
+    def _get_by_content(self, path, size, mtime_ns):
+        """Row of another path with the same fingerprint, copied under path; None if there is none."""
+        fp = FingerprintService.instance().get(path)
+        if fp is None:
+            return None
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT info, tags, keyframes FROM probes WHERE fingerprint = ? LIMIT 1", (fp,)).fetchone()
+                if row is None:
+                    return None
+                # Тот же файл под другим именем (переименован, перемещен или копия)
+                info_json, tags_json, kf_blob = row
+                conn.execute(
+                    "INSERT OR REPLACE INTO probes (path, size, mtime_ns, info, tags, keyframes, nbytes, accessed, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, size, mtime_ns, info_json, tags_json, kf_blob,
+                     len(path) + len(info_json) + len(tags_json) + len(kf_blob) + len(fp) + 64, time.time(), fp))
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Probe cache read error: {e}")
+                return None
+        return (size, mtime_ns) + tuple(row)
+
+    def put(self, result):
+        """Stores a ProbeResult, replacing whatever was cached for its path."""
+        try:
+            size, mtime_ns = self._stat(result.path)
+        except OSError:
+            return
+
+        info = {f.name: getattr(result, f.name) for f in fields(result)
+                if f.name not in ('path', 'tags', 'keyframes')}
+        info_json = json.dumps(info)
+        tags_json = json.dumps(result.tags, ensure_ascii=False)
+        kf_blob = result.keyframes.to_bytes()
+        fp = FingerprintService.instance().get(result.path)
+        nbytes = len(result.path) + len(info_json) + len(tags_json) + len(kf_blob) + len(fp or "") + 64
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO probes (path, size, mtime_ns, info, tags, keyframes, nbytes, accessed, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (result.path, size, mtime_ns, info_json, tags_json, kf_blob, nbytes, time.time(), fp))
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Probe cache write error: {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM probes").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Удаляем давно не использованные записи, пока не уложимся в лимит
+        doomed = []
+        for path, nbytes in conn.execute("SELECT path, nbytes FROM probes ORDER BY accessed ASC"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((path,))
+            total -= nbytes
+        conn.executemany("DELETE FROM probes WHERE path = ?", doomed)
+
+    # Колонки «сырой» записи для переноса в файл проекта и обратно (без декодирования)
+    RAW_COLUMNS = ("path", "size", "mtime_ns", "info", "tags", "keyframes")
+
+    def export_rows(self, paths):
+        """Raw rows (see RAW_COLUMNS) for the given paths that are in the cache."""
+        rows = []
+        paths = list(paths)
+        with self._lock:
+            try:
+                conn = self._connect()
+                for i in range(0, len(paths), 500):
+                    chunk = paths[i:i + 500]
+                    rows.extend(conn.execute(
+                        f"SELECT {', '.join(self.RAW_COLUMNS)} FROM probes WHERE path IN ({', '.join('?' * len(chunk))})",
+                        chunk).fetchall())
+            except sqlite3.Error as e:
+                print(f"Probe cache read error: {e}")
+        return rows
+
+    def import_rows(self, rows):
+        """Adds raw rows that aren't cached yet. Stale ones are dropped by get() as usual."""
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT OR IGNORE INTO probes (path, size, mtime_ns, info, tags, keyframes, nbytes, accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(path, size, mtime_ns, info, tags, kf, len(path) + len(info) + len(tags) + len(kf) + 64, now)
+                     for path, size, mtime_ns, info, tags, kf in rows])
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Probe cache write error: {e}")
+
+    def invalidate(self, path):
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM probes WHERE path = ?", (path,))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Probe cache write error: {e}")
+
+    def clear(self):
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM probes")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Probe cache write error: {e}")
+
+    def total_bytes(self):
+        with self._lock:
+            try:
+                return self._connect().execute("SELECT COALESCE(SUM(nbytes), 0) FROM probes").fetchone()[0]
+            except sqlite3.Error:
+                return 0
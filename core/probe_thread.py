@@ -0,0 +1,36 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.ffmpeg_core import FFmpegWorker
+from core.keyframe_index import KeyframeIndex
+
+class ProbeThread(QThread):
+    """Probes one file in the background, streaming keyframes as they are found."""
+    keyframes_found = pyqtSignal(str, list) # path, batch of keyframe times
+    keyframes_indexed = pyqtSignal(str, object) # path, KeyframeIndex from the container index (complete)
+    probe_ready = pyqtSignal(str, object)   # path, ProbeResult or None
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_canceled(self):
+        return self._cancel.is_set()
+
+    def _on_keyframes(self, keyframes):
+        if isinstance(keyframes, KeyframeIndex):
+            # Индекс целиком, без развертки серий в список
+            self.keyframes_indexed.emit(self.path, keyframes)
+        else:
+            self.keyframes_found.emit(self.path, keyframes)
+
+    def run(self):
+        result = FFmpegWorker.probe(self.path,
+                                    on_keyframes=self._on_keyframes,
+                                    cancel_event=self._cancel)
+        if not self._cancel.is_set():
+            self.probe_ready.emit(self.path, result)
@@ -0,0 +1,211 @@
+import os
+import json
+import sqlite3
+
+from core.models import MediaItem, GroupItem
+from core.probe_cache import ProbeCache
+
+class ProjectError(Exception):
+    """A project file that can't be opened or read."""
+
+class ProjectStore:
+    """SQLite project file (*.cfproj): queue order, groups, markers and probe results.
+
+    The queue is passed around as a layout: a list of top-level MediaItem and
+    GroupItem objects, where each GroupItem.items holds its MediaItems.
+
+    sync() compares the layout against the rows it last wrote and only touches
+    what differs, so autosaving a 2,000-item queue after moving one marker is a
+    single-row UPDATE. Probe results (the same raw rows as ProbeCache) are stored
+    once per source, which lets load() rebuild everything without ffprobe.
+    """
+    SCHEMA_VERSION = 2
+    EXTENSION = ".cfproj"
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        # Состояние на диске: ключ -> кортеж строки, как он был записан
+        self._media = {}
+        self._groups = {}
+        self._meta = {}
+        self._probed = set()
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+
+        db_dir = os.path.dirname(self.path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        try:
+            conn = sqlite3.connect(self.path)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > self.SCHEMA_VERSION:
+                conn.close()
+                raise ProjectError(f"{os.path.basename(self.path)} was saved by a newer ClipFlow")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS groups (
+                    uid TEXT PRIMARY KEY, position INTEGER NOT NULL, name TEXT NOT NULL,
+                    start_time REAL NOT NULL, end_time REAL NOT NULL, is_ready INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS media (
+                    path TEXT PRIMARY KEY, group_uid TEXT, position INTEGER NOT NULL,
+                    fps REAL NOT NULL, duration REAL NOT NULL, resolution TEXT NOT NULL,
+                    start_time REAL NOT NULL, end_time REAL NOT NULL, is_ready INTEGER NOT NULL,
+                    ranges TEXT NOT NULL DEFAULT ''
+                );
+                CREATE TABLE IF NOT EXISTS probes (
+                    path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+                    info TEXT NOT NULL, tags TEXT NOT NULL, keyframes BLOB NOT NULL
+                );
+            """)
+            # v1 -> v2: отрезки клипа (JSON-список пар, '' — только IN/OUT)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(media)")}
+            if "ranges" not in columns:
+                conn.execute("ALTER TABLE media ADD COLUMN ranges TEXT NOT NULL DEFAULT ''")
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.commit()
+        except sqlite3.Error as e:
+            raise ProjectError(f"Cannot open project {self.path}: {e}")
+        self._conn = conn
+        return conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _media_row(media, group_uid, position):
+        return (group_uid, position, media.fps, media.duration, media.resolution,
+                media.start_time, media.end_time, int(media.is_ready),
+                json.dumps([list(r) for r in media.ranges]) if media.ranges else "")
+
+    @staticmethod
+    def _group_row(group, position):
+        return (position, group.name, group.start_time, group.end_time, int(group.is_ready))
+
+    def load(self):
+        """Returns (layout, meta). Also hands the stored probe results to ProbeCache."""
+        conn = self._connect()
+        try:
+            meta = {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+            group_rows = conn.execute(
+                "SELECT uid, position, name, start_time, end_time, is_ready FROM groups").fetchall()
+            media_rows = conn.execute(
+                "SELECT path, group_uid, position, fps, duration, resolution, start_time, end_time, is_ready, ranges "
+                "FROM media ORDER BY position").fetchall()
+            probe_rows = conn.execute(
+                f"SELECT {', '.join(ProbeCache.RAW_COLUMNS)} FROM probes").fetchall()
+        except (sqlite3.Error, ValueError) as e:
+            raise ProjectError(f"Cannot read project {self.path}: {e}")
+
+        top = [] # (position, object)
+        groups = {}
+        for uid, position, name, start, end, ready in group_rows:
+            group = GroupItem(name)
+            group.uid = uid
+            group.start_time, group.end_time, group.is_ready = start, end, bool(ready)
+            groups[uid] = group
+            top.append((position, group))
+            self._groups[uid] = (position, name, start, end, ready)
+
+        for path, group_uid, position, fps, duration, resolution, start, end, ready, ranges in media_rows:
+            media = MediaItem(path, fps=fps, duration=duration, resolution=resolution)
+            media.start_time, media.end_time, media.is_ready = start, end, bool(ready)
+            try:
+                media.ranges = [(float(s), float(e)) for s, e in json.loads(ranges)] if ranges else []
+            except (ValueError, TypeError):
+                media.ranges = []
+            group = groups.get(group_uid)
+            if group is not None:
+                group.items.append(media) # Строки уже отсортированы по позиции
+            else:
+                group_uid = None
+                top.append((position, media))
+            self._media[path] = self._media_row(media, group_uid, position)
+
+        top.sort(key=lambda entry: entry[0])
+        self._meta = dict(meta)
+
+        # Без ffprobe при повторном открытии: кэш получает сохраненные результаты анализа
+        if probe_rows:
+            ProbeCache.instance().import_rows(probe_rows)
+        self._probed = {row[0] for row in probe_rows}
+
+        return [obj for _, obj in top], meta
+
+    def sync(self, layout, meta=None):
+        """Writes the rows that changed since the last load()/sync(). Returns how many were written."""
+        media_rows = {}
+        group_rows = {}
+        for position, obj in enumerate(layout):
+            if isinstance(obj, GroupItem):
+                group_rows[obj.uid] = self._group_row(obj, position)
+                for child_pos, media in enumerate(obj.items):
+                    media_rows[media.path] = self._media_row(media, obj.uid, child_pos)
+            else:
+                media_rows[obj.path] = self._media_row(obj, None, position)
+
+        changed_media = [(path,) + row for path, row in media_rows.items() if self._media.get(path) != row]
+        removed_media = [(path,) for path in self._media if path not in media_rows]
+        changed_groups = [(uid,) + row for uid, row in group_rows.items() if self._groups.get(uid) != row]
+        removed_groups = [(uid,) for uid in self._groups if uid not in group_rows]
+
+        meta = meta or {}
+        changed_meta = [(k, json.dumps(v)) for k, v in meta.items() if self._meta.get(k, object()) != v]
+
+        # Результаты анализа новых исходников — один раз на файл; промах кэша (проба еще идет)
+        # повторяется при следующем sync
+        new_paths = [path for path in media_rows if path not in self._probed]
+        probe_rows = ProbeCache.instance().export_rows(new_paths) if new_paths else []
+        probed_now = {row[0] for row in probe_rows}
+
+        written = (len(changed_media) + len(removed_media) + len(changed_groups)
+                   + len(removed_groups) + len(changed_meta) + len(probe_rows))
+        if not written:
+            return 0
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO media (path, group_uid, position, fps, duration, resolution, "
+                    "start_time, end_time, is_ready, ranges) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", changed_media)
+                conn.executemany("DELETE FROM media WHERE path = ?", removed_media)
+                conn.executemany("DELETE FROM probes WHERE path = ?", removed_media)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO groups (uid, position, name, start_time, end_time, is_ready) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", changed_groups)
+                conn.executemany("DELETE FROM groups WHERE uid = ?", removed_groups)
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", changed_meta)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO probes ({', '.join(ProbeCache.RAW_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                    probe_rows)
+        except sqlite3.Error as e:
+            raise ProjectError(f"Cannot save project {self.path}: {e}")
+
+        self._media = media_rows
+        self._groups = group_rows
+        self._meta.update(meta)
+        self._probed = (self._probed & media_rows.keys()) | probed_now
+        return written
+
+    def save_as(self, path):
+        """Copies the project to path and continues working on the copy."""
+        if os.path.abspath(path) == os.path.abspath(self.path):
+            return
+        conn = self._connect()
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+            target = sqlite3.connect(path)
+            conn.backup(target)
+        except (OSError, sqlite3.Error) as e:
+            raise ProjectError(f"Cannot save project {path}: {e}")
+        self.close()
+        self._conn = target
+        self.path = path
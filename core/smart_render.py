@@ -0,0 +1,103 @@
+# Smart render: кадровая точность при скорости, близкой к ремуксу.
+# Перекодируются только неполные GOP на краях отрезка (кодек и параметры — как у
+# источника), середина от первого до последнего ключевого кадра копируется потоком,
+# куски склеиваются concat-демуксером без перекодирования.
+
+import math
+
+# Кодек источника -> энкодер ffmpeg
+ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+    "mpeg4": "mpeg4",
+    "mpeg2video": "mpeg2video",
+    "vp9": "libvpx-vp9",
+    "prores": "prores_ks",
+}
+
+# Профиль из ffprobe -> значение -profile:v энкодера
+PROFILES = {
+    "libx264": {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high",
+                "High 10": "high10", "High 4:2:2": "high422", "High 4:4:4 Predictive": "high444"},
+    "libx265": {"Main": "main", "Main 10": "main10", "Main Still Picture": "mainstillpicture"},
+    "prores_ks": {"Proxy": "proxy", "LT": "lt", "Standard": "standard", "HQ": "hq",
+                  "4444": "4444", "4444 XQ": "4444xq"},
+}
+
+# Куски пишутся в Matroska (принимает любой кодек); concat-демуксер передает смену
+# параметров кодека (SPS/PPS перекодированных краев) дальше по потоку
+PIECE_MUXER = "matroska"
+PIECE_EXTENSION = ".mkv"
+
+# Краевые GOP короткие (доли секунды): качество важнее размера
+SMART_CRF = 16
+
+def encoder_args(info):
+    """Output options that re-encode info's video stream with matching codec,
+    profile and pixel format; None if the codec can't be smart-rendered."""
+    encoder = ENCODERS.get(info.codec_name)
+    if encoder is None:
+        return None
+    args = ["-c:v", encoder]
+    if info.pix_fmt:
+        args += ["-pix_fmt", info.pix_fmt]
+    profile = PROFILES.get(encoder, {}).get(info.profile)
+    if profile:
+        args += ["-profile:v", profile]
+    if encoder in ("libx264", "libx265"):
+        args += ["-preset", "medium", "-crf", str(SMART_CRF)]
+    elif encoder == "libvpx-vp9":
+        args += ["-crf", str(SMART_CRF * 2), "-b:v", "0"]
+    elif encoder != "prores_ks":
+        args += ["-b:v", str(info.bit_rate)] if info.bit_rate else ["-q:v", "2"]
+    return args
+
+def copy_args(duration, fps):
+    """Output options for the stream-copied middle piece of the given duration.
+
+    With B-frames, packets of the next GOP's keyframe precede the cut in
+    decode order, so -t alone lets a frame or two past the end through;
+    packets whose pts is at or past the end (less half a frame) are dropped.
+    """
+    limit = max(0.0, duration - 0.5 / (fps or 25.0))
+    return ["-c:v", "copy", "-bsf:v", f"noise=drop=gte(pts*tb\\,{limit:.6f})"]
+
+def frame_count(t0, t1, origin, fps):
+    """Frames of a constant-rate grid through origin (a keyframe) with t0 <= pts < t1.
+
+    Marks need not sit on the grid, so the count can't be taken from the
+    duration alone: 4.5..5.5 at 25 fps holds 25 frames, 3.3..4.0 holds 17.
+    """
+    eps = 1e-6
+    return max(1, math.ceil((t1 - origin) * fps - eps) - math.ceil((t0 - origin) * fps - eps))
+
+def plan_smart_cut(keyframes, start, end, tolerance, duration=None):
+    """Splits start..end into [(mode, t0, t1)] with mode "encode" for the partial
+    GOPs at the edges and "copy" for the whole GOPs between them.
+
+    A boundary within tolerance of a keyframe (or, for the end, of the end of
+    the file) is not re-encoded. A range without a keyframe strictly inside
+    is encoded whole.
+    """
+    first = keyframes.after(start - tolerance, strict=False)
+    last = keyframes.before(end + tolerance)
+    if duration is not None and end >= duration - tolerance:
+        last = end # Последний GOP файла целый — копируем до конца
+    if first is None or last is None or first >= last:
+        return [("encode", start, end)]
+
+    segments = []
+    if first - start > tolerance:
+        segments.append(("encode", start, first))
+    segments.append(("copy", first, last))
+    if end - last > tolerance:
+        segments.append(("encode", last, end))
+    return segments
+
+def concat_list(paths):
+    """Body of an ffmpeg concat-demuxer list for paths."""
+    lines = []
+    for path in paths:
+        escaped = path.replace("\\", "/").replace("'", "'\\''")
+        lines.append(f"file '{escaped}'")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,47 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.thumbnails import ThumbnailCache
+
+class ThumbnailThread(QThread):
+    """Long-lived worker that extracts timeline thumbnails one at a time.
+
+    request() replaces whatever is still queued, so scrolling or zooming only
+    ever extracts frames for the window currently on screen.
+    """
+    thumbnail_ready = pyqtSignal(str, float, int, bytes) # path, time, height, jpeg
+
+    def __init__(self):
+        super().__init__()
+        self._cond = threading.Condition()
+        self._path = None
+        self._height = 0
+        self._jobs = []
+        self._stop = False
+
+    def request(self, path, times, height):
+        with self._cond:
+            self._path = path
+            self._height = height
+            self._jobs = list(times)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._jobs = []
+            self._cond.notify()
+
+    def run(self):
+        cache = ThumbnailCache.instance()
+        while True:
+            with self._cond:
+                while not self._jobs and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                path, height, t = self._path, self._height, self._jobs.pop(0)
+
+            data = cache.get_or_extract(path, t, height)
+            if data:
+                self.thumbnail_ready.emit(path, t, height, data)
@@ -0,0 +1,130 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from core.ffmpeg_core import FFmpegWorker
+from core.fingerprint import FingerprintService
+from utils.settings import SettingsManager
+
+class ThumbnailCache:
+    """JPEG thumbnails in a memory-bounded LRU that spills to disk.
+
+    Keys include the source's content fingerprint, so an edited file never
+    shows stale frames and a renamed or copied one reuses them. Entries pushed out of memory are written to
+    config/thumbnails/ (itself trimmed oldest-first to its own budget) and
+    promoted back on the next hit.
+    """
+    _instance = None
+
+    def __init__(self, cache_dir=None, max_bytes=None, max_disk_bytes=None):
+        settings = SettingsManager.instance()
+        if cache_dir is None:
+            cache_dir = os.path.join(settings.config_dir(), 'thumbnails')
+        if max_bytes is None:
+            max_bytes = int(settings.get("thumbnail_cache_mb", 64)) * 1024 * 1024
+        if max_disk_bytes is None:
+            max_disk_bytes = int(settings.get("thumbnail_disk_mb", 512)) * 1024 * 1024
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict() # key -> jpeg bytes, от старых к новым
+        self._memory_bytes = 0
+        self._disk_bytes = None # Считаем лениво при первом сбросе на диск
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def make_key(path, t, height):
+        # По содержимому: переименованный файл и его копии находят уже извлеченные кадры
+        fp = FingerprintService.instance().get(path)
+        if fp is None:
+            return None
+        return f"{fp}|{int(round(t * 1000))}|{int(height)}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.jpg')
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.put(key, data)
+        return data
+
+    def put(self, key, data):
+        spill = []
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+                old_key, old_data = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_data)
+                spill.append((old_key, old_data))
+        self._spill(spill)
+
+    def _spill(self, entries):
+        if not entries: return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(e.stat().st_size for e in os.scandir(self.cache_dir) if e.is_file())
+            for key, data in entries:
+                target = self._disk_path(key)
+                if os.path.exists(target):
+                    os.utime(target) # Уже на диске — только освежаем для обрезки по возрасту
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(data)
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._trim_disk()
+        except OSError as e:
+            print(f"Thumbnail cache write error: {e}")
+
+    def _trim_disk(self):
+        files = sorted((e for e in os.scandir(self.cache_dir) if e.is_file()), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in files)
+        # Оставляем запас, чтобы не чистить на каждом сбросе
+        target = self.max_disk_bytes * 0.9
+        for entry in files:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def memory_bytes(self):
+        return self._memory_bytes
+
+    def get_or_extract(self, path, t, height):
+        key = self.make_key(path, t, height)
+        if key is None:
+            return None
+        data = self.get(key)
+        if data is None:
+            data = FFmpegWorker.extract_frame(path, t, height)
+            if data:
+                self.put(key, data)
+        return data
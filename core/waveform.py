@@ -0,0 +1,283 @@
+import os
+import mmap
+import struct
+import hashlib
+import subprocess
+import sys
+import time
+from array import array
+
+from core.ffmpeg_core import STARTUPINFO, CREATE_NO_WINDOW
+from core.fingerprint import FingerprintService
+from utils.settings import SettingsManager
+
+# Звук декодируется в моно s16 с этой частотой: для формы волны больше не нужно
+SAMPLE_RATE = 8000
+# Сэмплов в корзине нижнего уровня (125 корзин/с) и во сколько раз укрупняется каждый следующий уровень
+BASE_BUCKET = 64
+LEVEL_FACTOR = 4
+READ_CHUNK = 64 * 1024
+
+FILE_MAGIC = b'CFWP'
+FILE_VERSION = 1
+HEADER = struct.Struct('<4sIIIII') # magic, version, rate, bucket, factor, levels
+
+class WaveformPyramid:
+    """Min/max peaks of an audio track at several resolutions.
+
+    Level k holds interleaved (min, max) int16 pairs, one per
+    BASE_BUCKET * LEVEL_FACTOR**k samples. columns() picks the coarsest level
+    that still has at least one bucket per pixel and reduces only the buckets
+    under the visible columns, so drawing cost depends on the widget width,
+    not on the length of the file.
+
+    Levels are array('h') while a decode is running (they keep growing) and
+    read-only views into an mmap once loaded from disk; close() (or a with
+    block) unmaps the file, after which the pyramid reads as empty.
+    """
+
+    def __init__(self, levels, rate=SAMPLE_RATE, bucket=BASE_BUCKET, factor=LEVEL_FACTOR, mapped=None):
+        self.levels = levels
+        self.rate = rate
+        self.bucket = bucket
+        self.factor = factor
+        self._mapped = mapped # (mmap, memoryview всего файла) для загруженной с диска
+
+    def close(self):
+        """Releases the file mapping of a loaded pyramid (no-op for one being built)."""
+        if self._mapped is None:
+            return
+        mm, view = self._mapped
+        self._mapped = None
+        levels, self.levels = self.levels, []
+        _unmap(mm, view, levels)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def duration(self):
+        return (len(self.levels[0]) // 2) * self.bucket / self.rate if self.levels else 0.0
+
+    def bucket_seconds(self, level):
+        return self.bucket * self.factor ** level / self.rate
+
+    def columns(self, t0, seconds_per_px, count):
+        """[(min, max)] in -1..1 for count pixel columns starting at t0; None where there is no audio."""
+        if not self.levels or seconds_per_px <= 0:
+            return [None] * count
+
+        level = 0
+        while level + 1 < len(self.levels) and self.bucket_seconds(level + 1) <= seconds_per_px \
+                and len(self.levels[level + 1]) >= 2:
+            level += 1
+        data = self.levels[level]
+        n = len(data) // 2
+        bs = self.bucket_seconds(level)
+
+        result = []
+        for x in range(count):
+            b0 = int((t0 + x * seconds_per_px) / bs)
+            b1 = max(b0 + 1, int((t0 + (x + 1) * seconds_per_px) / bs))
+            if b0 < 0 or b0 >= n:
+                result.append(None)
+                continue
+            b1 = min(b1, n)
+            lo = min(data[2 * b0:2 * b1:2])
+            hi = max(data[2 * b0 + 1:2 * b1:2])
+            result.append((lo / 32768.0, hi / 32768.0))
+        return result
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, self.rate, self.bucket, self.factor, len(self.levels)))
+            f.write(struct.pack(f'<{len(self.levels)}Q', *(len(level) for level in self.levels)))
+            for level in self.levels:
+                array('h', level).tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Maps a saved pyramid read-only; None if missing or not a pyramid file."""
+        try:
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        view = None
+        levels = []
+        try:
+            magic, version, rate, bucket, factor, count = HEADER.unpack_from(mm, 0)
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                raise ValueError("not a waveform file")
+            lengths = struct.unpack_from(f'<{count}Q', mm, HEADER.size)
+            offset = HEADER.size + 8 * count
+            view = memoryview(mm)
+            for n in lengths:
+                levels.append(view[offset:offset + 2 * n].cast('h'))
+                offset += 2 * n
+            if offset > len(mm):
+                raise ValueError("truncated waveform file")
+        except (struct.error, ValueError, TypeError):
+            _unmap(mm, view, levels)
+            return None
+        return cls(levels, rate, bucket, factor, mapped=(mm, view))
+
+def _unmap(mm, view, levels):
+    # mmap не закрывается, пока на него есть memoryview — сначала отпускаем их
+    for level in levels:
+        level.release()
+    if view is not None:
+        view.release()
+    mm.close()
+
+class WaveformBuilder:
+    """Turns a stream of s16 samples into a WaveformPyramid without keeping the samples."""
+
+    def __init__(self):
+        self.levels = [array('h')]
+        self._tail = array('h')
+
+    def feed(self, samples):
+        buf = self._tail + samples if self._tail else samples
+        full = len(buf) // BASE_BUCKET * BASE_BUCKET
+        level0 = self.levels[0]
+        for i in range(0, full, BASE_BUCKET):
+            chunk = buf[i:i + BASE_BUCKET]
+            level0.append(min(chunk))
+            level0.append(max(chunk))
+        self._tail = buf[full:]
+        self._reduce(final=False)
+
+    def finish(self):
+        if self._tail:
+            self.levels[0].append(min(self._tail))
+            self.levels[0].append(max(self._tail))
+            self._tail = array('h')
+        self._reduce(final=True)
+        return self.pyramid()
+
+    def _reduce(self, final):
+        k = 0
+        while True:
+            src = self.levels[k]
+            n = len(src) // 2
+            if n <= 1 and k + 1 >= len(self.levels):
+                break
+            if k + 1 >= len(self.levels):
+                if n < LEVEL_FACTOR:
+                    break
+                self.levels.append(array('h'))
+            dst = self.levels[k + 1]
+            # Корзины src, уже свернутые в dst (до finish() сворачиваем только полные группы)
+            b = len(dst) // 2 * LEVEL_FACTOR
+            limit = n if final else n // LEVEL_FACTOR * LEVEL_FACTOR
+            while b < limit:
+                e = min(b + LEVEL_FACTOR, n)
+                dst.append(min(src[2 * b:2 * e:2]))
+                dst.append(max(src[2 * b + 1:2 * e:2]))
+                b = e
+            k += 1
+
+    def pyramid(self):
+        # Уровни общие с построителем: отрисовка видит уже посчитанную часть
+        return WaveformPyramid(self.levels)
+
+def waveform_cache_path(path):
+    """Pyramid file for path in config/waveforms, keyed on the content fingerprint; None if unreadable."""
+    fp = FingerprintService.instance().get(path)
+    if fp is None:
+        return None
+    key = f"{fp}|{SAMPLE_RATE}|{BASE_BUCKET}|{LEVEL_FACTOR}"
+    cache_dir = os.path.join(SettingsManager.instance().config_dir(), 'waveforms')
+    return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.wfp')
+
+def trim_waveform_cache(keep=None):
+    """Deletes the oldest pyramids beyond the waveform_disk_mb budget."""
+    cache_dir = os.path.join(SettingsManager.instance().config_dir(), 'waveforms')
+    max_bytes = int(SettingsManager.instance().get("waveform_disk_mb", 256)) * 1024 * 1024
+    try:
+        files = sorted((e for e in os.scandir(cache_dir) if e.is_file()), key=lambda e: e.stat().st_mtime)
+    except OSError:
+        return
+    total = sum(e.stat().st_size for e in files)
+    for entry in files:
+        if total <= max_bytes:
+            break
+        if entry.path == keep:
+            continue
+        try:
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            total -= size
+        except OSError:
+            pass
+
+def decode_waveform(path, on_update=None, cancel_event=None, update_interval=0.5):
+    """Streams the first audio track through ffmpeg and returns its WaveformPyramid.
+
+    Uses the on-disk pyramid when there is one. on_update(pyramid) is called
+    periodically with the part decoded so far. Returns None when the file has
+    no audio or the decode was canceled.
+    """
+    cache_file = waveform_cache_path(path)
+    if cache_file and os.path.exists(cache_file):
+        cached = WaveformPyramid.load(cache_file)
+        if cached is not None:
+            try: os.utime(cache_file) # Для обрезки кэша по давности
+            except OSError: pass
+            return cached
+
+    command = ["ffmpeg", "-v", "error", "-i", path, "-map", "0:a:0", "-vn", "-sn",
+               "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"]
+    try:
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                startupinfo=STARTUPINFO, creationflags=CREATE_NO_WINDOW)
+    except OSError:
+        return None
+
+    builder = WaveformBuilder()
+    got_audio = False
+    pending = b''
+    last_update = time.monotonic()
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                proc.kill()
+                return None
+            data = proc.stdout.read(READ_CHUNK)
+            if not data:
+                break
+            got_audio = True
+            data = pending + data
+            usable = len(data) // 2 * 2
+            pending = data[usable:]
+            samples = array('h')
+            samples.frombytes(data[:usable])
+            if sys.byteorder == 'big':
+                samples.byteswap()
+            builder.feed(samples)
+            if on_update and time.monotonic() - last_update >= update_interval:
+                on_update(builder.pyramid())
+                last_update = time.monotonic()
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+    if proc.returncode != 0 or not got_audio:
+        return None
+
+    pyramid = builder.finish()
+    if cache_file:
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            pyramid.save(cache_file)
+            trim_waveform_cache(keep=cache_file)
+        except OSError as e:
+            print(f"Waveform cache write error: {e}")
+    return pyramid
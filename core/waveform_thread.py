@@ -0,0 +1,27 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.waveform import decode_waveform
+
+class WaveformThread(QThread):
+    """Decodes one file's audio into a peak pyramid, publishing partial results as it goes."""
+    waveform_updated = pyqtSignal(str, object) # path, WaveformPyramid (still growing)
+    waveform_ready = pyqtSignal(str, object)   # path, WaveformPyramid or None (no audio)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_canceled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        pyramid = decode_waveform(self.path,
+                                  on_update=lambda p: self.waveform_updated.emit(self.path, p),
+                                  cancel_event=self._cancel)
+        if not self._cancel.is_set():
+            self.waveform_ready.emit(self.path, pyramid)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Тесты запускаются из корня репозитория: python -m pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.export_journal import ExportJournal
+from core.probe_cache import ProbeCache
+from utils.settings import SettingsManager
+
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    """Settings and the SQLite caches of each test live in its own folder."""
+    settings = SettingsManager()
+    settings._config_dir = str(tmp_path / "config")
+    settings._config_file = os.path.join(settings._config_dir, "settings.json")
+    monkeypatch.setattr(SettingsManager, "_instance", settings)
+    monkeypatch.setattr(ProbeCache, "_instance", None)
+    monkeypatch.setattr(ExportJournal, "_instance", None)
+    return settings._config_dir
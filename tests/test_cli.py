@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+import cli
+from core.ffmpeg_core import FFmpegWorker
+from core.models import ProbeResult
+
+@pytest.fixture
+def manifest(tmp_path):
+    for name in ("a.mp4", "b.mp4"):
+        (tmp_path / name).write_bytes(b"\0" * 64)
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"output_dir": str(tmp_path / "out"),
+                                "items": [{"path": "a.mp4", "start": 1.0}, {"path": "b.mp4"}]}))
+    return str(path)
+
+@pytest.fixture
+def no_keyframes(monkeypatch):
+    # ffprobe читает файлы, но ключевых кадров нет — экспорт каждого задания падает
+    monkeypatch.setattr(FFmpegWorker, "probe", staticmethod(
+        lambda path, **kwargs: ProbeResult(path=path, duration=10.0)))
+
+@pytest.mark.parametrize("quiet", [False, True])
+def test_job_errors_reach_stderr(manifest, no_keyframes, capsys, quiet):
+    args = [manifest, "-q"] if quiet else [manifest]
+    assert cli.main(args) == cli.EXIT_FAILED
+    err = capsys.readouterr().err
+    assert "Failed to analyze a.mp4" in err
+    assert "Failed to analyze b.mp4" in err
+    assert "Exported 0/2, 2 failed" in err
+    assert ("[1/2]" in err) != quiet
+    assert ("Report:" in err) != quiet
+
+def test_bad_manifest(tmp_path, capsys):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"items": [{"path": "a.mp4", "ranges": [[5, 1]]}]}))
+    assert cli.main([str(path), "-o", str(tmp_path)]) == cli.EXIT_USAGE
+    assert "ranges[0]" in capsys.readouterr().err
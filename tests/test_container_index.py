@@ -0,0 +1,209 @@
+import struct
+
+import pytest
+
+from core import container_index
+from core.container_index import Mp4Index, MatroskaIndex, read_keyframes
+
+# --- MP4 ---
+
+def box(box_type, *children):
+    payload = b''.join(children)
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+def full_box(box_type, body, version=0):
+    return box(box_type, bytes([version, 0, 0, 0]) + body)
+
+def mvhd(timescale=1000):
+    return full_box(b'mvhd', bytes(8) + struct.pack('>II', timescale, 0) + bytes(80))
+
+def mdhd(timescale, version=0):
+    if version == 1:
+        return full_box(b'mdhd', bytes(16) + struct.pack('>IQ', timescale, 0) + bytes(4), version=1)
+    return full_box(b'mdhd', bytes(8) + struct.pack('>II', timescale, 0) + bytes(4))
+
+def hdlr(handler):
+    return full_box(b'hdlr', bytes(4) + handler + bytes(12) + b'\x00')
+
+def table(box_type, fmt, rows):
+    return full_box(box_type, struct.pack('>I', len(rows)) + b''.join(struct.pack(fmt, *row) for row in rows))
+
+def stss(samples):
+    return full_box(b'stss', struct.pack('>I', len(samples)) + b''.join(struct.pack('>I', s) for s in samples))
+
+def elst(entries):
+    return box(b'edts', table(b'elst', '>IiI', [(duration, media_time, 0x10000) for duration, media_time in entries]))
+
+def trak(handler, timescale, stts_runs, sync=None, ctts_runs=None, edits=None, mdhd_version=0):
+    stbl = [table(b'stts', '>II', stts_runs)]
+    if ctts_runs:
+        stbl.append(table(b'ctts', '>Ii', ctts_runs))
+    if sync is not None:
+        stbl.append(stss(sync))
+    children = [elst(edits)] if edits else []
+    children.append(box(b'mdia', mdhd(timescale, mdhd_version), hdlr(handler),
+                        box(b'minf', box(b'stbl', *stbl))))
+    return box(b'trak', *children)
+
+def mp4(*traks, moov_first=True, extra=b''):
+    ftyp = box(b'ftyp', b'isom' + bytes(4) + b'isom')
+    moov = box(b'moov', mvhd(), *traks)
+    mdat = box(b'mdat', bytes(64))
+    return ftyp + (moov + mdat if moov_first else mdat + moov) + extra
+
+def keyframes(data):
+    index = Mp4Index(data).keyframes()
+    return None if index is None else index.tolist()
+
+def test_mp4_sync_samples():
+    # 25 fps (12800/512), GOP 12
+    data = mp4(trak(b'vide', 12800, [(48, 512)], sync=[1, 13, 25, 37]))
+    assert keyframes(data) == pytest.approx([0.0, 0.48, 0.96, 1.44])
+
+def test_mp4_moov_after_mdat():
+    data = mp4(trak(b'vide', 12800, [(48, 512)], sync=[1, 25]), moov_first=False)
+    assert keyframes(data) == pytest.approx([0.0, 0.96])
+
+def test_mp4_composition_offsets_and_edit_list_shift():
+    # B-кадры: pts = dts + 1024, edit list сдвигает на те же 1024 — ключевые кадры снова с нуля
+    data = mp4(trak(b'vide', 12800, [(48, 512)], sync=[1, 13, 25, 37],
+                    ctts_runs=[(48, 1024)], edits=[(1920, 1024)]))
+    assert keyframes(data) == pytest.approx([0.0, 0.48, 0.96, 1.44])
+
+def test_mp4_varying_offsets_follow_runs():
+    ctts_runs = [(1, 1024), (1, 2560), (1, 0), (9, 512), (1, 1024), (35, 512)]
+    data = mp4(trak(b'vide', 12800, [(10, 512), (38, 1024)], sync=[1, 13], ctts_runs=ctts_runs))
+    # Семпл 13: dts = 10*512 + 2*1024 = 7168, смещение из серии (1, 1024) -> 8192
+    assert keyframes(data) == pytest.approx([1024 / 12800, 8192 / 12800])
+
+def test_mp4_empty_edit_delays_track():
+    data = mp4(trak(b'vide', 12800, [(48, 512)], sync=[1, 25], edits=[(500, -1), (1920, 0)]))
+    assert keyframes(data) == pytest.approx([0.5, 1.46])
+
+def test_mp4_without_stss_every_sample_is_a_keyframe():
+    index = Mp4Index(mp4(trak(b'vide', 24000, [(1000, 1001)]))).keyframes()
+    assert index.is_run_encoded
+    assert len(index) == 1000
+    assert index[1] == pytest.approx(1001 / 24000)
+    assert index[-1] == pytest.approx(999 * 1001 / 24000)
+
+def test_mp4_without_stss_and_varying_durations():
+    assert keyframes(mp4(trak(b'vide', 1000, [(2, 40), (2, 20)]))) == pytest.approx([0.0, 0.04, 0.08, 0.1])
+
+def test_mp4_first_video_track_wins():
+    data = mp4(trak(b'soun', 48000, [(100, 1024)]),
+               trak(b'vide', 12800, [(48, 512)], sync=[1, 37], mdhd_version=1),
+               trak(b'vide', 1000, [(10, 40)], sync=[1]))
+    assert keyframes(data) == pytest.approx([0.0, 1.44])
+
+@pytest.mark.parametrize("data", [
+    mp4(trak(b'soun', 48000, [(100, 1024)])),                                     # нет видео
+    mp4(trak(b'vide', 12800, [(48, 512)], sync=[1]), extra=box(b'moof', bytes(8))), # фрагментированный
+    mp4(trak(b'vide', 12800, [(48, 512)], sync=[1], edits=[(960, 0), (960, 6400)])), # две правки
+    mp4(trak(b'vide', 12800, [], sync=[])),                                          # нет семплов
+    box(b'ftyp', b'isom') + box(b'mdat', bytes(16)),                                 # нет moov
+])
+def test_mp4_unsupported_layouts_fall_back(data):
+    assert Mp4Index(data).keyframes() is None
+
+def test_read_keyframes_by_extension(tmp_path):
+    data = mp4(trak(b'vide', 12800, [(48, 512)], sync=[1, 25]))
+    (tmp_path / "a.mov").write_bytes(data)
+    (tmp_path / "a.avi").write_bytes(data)
+    (tmp_path / "broken.mp4").write_bytes(data[:40])
+    assert read_keyframes(str(tmp_path / "a.mov")).tolist() == pytest.approx([0.0, 0.96])
+    assert read_keyframes(str(tmp_path / "a.avi")) is None
+    assert read_keyframes(str(tmp_path / "broken.mp4")) is None
+    assert read_keyframes(str(tmp_path / "missing.mp4")) is None
+
+# --- Matroska ---
+
+def ebml_id(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'big')
+
+def element(el_id, *children):
+    payload = b''.join(children)
+    return ebml_id(el_id) + b'\x01' + len(payload).to_bytes(7, 'big') + payload
+
+def uint(el_id, value, width=None):
+    width = width or max(1, (value.bit_length() + 7) // 8)
+    return element(el_id, value.to_bytes(width, 'big'))
+
+def header(doctype=b'webm'):
+    return element(container_index.ID_EBML, element(container_index.ID_DOCTYPE, doctype))
+
+def info(scale=1000000):
+    return element(container_index.ID_INFO, uint(container_index.ID_TIMESTAMP_SCALE, scale))
+
+def tracks():
+    entries = [element(container_index.ID_TRACK_ENTRY, uint(container_index.ID_TRACK_NUMBER, number),
+                       uint(container_index.ID_TRACK_TYPE, track_type))
+               for number, track_type in ((1, 2), (2, 1))] # аудио, затем видео
+    return element(container_index.ID_TRACKS, *entries)
+
+def cues(points):
+    return element(container_index.ID_CUES, *[
+        element(container_index.ID_CUE_POINT, uint(container_index.ID_CUE_TIME, time),
+                element(container_index.ID_CUE_TRACK_POSITIONS, uint(container_index.ID_CUE_TRACK, track)))
+        for time, track in points])
+
+def cluster():
+    return element(container_index.ID_CLUSTER, bytes(100))
+
+def seek_head(targets):
+    """SeekHead pointing at (element id, position in the segment); positions are fixed-width."""
+    return element(container_index.ID_SEEKHEAD, *[
+        element(container_index.ID_SEEK, element(container_index.ID_SEEK_ID, ebml_id(target)),
+                uint(container_index.ID_SEEK_POSITION, position, width=8))
+        for target, position in targets])
+
+def segment(*children):
+    return element(container_index.ID_SEGMENT, *children)
+
+CUE_POINTS = [(0, 2), (500, 1), (2000, 2), (4000, 2)] # (время, дорожка); 500 — только аудио
+
+def mkv_keyframes(data):
+    index = MatroskaIndex(data).keyframes()
+    return None if index is None else index.tolist()
+
+def test_mkv_cues_before_clusters():
+    data = header() + segment(info(), tracks(), cues(CUE_POINTS), cluster())
+    assert mkv_keyframes(data) == pytest.approx([0.0, 2.0, 4.0])
+
+def test_mkv_timestamp_scale():
+    data = header(b'matroska') + segment(info(scale=100000), tracks(), cues(CUE_POINTS), cluster())
+    assert mkv_keyframes(data) == pytest.approx([0.0, 0.2, 0.4])
+
+def test_mkv_cues_found_through_seek_head():
+    # Размер SeekHead не зависит от позиций (фиксированная ширина) — считаем смещения по заглушке
+    body = [info(), tracks(), cluster(), cluster()]
+    placeholder = seek_head([(container_index.ID_CUES, 0)])
+    position = len(placeholder) + sum(len(part) for part in body)
+    data = header() + segment(seek_head([(container_index.ID_CUES, position)]), *body, cues(CUE_POINTS))
+    assert mkv_keyframes(data) == pytest.approx([0.0, 2.0, 4.0])
+
+def test_mkv_cues_found_through_chained_seek_heads():
+    body = [info(), tracks(), cluster()]
+    first = seek_head([(container_index.ID_SEEKHEAD, 0)])
+    second_at = len(first) + sum(len(part) for part in body)
+    second = seek_head([(container_index.ID_CUES, 0)])
+    cues_at = second_at + len(second)
+    data = header() + segment(seek_head([(container_index.ID_SEEKHEAD, second_at)]), *body,
+                              seek_head([(container_index.ID_CUES, cues_at)]), cues(CUE_POINTS))
+    assert mkv_keyframes(data) == pytest.approx([0.0, 2.0, 4.0])
+
+def test_mkv_bad_seek_position_falls_back(tmp_path):
+    body = [info(), tracks(), cluster()]
+    path = tmp_path / "bad.mkv"
+    path.write_bytes(header() + segment(seek_head([(container_index.ID_CUES, 3)]), *body))
+    assert read_keyframes(str(path)) is None
+
+@pytest.mark.parametrize("data", [
+    header(b'other') + segment(info(), tracks(), cues(CUE_POINTS)),        # не Matroska
+    header() + segment(info(), tracks(), cluster(), cues(CUE_POINTS)),    # Cues после кластеров без SeekHead
+    header() + segment(info(), tracks(), cues([(500, 1)])),               # точки только по аудио
+    header() + segment(info(), cues(CUE_POINTS)),                         # нет Tracks
+    element(container_index.ID_SEGMENT, bytes(8)),                        # нет заголовка EBML
+])
+def test_mkv_unsupported_layouts_fall_back(data):
+    assert MatroskaIndex(data).keyframes() is None
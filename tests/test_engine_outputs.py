@@ -0,0 +1,49 @@
+import os
+
+from core.engine import ExportEngine
+from core.models import MediaItem
+
+def make_engine(items, output_dir):
+    return ExportEngine(items, str(output_dir), workers=2, mode="copy", journal=object(), skip_existing=False)
+
+def item(path, ranges=()):
+    media = MediaItem(path, duration=60.0)
+    media.ranges = list(ranges)
+    return media
+
+def names(engine, media):
+    return [os.path.basename(path) for path in engine.output_paths(media)]
+
+def test_same_basename_from_different_cards_gets_unique_names(tmp_path):
+    a = item("/cards/A/GX010001.MP4")
+    b = item("/cards/B/GX010001.MP4")
+    c = item("/cards/C/GX010001.MP4")
+    engine = make_engine([a, b, c], tmp_path)
+    engine.assign_outputs()
+    assert names(engine, a) == ["GX010001.MP4"]
+    assert names(engine, b) == ["GX010001_2.MP4"]
+    assert names(engine, c) == ["GX010001_3.MP4"]
+
+def test_multi_range_names_do_not_collide_with_single_range_item(tmp_path):
+    a = item("/cards/A/clip.mp4", [(0, 5), (10, 15)])
+    b = item("/cards/B/clip_01.mp4")
+    engine = make_engine([a, b], tmp_path)
+    engine.assign_outputs()
+    assert names(engine, a) == ["clip_01.mp4", "clip_02.mp4"]
+    assert names(engine, b) == ["clip_01_2.mp4"]
+
+def test_names_depend_only_on_queue_order(tmp_path):
+    items = [item("/cards/A/x.mov"), item("/cards/B/x.mov")]
+    first = make_engine(items, tmp_path)
+    first.assign_outputs()
+    second = make_engine(items, tmp_path)
+    second.assign_outputs()
+    assert [first.output_paths(m) for m in items] == [second.output_paths(m) for m in items]
+
+def test_unique_names_keep_all_outputs_distinct(tmp_path):
+    items = [item(f"/cards/{card}/GX010001.MP4", ranges) for card in "ABCD"
+             for ranges in ((), [(0, 1), (2, 3)])]
+    engine = make_engine(items, tmp_path)
+    engine.assign_outputs()
+    paths = [os.path.normcase(path) for media in items for path in engine.output_paths(media)]
+    assert len(paths) == len(set(paths))
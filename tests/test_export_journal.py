@@ -0,0 +1,166 @@
+import os
+
+import pytest
+
+from core.engine import ExportEngine
+from core.export_journal import ExportJournal, partial_path, finalize
+from core.ffmpeg_core import FFmpegWorker
+from core.models import MediaItem
+
+@pytest.fixture
+def journal(tmp_path):
+    return ExportJournal(db_path=str(tmp_path / "journal.db"))
+
+@pytest.fixture
+def out_dir(tmp_path):
+    path = tmp_path / "out"
+    path.mkdir()
+    return str(path)
+
+def write(path, data=b"video"):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def reopen(journal):
+    """The same journal file after the process died (a fresh connection)."""
+    return ExportJournal(db_path=journal._db_path)
+
+def test_partial_path_keeps_extension():
+    assert partial_path(os.path.join("out", "clip.mp4")) == os.path.join("out", "clip.part.mp4")
+    assert partial_path("clip") == "clip.part"
+
+def test_finalize_replaces_existing_output(out_dir):
+    output = os.path.join(out_dir, "clip.mp4")
+    write(output, b"old")
+    write(partial_path(output), b"new")
+    finalize(output)
+    assert open(output, 'rb').read() == b"new"
+    assert not os.path.exists(partial_path(output))
+
+def test_new_batch_has_nothing_finished(journal, out_dir):
+    batch, finished = journal.open_batch(out_dir, "copy", ["a", "b"])
+    assert batch is not None and finished == {}
+
+def test_resume_after_crash(journal, out_dir):
+    a, b, c = (os.path.join(out_dir, name) for name in ("a.mp4", "b.mp4", "c.mp4"))
+    batch, _ = journal.open_batch(out_dir, "copy", ["job-a", "job-b", "job-c"])
+    journal.job_started(batch, "job-a", [a])
+    write(a)
+    journal.job_done(batch, "job-a", [a])
+    journal.job_started(batch, "job-b", [b])
+    write(partial_path(b), b"half")  # Процесс упал посреди записи b
+
+    resumed, finished = reopen(journal).open_batch(out_dir, "copy", ["job-a", "job-b", "job-c"])
+    assert resumed == batch
+    assert finished == {"job-a": [a]}
+    assert not os.path.exists(partial_path(b))
+    assert not os.path.exists(c)
+
+def test_changed_output_is_not_trusted(journal, out_dir):
+    a = os.path.join(out_dir, "a.mp4")
+    batch, _ = journal.open_batch(out_dir, "copy", ["job-a"])
+    write(a)
+    journal.job_done(batch, "job-a", [a])
+    write(a, b"edited since")
+    assert reopen(journal).open_batch(out_dir, "copy", ["job-a"])[1] == {}
+
+def test_deleted_output_is_not_trusted(journal, out_dir):
+    a = os.path.join(out_dir, "a.mp4")
+    batch, _ = journal.open_batch(out_dir, "copy", ["job-a"])
+    write(a)
+    journal.job_done(batch, "job-a", [a])
+    os.remove(a)
+    assert reopen(journal).open_batch(out_dir, "copy", ["job-a"])[1] == {}
+
+def test_resume_only_matches_same_folder_mode_and_jobs(journal, out_dir, tmp_path):
+    a = os.path.join(out_dir, "a.mp4")
+    batch, _ = journal.open_batch(out_dir, "copy", ["job-a"])
+    write(a)
+    journal.job_done(batch, "job-a", [a])
+    journal = reopen(journal)
+    assert journal.open_batch(out_dir, "smart", ["job-a"])[1] == {}
+    assert journal.open_batch(str(tmp_path), "copy", ["job-a"])[1] == {}
+    assert journal.open_batch(out_dir, "copy", ["job-x"])[1] == {}
+
+def test_closed_batch_is_forgotten(journal, out_dir):
+    a = os.path.join(out_dir, "a.mp4")
+    batch, _ = journal.open_batch(out_dir, "copy", ["job-a"])
+    write(a)
+    journal.job_done(batch, "job-a", [a])
+    journal.close_batch(batch)
+    new_batch, finished = reopen(journal).open_batch(out_dir, "copy", ["job-a"])
+    assert new_batch != batch and finished == {}
+
+# --- ExportEngine поверх журнала ---
+
+class FakeExport:
+    """process_item stand-in: writes the outputs, or fails for the paths in crash_on."""
+
+    def __init__(self, crash_on=()):
+        self.crash_on = set(crash_on)
+        self.exported = []
+
+    def __call__(self, engine, item, info=None):
+        if item.path in self.crash_on:
+            raise RuntimeError("ffmpeg died")
+        outputs = engine.output_paths(item)
+        for output in outputs:
+            write(output)
+        self.exported.append(item.path)
+        return {"output": "; ".join(outputs), "bytes_written": 5, "bytes_read_est": 0}
+
+def run_batch(monkeypatch, journal, out_dir, items, export, skip_existing=True):
+    monkeypatch.setattr(FFmpegWorker, "probe", staticmethod(lambda path, **kwargs: None))
+    monkeypatch.setattr(ExportEngine, "process_item", lambda engine, item, info=None: export(engine, item, info))
+    engine = ExportEngine(items, out_dir, workers=2, mode="copy", journal=journal, skip_existing=skip_existing)
+    return {r["source"]: r["status"] for r in engine.run()}
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = []
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        path = tmp_path / name
+        path.write_bytes(b"source " + name.encode())
+        paths.append(str(path))
+    return paths
+
+def items(paths):
+    return [MediaItem(path, duration=10.0) for path in paths]
+
+def test_engine_resumes_only_unfinished_jobs(monkeypatch, journal, out_dir, sources):
+    first = run_batch(monkeypatch, journal, out_dir, items(sources), FakeExport(crash_on=[sources[1]]))
+    assert first == {sources[0]: "ok", sources[1]: "failed", sources[2]: "ok"}
+
+    export = FakeExport()
+    second = run_batch(monkeypatch, reopen(journal), out_dir, items(sources), export)
+    assert export.exported == [sources[1]]
+    assert second == {sources[0]: "skipped", sources[1]: "ok", sources[2]: "skipped"}
+
+    # Пачка закрыта: следующий прогон — с нуля
+    export = FakeExport()
+    run_batch(monkeypatch, reopen(journal), out_dir, items(sources), export)
+    assert sorted(export.exported) == sorted(sources)
+
+def test_engine_without_skip_existing_reruns_finished_jobs(monkeypatch, journal, out_dir, sources):
+    run_batch(monkeypatch, journal, out_dir, items(sources), FakeExport(crash_on=[sources[1]]))
+    export = FakeExport()
+    report = run_batch(monkeypatch, reopen(journal), out_dir, items(sources), export, skip_existing=False)
+    assert sorted(export.exported) == sorted(sources)
+    assert set(report.values()) == {"ok"}
+
+def test_engine_reruns_job_whose_source_changed(monkeypatch, journal, out_dir, sources):
+    run_batch(monkeypatch, journal, out_dir, items(sources), FakeExport(crash_on=[sources[1]]))
+    write(sources[0], b"re-recorded")
+    export = FakeExport()
+    run_batch(monkeypatch, reopen(journal), out_dir, items(sources), export)
+    assert sorted(export.exported) == sorted(sources[:2])
+
+def test_engine_closes_job_progress_of_failed_jobs(monkeypatch, journal, out_dir, sources):
+    monkeypatch.setattr(FFmpegWorker, "probe", staticmethod(lambda path, **kwargs: None))
+    export = FakeExport(crash_on=[sources[1]])
+    monkeypatch.setattr(ExportEngine, "process_item", lambda engine, item, info=None: export(engine, item, info))
+    last = {}
+    engine = ExportEngine(items(sources), out_dir, workers=2, mode="copy", journal=journal,
+                          on_job_progress=lambda path, fraction, mbps, eta: last.__setitem__(path, fraction))
+    engine.run()
+    assert last == {path: 1.0 for path in sources}
@@ -0,0 +1,102 @@
+import bisect
+import random
+
+import pytest
+
+from core.keyframe_index import KeyframeIndex
+
+def reference(times):
+    """The plain sorted-list answers KeyframeIndex has to match."""
+    times = sorted(times)
+
+    def before(t, strict=False):
+        i = bisect.bisect_left(times, t) if strict else bisect.bisect_right(times, t)
+        return times[i - 1] if i > 0 else None
+
+    def after(t, strict=True):
+        i = bisect.bisect_right(times, t) if strict else bisect.bisect_left(times, t)
+        return times[i] if i < len(times) else None
+
+    return times, before, after
+
+def same(a, b):
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) < 1e-9
+
+def queries(times):
+    rng = random.Random(1)
+    points = list(times) + [t + 1e-3 for t in times] + [t - 1e-3 for t in times]
+    points += [-1.0, 0.0, 1e9] + [rng.uniform(-5, (times[-1] if times else 0) + 5) for _ in range(200)]
+    return points
+
+_rng = random.Random(7)
+
+LAYOUTS = {
+    "fixed_gop": [i * 2.0 for i in range(500)],
+    "all_intra": [i * 0.04 for i in range(3000)],
+    "irregular": sorted(_rng.uniform(0, 600) for _ in range(300)),
+    "gop_changes": [i * 2.0 for i in range(100)] + [200.0 + i * 0.5 for i in range(400)],
+    "single": [3.5],
+}
+
+@pytest.mark.parametrize("name", sorted(LAYOUTS))
+def test_queries_match_sorted_list(name):
+    times, before, after = reference(LAYOUTS[name])
+    index = KeyframeIndex(list(reversed(times)))
+    assert len(index) == len(times)
+    assert index.tolist() == pytest.approx(times)
+    assert [index[i] for i in (0, -1, len(times) // 2)] == pytest.approx(
+        [times[0], times[-1], times[len(times) // 2]])
+    for t in queries(times):
+        for strict in (False, True):
+            assert same(index.before(t, strict=strict), before(t, strict))
+            assert same(index.after(t, strict=strict), after(t, strict))
+        assert index.count_le(t) == bisect.bisect_right(times, t)
+        assert index.count_lt(t) == bisect.bisect_left(times, t)
+
+def test_regular_layouts_are_run_encoded():
+    assert KeyframeIndex(LAYOUTS["fixed_gop"]).is_run_encoded
+    assert KeyframeIndex(LAYOUTS["all_intra"]).is_run_encoded
+    assert KeyframeIndex(LAYOUTS["gop_changes"]).is_run_encoded
+    assert not KeyframeIndex(LAYOUTS["irregular"]).is_run_encoded
+
+@pytest.mark.parametrize("name", sorted(LAYOUTS))
+def test_range(name):
+    times = LAYOUTS[name]
+    index = KeyframeIndex(times)
+    for t0, t1 in ((0, 10), (5.3, 250.7), (-1, 1e9), (199.9, 200.1), (50, 40)):
+        assert list(index.range(t0, t1)) == pytest.approx([t for t in times if t0 <= t <= t1])
+
+@pytest.mark.parametrize("name", sorted(LAYOUTS))
+def test_bytes_round_trip(name):
+    index = KeyframeIndex(LAYOUTS[name])
+    restored = KeyframeIndex.from_bytes(index.to_bytes())
+    assert restored == index
+    assert restored.is_run_encoded == index.is_run_encoded
+
+def test_from_run():
+    index = KeyframeIndex.from_run(-0.08, 0.04, 1000)
+    assert len(index) == 1000
+    assert index[0] == pytest.approx(-0.08)
+    assert index[-1] == pytest.approx(-0.08 + 999 * 0.04)
+    assert index.before(0.99) == pytest.approx(0.96)
+    assert KeyframeIndex.from_run(5.0, 1.0, 1).tolist() == [5.0]
+    assert not KeyframeIndex.from_run(0.0, 1.0, 0)
+
+def test_extend_keeps_order_and_drops_runs():
+    index = KeyframeIndex(LAYOUTS["fixed_gop"])
+    index.extend([1.0, 3.0])
+    index.extend([2000.0])
+    assert not index.is_run_encoded
+    assert index.tolist() == sorted(LAYOUTS["fixed_gop"] + [1.0, 3.0, 2000.0])
+    assert index.after(0.0) == 1.0
+
+def test_empty():
+    index = KeyframeIndex()
+    assert not index and len(index) == 0
+    assert index.before(10.0) is None and index.after(-1.0) is None
+    assert list(index.range(0, 10)) == []
+    assert KeyframeIndex.from_bytes(index.to_bytes()).tolist() == []
+    with pytest.raises(IndexError):
+        index[0]
@@ -0,0 +1,161 @@
+import sqlite3
+
+import pytest
+
+from core.keyframe_index import KeyframeIndex
+from core.models import MediaItem, GroupItem, ProbeResult
+from core.probe_cache import ProbeCache
+from core.project import ProjectStore, ProjectError
+
+def media(path, start=0.0, end=10.0, ranges=()):
+    item = MediaItem(path, fps=25.0, duration=10.0, resolution="1920x1080")
+    item.start_time, item.end_time, item.is_ready = start, end, True
+    item.ranges = list(ranges)
+    return item
+
+def make_layout():
+    group = GroupItem("Cam A")
+    group.start_time, group.end_time, group.is_ready = 1.0, 9.0, True
+    group.items = [media("/cards/A/c1.mp4", 1.0, 9.0), media("/cards/A/c2.mp4", 1.0, 8.5)]
+    for item in group.items:
+        item.group = group
+    return [media("/cards/a.mp4", 2.0, 7.5, [(0.5, 2.0), (3.0, 6.0)]), group, media("/cards/b.mp4")]
+
+def describe(layout):
+    """Comparable form of a layout: what a reopened project must reproduce."""
+    def clip(item):
+        return (item.path, item.fps, item.duration, item.resolution, item.start_time, item.end_time,
+                item.is_ready, list(item.ranges))
+    return [("group", obj.uid, obj.name, obj.start_time, obj.end_time, obj.is_ready, [clip(m) for m in obj.items])
+            if isinstance(obj, GroupItem) else clip(obj) for obj in layout]
+
+@pytest.fixture
+def project_path(tmp_path):
+    return str(tmp_path / "queue.cfproj")
+
+def test_round_trip(project_path):
+    layout = make_layout()
+    store = ProjectStore(project_path)
+    assert store.sync(layout, {"output_dir": "D:/out", "group_counter": 3}) > 0
+    store.close()
+
+    loaded, meta = ProjectStore(project_path).load()
+    assert describe(loaded) == describe(layout)
+    assert meta == {"output_dir": "D:/out", "group_counter": 3}
+
+def test_sync_writes_nothing_when_nothing_changed(project_path):
+    layout = make_layout()
+    store = ProjectStore(project_path)
+    store.sync(layout, {"output_dir": "D:/out"})
+    assert store.sync(layout, {"output_dir": "D:/out"}) == 0
+    store.close()
+
+    reopened = ProjectStore(project_path)
+    loaded, meta = reopened.load()
+    assert reopened.sync(loaded, meta) == 0
+
+def test_sync_writes_only_changed_rows(project_path):
+    layout = make_layout()
+    store = ProjectStore(project_path)
+    store.sync(layout)
+
+    layout[2].start_time = 4.0 # Один маркер — одна строка
+    assert store.sync(layout) == 1
+    layout[0].ranges.append((8.0, 9.0))
+    assert store.sync(layout) == 1
+    layout[1].name = "Cam B"
+    assert store.sync(layout) == 1
+    del layout[2] # Удаление клипа
+    assert store.sync(layout) == 1
+    layout[1].items.reverse() # Оба клипа группы сменили позицию
+    assert store.sync(layout) == 2
+    store.close()
+
+    loaded, _ = ProjectStore(project_path).load()
+    assert describe(loaded) == describe(layout)
+
+def test_group_removal_moves_clips_to_top_level(project_path):
+    layout = make_layout()
+    store = ProjectStore(project_path)
+    store.sync(layout)
+    group = layout.pop(1)
+    layout.extend(group.items)
+    store.sync(layout)
+    store.close()
+
+    loaded, _ = ProjectStore(project_path).load()
+    assert [obj.path for obj in loaded] == ["/cards/a.mp4", "/cards/b.mp4", "/cards/A/c1.mp4", "/cards/A/c2.mp4"]
+
+def test_probe_results_travel_with_the_project(project_path, tmp_path):
+    source = tmp_path / "clip.mp4"
+    source.write_bytes(b"\0" * 1024)
+    ProbeCache.instance().put(ProbeResult(path=str(source), fps=50.0, duration=12.0, codec_name="h264",
+                                          keyframes=KeyframeIndex([0.0, 2.0, 4.0])))
+    store = ProjectStore(project_path)
+    store.sync([media(str(source))])
+    store.close()
+
+    # Другая машина: пустой кэш проб
+    ProbeCache._instance = ProbeCache(db_path=str(tmp_path / "other_cache.db"))
+    assert ProbeCache.instance().get(str(source)) is None
+    ProjectStore(project_path).load()
+    info = ProbeCache.instance().get(str(source))
+    assert info.fps == 50.0 and info.codec_name == "h264"
+    assert info.keyframes.tolist() == [0.0, 2.0, 4.0]
+
+def test_v1_project_is_migrated(project_path):
+    conn = sqlite3.connect(project_path)
+    conn.executescript("""
+        CREATE TABLE media (
+            path TEXT PRIMARY KEY, group_uid TEXT, position INTEGER NOT NULL,
+            fps REAL NOT NULL, duration REAL NOT NULL, resolution TEXT NOT NULL,
+            start_time REAL NOT NULL, end_time REAL NOT NULL, is_ready INTEGER NOT NULL
+        );
+        INSERT INTO media VALUES ('/cards/old.mp4', NULL, 0, 25.0, 10.0, '1920x1080', 1.0, 9.0, 1);
+        PRAGMA user_version = 1;
+    """)
+    conn.close()
+
+    store = ProjectStore(project_path)
+    loaded, _ = store.load()
+    assert describe(loaded) == describe([media("/cards/old.mp4", 1.0, 9.0)])
+    loaded[0].ranges = [(1.0, 2.0)]
+    assert store.sync(loaded) == 1
+    store.close()
+    assert ProjectStore(project_path).load()[0][0].ranges == [(1.0, 2.0)]
+
+def test_newer_project_is_refused(project_path):
+    conn = sqlite3.connect(project_path)
+    conn.execute(f"PRAGMA user_version = {ProjectStore.SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(ProjectError):
+        ProjectStore(project_path).load()
+
+def test_save_as_continues_on_the_copy(project_path, tmp_path):
+    layout = make_layout()
+    store = ProjectStore(project_path)
+    store.sync(layout)
+    copy_path = str(tmp_path / "copy.cfproj")
+    store.save_as(copy_path)
+    layout[0].end_time = 5.0
+    assert store.sync(layout) == 1
+    store.close()
+
+    assert ProjectStore(project_path).load()[0][0].end_time == 7.5
+    assert ProjectStore(copy_path).load()[0][0].end_time == 5.0
+
+def test_probe_finished_after_autosave_is_stored_later(project_path, tmp_path):
+    source = tmp_path / "late.mp4"
+    source.write_bytes(b"\0" * 1024)
+    layout = [media(str(source))]
+    store = ProjectStore(project_path)
+    store.sync(layout) # Автосохранение раньше, чем закончилась проба
+    ProbeCache.instance().put(ProbeResult(path=str(source), fps=25.0, duration=10.0,
+                                          keyframes=KeyframeIndex([0.0, 2.0])))
+    assert store.sync(layout) == 1 # Только строка пробы
+    assert store.sync(layout) == 0
+    store.close()
+
+    ProbeCache._instance = ProbeCache(db_path=str(tmp_path / "other_cache.db"))
+    ProjectStore(project_path).load()
+    assert ProbeCache.instance().get(str(source)).keyframes.tolist() == [0.0, 2.0]
@@ -0,0 +1,40 @@
+import os
+import random
+from array import array
+
+from core.waveform import WaveformBuilder, WaveformPyramid
+
+def built_pyramid(seconds=20):
+    rng = random.Random(14)
+    builder = WaveformBuilder()
+    builder.feed(array('h', (rng.randint(-30000, 30000) for _ in range(seconds * 8000))))
+    return builder.finish()
+
+def test_loaded_pyramid_matches_saved_one(tmp_path):
+    pyramid = built_pyramid()
+    path = str(tmp_path / "a.wfp")
+    pyramid.save(path)
+    with WaveformPyramid.load(path) as loaded:
+        assert loaded.duration == pyramid.duration
+        assert loaded.columns(0.0, 0.05, 40) == pyramid.columns(0.0, 0.05, 40)
+        assert loaded.columns(3.0, 1.0, 10) == pyramid.columns(3.0, 1.0, 10)
+
+def test_close_releases_the_cache_file(tmp_path):
+    path = str(tmp_path / "a.wfp")
+    built_pyramid().save(path)
+    loaded = WaveformPyramid.load(path)
+    loaded.close()
+    loaded.close()
+    assert loaded.levels == []
+    assert loaded.columns(0.0, 1.0, 3) == [None, None, None]
+    # Файл можно перезаписать и удалить (на Windows открытый mmap это блокирует)
+    built_pyramid(5).save(path)
+    os.remove(path)
+
+def test_truncated_cache_file_is_rejected(tmp_path):
+    path = str(tmp_path / "a.wfp")
+    built_pyramid().save(path)
+    with open(path, 'r+b') as f:
+        f.truncate(64)
+    assert WaveformPyramid.load(path) is None
+    os.remove(path)
@@ -1,26 +1,35 @@
 import os
 import mpv
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QTreeWidget, QTreeWidgetItem, QSplitter, 
-                             QScrollBar, QFileDialog, QLabel, QTreeWidgetItemIterator,
-                             QMenu, QInputDialog, QApplication, QProgressDialog, QMessageBox)
+                             QPushButton, QSplitter, 
+                             QScrollBar, QFileDialog, QLabel,
+                             QMenu, QInputDialog, QApplication, QProgressDialog, QMessageBox,
+                             QProgressBar)
 from PyQt6.QtGui import QKeySequence, QShortcut
 from PyQt6.QtCore import Qt, QTimer
 
 from ui.widgets.timeline import TimelineWidget
-from ui.widgets.item_card import ItemCardWidget
-from ui.widgets.video_tree import VideoTreeWidget
+from ui.widgets.item_card import ItemCardDelegate
+from ui.widgets.video_tree import VideoTreeView
+from ui.queue_model import QueueModel
+from core.markers import apply_markers
 from ui.widgets.control_panel import ControlPanel
 from ui.widgets.export_panel import ExportPanel
 from ui.widgets.main_menu import MainMenu
+from ui.position_bridge import PositionBridge
 from utils.language_manager import LanguageManager
-from core.ffmpeg_core import FFmpegWorker
-from core.export_processor import ExportThread
-from core.ffmpeg_core import FFmpegWorker
 from core.export_processor import ExportThread
+from core.ingest import IngestThread
+from core.probe_thread import ProbeThread
+from core.preload_thread import PreloadThread
 from core.models import MediaItem, GroupItem
+from core.project import ProjectStore, ProjectError
 from utils.settings import SettingsManager
 from utils.theme_manager import ThemeManager
+from utils.helpers import format_duration
+
+# Пауза после последнего изменения перед автосохранением проекта (мс)
+AUTOSAVE_DELAY_MS = 1500
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -28,10 +37,39 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(LanguageManager.instance().tr("app_title"))
         self.resize(1500, 900)
         
-        # Хранилище данных (путь : объект)
-        self.video_data = {}
+        # Очередь: модель для дерева; video_data — ее MediaStore (клипы по пути и по id)
+        self.queue_model = QueueModel(self)
+        self.video_data = self.queue_model.store
+
+        # Фоновое сканирование ключевых кадров для текущего клипа
+        self.probe_thread = None
+        self._stale_probe_threads = set()
+        # Прогрев следующих клипов очереди, пока размечается текущий
+        self.preload_thread = None
+
+        # Фоновое добавление файлов
+        self.ingest_thread = None
+        self._ingest_queue = []
+        self._ingest_pending = set()
+        self._ingest_errors = []
+        self._ingest_duplicates = []
+        self._ingest_done = self._ingest_total = 0
+        # Готовые клипы копятся и вставляются в очередь одной пачкой за проход цикла событий
+        self._ingest_buffer = []
+        self._ingest_flush_timer = QTimer(self)
+        self._ingest_flush_timer.setSingleShot(True)
+        self._ingest_flush_timer.setInterval(0)
+        self._ingest_flush_timer.timeout.connect(self.flush_ingested)
+
+        # Текущий проект; изменения пишутся в него с задержкой (только измененные строки)
+        self.project = None
+        self._autosave_timer = QTimer(self)
+        self._autosave_timer.setSingleShot(True)
+        self._autosave_timer.setInterval(AUTOSAVE_DELAY_MS)
+        self._autosave_timer.timeout.connect(self.save_project)
 
         self.init_ui()
+        self.restore_last_project()
         
         # Инициализация MPV
         self.player = mpv.MPV(wid=str(int(self.video_container.winId())), vo='gpu')
@@ -50,10 +88,14 @@ class MainWindow(QMainWindow):
         
         # Connect Menu Signals
         self.menu.add_video_triggered.connect(self.add_files_dialog)
+        self.menu.open_project_triggered.connect(self.open_project_dialog)
+        self.menu.save_project_as_triggered.connect(self.save_project_as_dialog)
         self.menu.delete_triggered.connect(self.confirm_delete_selection)
         self.menu.create_group_triggered.connect(self.create_group_from_selection)
         self.menu.delete_all_triggered.connect(self.confirm_clear_queue)
         self.menu.theme_changed.connect(self.update_theme)
+        self.menu.thumbnails_toggled.connect(lambda on: self.timeline.set_thumbnails_enabled(on))
+        self.menu.waveform_toggled.connect(lambda on: self.timeline.set_waveform_enabled(on))
         self.menu.about_triggered.connect(self.show_about)
 
         # Основной разделитель
@@ -68,15 +110,13 @@ class MainWindow(QMainWindow):
         l_layout.addWidget(self.lbl_queue)
         self.group_counter = 1
         
-        self.tree = VideoTreeWidget()
+        self.tree = VideoTreeView()
+        self.tree.setModel(self.queue_model)
+        self.tree.setItemDelegate(ItemCardDelegate(self.tree))
         self.tree.files_dropped.connect(self.add_video_files)
-        self.tree.setHeaderHidden(True)
-        self.tree.setIndentation(20)
-        self.tree.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
-        self.tree.setDragEnabled(True)
-        self.tree.setAcceptDrops(True)
-        self.tree.setDragDropMode(QTreeWidget.DragDropMode.InternalMove)
-        self.tree.itemClicked.connect(self.on_item_clicked)
+        self.tree.clicked.connect(self.on_item_clicked)
+        self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tree.customContextMenuRequested.connect(self.open_context_menu)
         l_layout.addWidget(self.tree)
 
         # Панель управления (Кнопки)
@@ -110,7 +150,7 @@ class MainWindow(QMainWindow):
         r_layout.addWidget(self.timeline, 1)
 
         # Connect selection change for clearing
-        self.tree.itemSelectionChanged.connect(self.on_selection_changed)
+        self.tree.selectionModel().selectionChanged.connect(self.on_selection_changed)
 
         # Нижние кнопки управления
         ctrls = QHBoxLayout()
@@ -149,6 +189,19 @@ class MainWindow(QMainWindow):
         self.splitter.addWidget(right_pane)
         self.splitter.setSizes([350, 1150])
 
+        # Статус-бар: сводка разметки очереди и прогресс фонового добавления файлов
+        self.readiness_label = QLabel()
+        self.statusBar().addWidget(self.readiness_label)
+        self.ingest_label = QLabel()
+        self.ingest_progress = QProgressBar()
+        self.ingest_progress.setFixedWidth(200)
+        self.ingest_cancel_btn = QPushButton("✖")
+        self.ingest_cancel_btn.setFixedWidth(30)
+        self.ingest_cancel_btn.clicked.connect(self.cancel_ingest)
+        for w in (self.ingest_label, self.ingest_progress, self.ingest_cancel_btn):
+            self.statusBar().addPermanentWidget(w)
+            w.hide()
+
         self.setup_connections()
 
     def setup_connections(self):
@@ -163,136 +216,149 @@ class MainWindow(QMainWindow):
         self.timeline.ui_updated.connect(self.update_scroll)
         self.scrollbar.valueChanged.connect(self.manual_scroll)
         
-        # Drag and Drop fix
-        self.tree.model().rowsMoved.connect(self.on_rows_moved)
-        self.tree.model().rowsInserted.connect(self.on_rows_inserted)
+        # Любое изменение состава очереди — в автосохранение
+        self.queue_model.structure_changed.connect(self.mark_project_dirty)
+        self.queue_model.readiness_changed.connect(self.on_readiness_changed)
 
         # Delete Shortcut
         self.shortcut_del = QShortcut(QKeySequence("Delete"), self.tree)
         self.shortcut_del.activated.connect(self.confirm_delete_selection)
 
-    def on_rows_moved(self, parent, start, end, destination, row):
-        # QTimer для отложенного обновления, так как во время сигнала структура может быть не до конца обновлена
-        from PyQt6.QtCore import QTimer
-        QTimer.singleShot(50, self._restore_widgets_after_move)
-
-    def on_rows_inserted(self, parent, start, end):
-        from PyQt6.QtCore import QTimer
-        QTimer.singleShot(50, self._restore_widgets_after_move)
-
-    def _restore_widgets_after_move(self):
-        # Проходим по всем элементам и восстанавливаем виджеты, если их нет
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            if not self.tree.itemWidget(item, 0):
-                 data = item.data(0, Qt.ItemDataRole.UserRole)
-                 if data:
-                     card = self.create_item_widget(item, data)
-                     self.tree.setItemWidget(item, 0, card)
-            iterator += 1
-
     def init_observers(self):
+        # Наблюдатели mpv вызываются из его потока: только передаем значения в мост,
+        # таймлайн обновляется в GUI-потоке не чаще частоты обновления экрана
+        self.position_bridge = PositionBridge(self)
+        self.position_bridge.position_changed.connect(self.timeline.set_current_time)
+        self.position_bridge.duration_changed.connect(self.timeline.set_duration)
+
         @self.player.property_observer('time-pos')
         def _on_time(name, val):
             if val is not None:
-                self.timeline.current_time = val
-                self.timeline.update()
+                self.position_bridge.post_time(val)
 
         @self.player.property_observer('duration')
         def _on_dur(name, val):
             if val is not None:
-                self.timeline.set_duration(val)
+                self.position_bridge.post_duration(val)
 
     # --- ЛОГИКА ОЧЕРЕДИ ---
 
-    def create_item_widget(self, item, data):
-        """Создает и настраивает виджет карточки для элемента дерева"""
-        title = "Unknown"
-        info = ""
-        
-        if isinstance(data, MediaItem):
-            title = data.filename
-            info = f"{data.fps} fps | {data.filename.split('.')[-1].upper()}"
-        elif isinstance(data, GroupItem):
-            title = f"📁 {data.name}"
-            info = LanguageManager.instance().tr("lbl_bulk_marking")
-            
-        card = ItemCardWidget(title, info)
-        card.tree_item = item  # Привязываем элемент к виджету для обработки событий
-        
-        # Настройка контекстного меню
-        card.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        card.customContextMenuRequested.connect(self.on_card_context_menu)
-        
-        # Восстанавливаем статус
-        if data.is_ready:
-            fps = getattr(data, 'fps', 25)
-            dur = getattr(data, 'duration', 0)
-            card.set_status(True, data.start_time, data.end_time, fps, dur)
-            
-        return card
-
-    def on_card_context_menu(self, pos):
-        """Обработчик ПКМ по карточке"""
-        card = self.sender()
-        if not card or not hasattr(card, 'tree_item'): return
-        
-        item = card.tree_item
-        
-        # Если элемент не выбран, выбираем его (очищая остальные, как в стандарте)
-        if item not in self.tree.selectedItems():
-             if not (QApplication.keyboardModifiers() & Qt.KeyboardModifier.ControlModifier):
-                 self.tree.clearSelection()
-             item.setSelected(True)
-        
-        # Конвертируем позицию в координаты viewport дерева для вызова общего меню
-        global_pos = card.mapToGlobal(pos)
-        viewport_pos = self.tree.viewport().mapFromGlobal(global_pos)
-        self.open_context_menu(viewport_pos)
-
     def add_files_dialog(self):
         files, _ = QFileDialog.getOpenFileNames(self, "Добавить видео в очередь", filter="Video Files (*.mp4 *.mkv *.avi *.mov *.flv *.webm *.wmv *.mpeg *.mpg)")
         if files:
             self.add_video_files(files)
 
     def add_video_files(self, files):
-        if not files: return
-        
-        # Создаем прогресс-бар
-        progress = QProgressDialog("Обработка видео...", "Отмена", 0, len(files), self)
-        progress.setWindowModality(Qt.WindowModality.WindowModal)
-        progress.setMinimumDuration(0) # Показывать сразу
-        progress.setValue(0)
-        
-        for i, f in enumerate(files):
-            if progress.wasCanceled():
-                break
-                
-            progress.setLabelText(f"Обработка: {os.path.basename(f)}")
-            
-            if f not in self.video_data:
-                fps, duration, kfs = FFmpegWorker.get_video_info(f)
-                # В будущем можно добавить получение разрешения через ffprobe
-                media = MediaItem(f, fps=fps, duration=duration, resolution="HD")
-                
-                item = QTreeWidgetItem(self.tree)
-                # Запрещаем бросать в этот элемент (вложение в видео запрещено)
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsDropEnabled)
-                item.setData(0, Qt.ItemDataRole.UserRole, media)
-                
-                card = self.create_item_widget(item, media)
-                self.tree.setItemWidget(item, 0, card)
-                
-                self.video_data[f] = media
-            
-            progress.setValue(i + 1)
-            QApplication.processEvents() # Обновляем UI
+        new_files = [f for f in files if f not in self.video_data and f not in self._ingest_pending]
+        if not new_files: return
+
+        self._ingest_pending.update(new_files)
+        self._ingest_queue.extend(new_files)
+        self._ingest_total += len(new_files)
+        self._update_ingest_status()
+
+        if not self.ingest_thread:
+            self._start_next_ingest()
+
+    def _start_next_ingest(self):
+        paths, self._ingest_queue = self._ingest_queue, []
+        self.ingest_thread = IngestThread(paths)
+        self.ingest_thread.item_ready.connect(self.on_ingest_item)
+        self.ingest_thread.item_failed.connect(self.on_ingest_failed)
+        self.ingest_thread.finished.connect(self.on_ingest_finished)
+        self.ingest_thread.start()
+
+    def _is_stale_ingest(self):
+        # Сигнал потока, брошенного при открытии проекта (см. discard_ingest)
+        return self.sender() is not self.ingest_thread
+
+    def on_ingest_item(self, media):
+        if self._is_stale_ingest(): return
+        self._ingest_done += 1
+        self._update_ingest_status()
+        self._ingest_buffer.append(media)
+        self._ingest_flush_timer.start()
+
+    def flush_ingested(self):
+        self._ingest_flush_timer.stop()
+        if not self._ingest_buffer: return
+        batch, self._ingest_buffer = self._ingest_buffer, []
+        fresh = []
+        seen = {}
+        for media in batch:
+            self._ingest_pending.discard(media.path)
+            # Копия уже добавленного файла (то же содержимое под другим путем) в очередь не идет
+            if media.fingerprint:
+                twin = self.video_data.by_fingerprint(media.fingerprint) or seen.get(media.fingerprint)
+                if twin is not None and twin.path != media.path:
+                    self._ingest_duplicates.append(f"{media.filename} = {twin.path}")
+                    continue
+                seen[media.fingerprint] = media
+            fresh.append(media)
+        self.queue_model.extend_media(fresh)
+
+    def on_ingest_failed(self, path, error):
+        if self._is_stale_ingest(): return
+        self._ingest_pending.discard(path)
+        self._ingest_done += 1
+        self._ingest_errors.append(f"{os.path.basename(path)}: {error}")
+        self._update_ingest_status()
+
+    def on_ingest_finished(self):
+        if self._is_stale_ingest(): return
+        self.ingest_thread = None
+        self.flush_ingested()
+        if self._ingest_queue:
+            self._start_next_ingest()
+            return
 
-        self.check_export_readiness()
+        self._ingest_pending.clear()
+        self._ingest_done = self._ingest_total = 0
+        self._update_ingest_status()
+
+        if self._ingest_errors:
+            errors, self._ingest_errors = self._ingest_errors, []
+            QMessageBox.warning(self, LanguageManager.instance().tr("btn_add_files"),
+                                LanguageManager.instance().tr("msg_ingest_failed") + "\n\n" + "\n".join(errors))
+        if self._ingest_duplicates:
+            duplicates, self._ingest_duplicates = self._ingest_duplicates, []
+            QMessageBox.information(self, LanguageManager.instance().tr("btn_add_files"),
+                                    LanguageManager.instance().tr("msg_ingest_duplicates") + "\n\n" + "\n".join(duplicates))
+
+    def cancel_ingest(self):
+        self._ingest_queue.clear()
+        if self.ingest_thread:
+            self.ingest_thread.cancel()
+
+    def discard_ingest(self):
+        """Stops adding files and drops everything the run produced so far:
+        probed items not yet in the queue, the queued batches, errors."""
+        self.cancel_ingest()
+        thread = self.ingest_thread
+        if thread is not None:
+            thread.finished.connect(lambda t=thread: self._stale_probe_threads.discard(t))
+            self._stale_probe_threads.add(thread) # Держим ссылку, пока поток не завершится
+            self.ingest_thread = None
+        self._ingest_flush_timer.stop()
+        self._ingest_buffer.clear()
+        self._ingest_pending.clear()
+        self._ingest_errors.clear()
+        self._ingest_duplicates.clear()
+        self._ingest_done = self._ingest_total = 0
+        self._update_ingest_status()
+
+    def _update_ingest_status(self):
+        active = self._ingest_total > 0
+        for w in (self.ingest_label, self.ingest_progress, self.ingest_cancel_btn):
+            w.setVisible(active)
+        if active:
+            self.ingest_label.setText(LanguageManager.instance().tr("status_ingesting").format(
+                done=self._ingest_done, total=self._ingest_total))
+            self.ingest_progress.setRange(0, self._ingest_total)
+            self.ingest_progress.setValue(self._ingest_done)
 
     def confirm_delete_selection(self):
-        selected = self.tree.selectedItems()
+        selected = self.tree.selected_objects()
         if not selected: return
         
         lm = LanguageManager.instance()
@@ -304,20 +370,18 @@ class MainWindow(QMainWindow):
             self.delete_items(selected)
 
     def confirm_clear_queue(self):
-        if self.tree.topLevelItemCount() == 0: return
+        if self.queue_model.rowCount() == 0: return
 
         lm = LanguageManager.instance()
         answ = QMessageBox.question(self, lm.tr("btn_clear_list"), lm.tr("msg_confirm_clear"),
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if answ == QMessageBox.StandardButton.Yes:
-            self.tree.clear()
-            self.video_data.clear()
+            self.queue_model.clear()
             self.group_counter = 1
-            self.check_export_readiness()
 
     def create_group_from_selection(self):
-        selected = self.tree.selectedItems()
+        selected = [obj for obj in self.tree.selected_objects() if isinstance(obj, MediaItem)]
         if not selected: return
         
         lm = LanguageManager.instance()
@@ -327,37 +391,12 @@ class MainWindow(QMainWindow):
 
         self.group_counter += 1
         
-        group_item = QTreeWidgetItem(self.tree)
-        group_data = GroupItem(group_name)
-        group_item.setData(0, Qt.ItemDataRole.UserRole, group_data)
-        
-        card = self.create_item_widget(group_item, group_data)
-        self.tree.setItemWidget(group_item, 0, card)
-
-        for item in selected:
-            # Перемещаем в группу
-            parent = item.parent() or self.tree.invisibleRootItem()
-            index = parent.indexOfChild(item)
-            child = parent.takeChild(index)
-            group_item.addChild(child)
-            
-            # Восстанавливаем виджет для элемента в новой локации
-            media = child.data(0, Qt.ItemDataRole.UserRole)
-            if media:
-                card = self.create_item_widget(child, media)
-                self.tree.setItemWidget(child, 0, card)
-        
-        group_item.setExpanded(True)
+        group_data = self.queue_model.create_group(GroupItem(group_name), selected)
+        self.tree.expand(self.queue_model.index_of(group_data))
         
         # --- СИНХРОНИЗАЦИЯ ПРИ СОЗДАНИИ ---
         # Ищем первое видео с метками (Master)
-        master_child = None
-        for i in range(group_item.childCount()):
-            child = group_item.child(i)
-            c_data = child.data(0, Qt.ItemDataRole.UserRole)
-            if c_data and c_data.is_ready:
-                master_child = c_data
-                break
+        master_child = next((c_data for c_data in group_data.items if c_data.is_ready), None)
         
         # Если нашли, применяем его настройки ко всей группе
         if master_child:
@@ -365,113 +404,96 @@ class MainWindow(QMainWindow):
             m_start = master_child.start_time
             m_offset = max(0, master_child.duration - master_child.end_time)
             
-            # Обновляем данные Группы
+            # Обновляем данные Группы и применяем ко всем детям
             group_data.start_time = m_start
             group_data.end_time = master_child.end_time
             group_data.is_ready = True
-            
-            # Обновляем виджет Группы
-            gw = self.tree.itemWidget(group_item, 0)
-            if gw:
-                 fps = getattr(master_child, 'fps', 25)
-                 dur = getattr(master_child, 'duration', 0)
-                 gw.set_status(True, group_data.start_time, group_data.end_time, fps, dur)
-
-            # Применяем ко всем детям
-            for i in range(group_item.childCount()):
-                child = group_item.child(i)
-                c_data = child.data(0, Qt.ItemDataRole.UserRole)
-                if c_data:
-                    c_data.start_time = m_start
-                    c_data.end_time = max(0, c_data.duration - m_offset)
-                    c_data.is_ready = True
-                    
-                    cw = self.tree.itemWidget(child, 0)
-                    if cw:
-                        cw.set_status(True, c_data.start_time, c_data.end_time, c_data.fps, c_data.duration)
+            apply_markers(group_data.items, start=m_start, end_offset=m_offset)
+            self.queue_model.refresh_group(group_data)
 
-        self.check_export_readiness()
+        self.mark_project_dirty()
 
     def open_context_menu(self, position):
+        # ПКМ по невыбранной карточке выбирает ее (очищая остальные, как в стандарте)
+        index = self.tree.indexAt(position)
+        if index.isValid() and not self.tree.selectionModel().isSelected(index):
+            if not (QApplication.keyboardModifiers() & Qt.KeyboardModifier.ControlModifier):
+                self.tree.clearSelection()
+            self.tree.selectionModel().select(index, self.tree.selectionModel().SelectionFlag.Select)
+
         menu = QMenu()
-        selected = self.tree.selectedItems()
+        selected = self.tree.selected_objects()
         
         if not selected: return
 
         # Проверяем, есть ли среди выбранных группа (для переименования)
-        has_group = any(isinstance(item.data(0, Qt.ItemDataRole.UserRole), GroupItem) for item in selected)
+        has_group = any(isinstance(item, GroupItem) for item in selected)
         
         if has_group and len(selected) == 1:
             rename_action = menu.addAction("✏️ Переименовать")
             rename_action.triggered.connect(lambda: self.rename_group(selected[0]))
+
+        # Несколько отрезков из одного файла: текущие IN/OUT сохраняются как отдельный клип
+        if len(selected) == 1 and isinstance(selected[0], MediaItem):
+            media = selected[0]
+            lm = LanguageManager.instance()
+            if media.is_ready:
+                add_range_action = menu.addAction(lm.tr("ctx_add_cut_range"))
+                add_range_action.triggered.connect(lambda: self.add_cut_range(media))
+            if media.ranges:
+                clear_ranges_action = menu.addAction(lm.tr("ctx_clear_cut_ranges").format(count=len(media.ranges)))
+                clear_ranges_action.triggered.connect(lambda: self.clear_cut_ranges(media))
         
         delete_action = menu.addAction("❌ Удалить")
         delete_action.triggered.connect(lambda: self.delete_items(selected))
         
         menu.exec(self.tree.viewport().mapToGlobal(position))
 
-    def rename_group(self, item):
-        data = item.data(0, Qt.ItemDataRole.UserRole)
+    def rename_group(self, data):
         if not isinstance(data, GroupItem): return
         
         new_name, ok = QInputDialog.getText(self, "Переименовать группу", "Новое имя:", text=data.name)
         if ok and new_name:
             data.name = new_name
-            # Обновляем карточку
-            card = self.create_item_widget(item, data)
-            self.tree.setItemWidget(item, 0, card)
+            self.queue_model.refresh(data)
+            self.mark_project_dirty()
+
+    def add_cut_range(self, media):
+        cut = (media.start_time, media.end_time)
+        if cut[1] <= cut[0] or cut in media.ranges: return
+        media.ranges.append(cut)
+        media.ranges.sort()
+        self.queue_model.refresh(media)
+        self.mark_project_dirty()
+
+    def clear_cut_ranges(self, media):
+        media.ranges = []
+        self.queue_model.refresh(media)
+        self.mark_project_dirty()
 
     def delete_items(self, items):
-        for item in items:
-            data = item.data(0, Qt.ItemDataRole.UserRole)
-            parent = item.parent() or self.tree.invisibleRootItem()
-            
-            if isinstance(data, GroupItem):
-                # Разгруппировка: перемещаем детей в корень
-                children = []
-                for i in range(item.childCount()):
-                    children.append(item.child(i))
-                
-                for child in children:
-                    item.removeChild(child)
-                    parent.addChild(child) # Добавляем в конец корня (или родителя группы если вложенность)
-                    
-                    # Восстанавливаем виджет (так как при перемещении он теряется)
-                    c_data = child.data(0, Qt.ItemDataRole.UserRole)
-                    if c_data:
-                        card = self.create_item_widget(child, c_data)
-                        self.tree.setItemWidget(child, 0, card)
-                
-                # Удаляем саму группу
-                parent.removeChild(item)
-                
-            elif isinstance(data, MediaItem):
-                # Удаление видео
-                if data.path in self.video_data:
-                    del self.video_data[data.path]
-                parent.removeChild(item)
-        
-        self.check_export_readiness()
+        # Группа разгруппировывается (клипы уходят в конец корня), видео удаляется
+        self.queue_model.remove_items(items)
     
-    def on_item_clicked(self, item, column):
-        data = item.data(0, Qt.ItemDataRole.UserRole)
+    def on_item_clicked(self, index):
+        data = index.data(Qt.ItemDataRole.UserRole)
         
         target_media = None
         if isinstance(data, MediaItem):
             target_media = data
-        elif isinstance(data, GroupItem) and item.childCount() > 0:
+        elif isinstance(data, GroupItem) and data.items:
             # Загружаем Master-клип (первый в группе)
-            first_child = item.child(0)
-            target_media = first_child.data(0, Qt.ItemDataRole.UserRole)
+            target_media = data.items[0]
 
         if target_media:
             self.player.play(target_media.path)
             self.player.pause = True
             
-            # Обновляем таймлайн данными текущего видео
-            fps, duration, kfs = FFmpegWorker.get_video_info(target_media.path)
-            self.timeline.fps = fps
-            self.timeline.keyframes = kfs
+            # Обновляем таймлайн данными текущего видео; ключевые кадры подтягиваются по мере сканирования
+            self.timeline.fps = target_media.fps
+            self.timeline.set_source(target_media.path)
+            self.timeline.set_keyframes([])
+            self.start_keyframe_scan(target_media.path)
             
             # Восстанавливаем маркеры
             self.timeline.start_marker = target_media.start_time
@@ -480,6 +502,55 @@ class MainWindow(QMainWindow):
             self.timeline.update_all()
             self.timeline.setFocus()
 
+            self.start_preload(data)
+
+    def start_preload(self, obj):
+        if self.preload_thread:
+            self.preload_thread.cancel()
+            self.preload_thread = None
+        count = int(SettingsManager.instance().get("preload_items", 2))
+        if count <= 0: return
+        upcoming = self.queue_model.media_after(obj, count)
+        if not upcoming: return
+
+        thread = PreloadThread([media.path for media in upcoming])
+        thread.finished.connect(lambda t=thread: self._stale_probe_threads.discard(t))
+        self._stale_probe_threads.add(thread) # Держим ссылку, пока поток не завершится
+        self.preload_thread = thread
+        thread.start()
+
+    def start_keyframe_scan(self, path):
+        self.cancel_keyframe_scan()
+
+        thread = ProbeThread(path)
+        thread.keyframes_found.connect(self.on_scan_keyframes)
+        thread.keyframes_indexed.connect(self.on_scan_index)
+        thread.probe_ready.connect(self.on_scan_ready)
+        thread.finished.connect(lambda t=thread: self._stale_probe_threads.discard(t))
+        self._stale_probe_threads.add(thread) # Держим ссылку, пока поток не завершится
+        self.probe_thread = thread
+        thread.start()
+
+    def cancel_keyframe_scan(self):
+        if self.probe_thread:
+            self.probe_thread.cancel()
+            self.probe_thread = None
+
+    def on_scan_keyframes(self, path, batch):
+        if self.probe_thread and self.probe_thread.path == path:
+            self.timeline.add_keyframes(batch)
+
+    def on_scan_index(self, path, keyframes):
+        if self.probe_thread and self.probe_thread.path == path:
+            self.timeline.set_keyframes(keyframes)
+
+    def on_scan_ready(self, path, info):
+        if not (self.probe_thread and self.probe_thread.path == path):
+            return
+        if info:
+            self.timeline.fps = info.fps
+            self.timeline.set_keyframes(info.keyframes)
+
     # --- УПРАВЛЕНИЕ МАРКЕРАМИ ---
 
     def set_start(self):
@@ -495,91 +566,36 @@ class MainWindow(QMainWindow):
         self.timeline.update()
 
     def _sync_markers_to_data(self, mode, val):
-        item = self.tree.currentItem()
-        if not item: return
-        
-        data = item.data(0, Qt.ItemDataRole.UserRole)
-        
-        # Helper для обновления виджета
-        def update_widget(tree_item, d):
-            w = self.tree.itemWidget(tree_item, 0)
-            if w:
-                fps = getattr(d, 'fps', 25)
-                dur = getattr(d, 'duration', 0)
-                w.set_status(True, d.start_time, d.end_time, fps, dur)
-        
-            from PyQt6.QtCore import QTimer
-            QTimer.singleShot(100, self.check_export_readiness)
-
-        if isinstance(data, GroupItem):
-            # Применяем ко всем видео в группе
-            # Для группы считаем offset если end
-            offset_from_end = 0
-            if mode == 'end':
-                data.end_time = val
-            else:
-                 data.start_time = val
-            data.is_ready = True
-            
-            # Получаем текущее видео в плеере, чтобы понять отступ
-            current_duration = self.player.duration or 0
-            offset = max(0, current_duration - val) if mode == 'end' else 0
-
-            for i in range(item.childCount()):
-                child = item.child(i)
-                child_data = child.data(0, Qt.ItemDataRole.UserRole)
-                
-                if mode == 'start': 
-                    child_data.start_time = val
-                else: 
-                    # RELATIVE LOGIC
-                    child_data.end_time = max(0, child_data.duration - offset)
-                
-                child_data.is_ready = True
-                update_widget(child, child_data)
-            
-            # Обновляем саму группу
-            update_widget(item, data)
-        
-        elif isinstance(data, MediaItem):
-            # Проверяем, находится ли элемент в группе
-            parent = item.parent()
-            if parent:
-                p_data = parent.data(0, Qt.ItemDataRole.UserRole)
-                if isinstance(p_data, GroupItem):
-                    # Логика группы: применяем ко всем
-                    
-                    # Считаем offset
-                    offset = 0
-                    if mode == 'end':
-                        offset = max(0, data.duration - val)
-                    
-                    # Обновляем группу (визуально)
-                    if mode == 'start': p_data.start_time = val
-                    else: p_data.end_time = val # Тут спорно что писать в группу, но пусть будет абсолют текущего
-                    p_data.is_ready = True
-                    update_widget(parent, p_data)
-                    
-                    # Обновляем всех детей (включая текущий)
-                    for i in range(parent.childCount()):
-                        child = parent.child(i)
-                        c_data = child.data(0, Qt.ItemDataRole.UserRole)
-                        
-                        if mode == 'start': 
-                            c_data.start_time = val
-                        else: 
-                            # RELATIVE LOGIC
-                            c_data.end_time = max(0, c_data.duration - offset)
-                            
-                        c_data.is_ready = True
-                        update_widget(child, c_data)
-                    return
+        data = self.tree.currentIndex().data(Qt.ItemDataRole.UserRole)
+        if data is None: return
+        self.mark_project_dirty()
 
+        if isinstance(data, MediaItem) and data.group is None:
             # Обычный режим (одиночное видео)
             if mode == 'start': data.start_time = val
             else: data.end_time = val
             data.is_ready = True
-            update_widget(item, data)
+            self.queue_model.refresh(data)
+            return
+
+        # Логика группы: применяем ко всем клипам
+        if isinstance(data, GroupItem):
+            group = data
+            # Получаем текущее видео в плеере, чтобы понять отступ
+            reference_duration = self.player.duration or 0
+        else:
+            group = data.group
+            reference_duration = data.duration
+
+        if mode == 'start':
+            group.start_time = val
+            apply_markers(group.items, start=val)
+        else:
+            group.end_time = val # Для группы — абсолют текущего клипа
+            # RELATIVE LOGIC: OUT на том же расстоянии от конца каждого клипа
+            apply_markers(group.items, end_offset=max(0, reference_duration - val))
+        group.is_ready = True
+        self.queue_model.refresh_group(group)
 
     # --- БЕЗОПАСНЫЕ КОМАНДЫ ПЛЕЕРА ---
 
@@ -602,9 +618,8 @@ class MainWindow(QMainWindow):
         if not kfs: return
         curr = self.player.time_pos or 0
         try:
-            target = next((k for k in (kfs if d > 0 else reversed(kfs)) 
-                          if (k > curr + 0.1 if d > 0 else k < curr - 0.1)), curr)
-            self.player.time_pos = target
+            target = kfs.after(curr + 0.1) if d > 0 else kfs.before(curr - 0.1, strict=True)
+            self.player.time_pos = target if target is not None else curr
         except: pass
 
     # --- СКРОЛЛИНГ ---
@@ -627,28 +642,24 @@ class MainWindow(QMainWindow):
         d = QFileDialog.getExistingDirectory(self, LanguageManager.instance().tr("lbl_select_folder"))
         if d:
             self.export_panel.set_output_path(d)
+            self.mark_project_dirty()
 
     def check_export_readiness(self):
-        # Проверяем, что есть хотя бы одно видео и ВСЕ они готовы
-        has_items = False
-        all_ready = True
-        
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            data = item.data(0, Qt.ItemDataRole.UserRole)
-            
-            if isinstance(data, MediaItem):
-                has_items = True
-                if not data.is_ready:
-                    all_ready = False
-                    break
-            elif isinstance(data, GroupItem):
-                pass
-                
-            iterator += 1
-            
-        self.export_panel.set_export_enabled(has_items and all_ready)
+        # Есть хотя бы одно видео и ВСЕ они готовы — по счетчикам модели, без обхода очереди
+        self.export_panel.set_export_enabled(self.queue_model.is_export_ready())
+
+    def on_readiness_changed(self, ready, total):
+        self.check_export_readiness()
+        self.update_readiness_summary()
+
+    def update_readiness_summary(self):
+        model = self.queue_model
+        total = model.media_count()
+        lm = LanguageManager.instance()
+        self.readiness_label.setText(lm.tr("status_queue_ready").format(
+            ready=model.ready_count(), total=total) if total else "")
+        self.readiness_label.setToolTip(lm.tr("status_queue_memory").format(
+            total=total, size=f"{model.store.memory_bytes() / (1024 * 1024):.1f} MB"))
 
     def start_export(self):
         output_dir = self.export_panel.get_output_path()
@@ -664,28 +675,26 @@ class MainWindow(QMainWindow):
                 return
 
         # Собираем список файлов для экспорта
-        export_items = []
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            data = item.data(0, Qt.ItemDataRole.UserRole)
-            if isinstance(data, MediaItem) and data.is_ready:
-                export_items.append(data)
-            iterator += 1
+        export_items = [data for data in self.queue_model.all_media() if data.is_ready]
             
         if not export_items:
             QMessageBox.warning(self, "Внимание", "Нет готовых видео для экспорта.")
             return
 
-        # Настраиваем прогресс-бар
-        self.progress_dialog = QProgressDialog("Подготовка к экспорту...", "Отмена", 0, len(export_items), self)
+        # Настраиваем прогресс-бар (шкала — доля пачки в промилле, по времени ffmpeg)
+        self.progress_dialog = QProgressDialog("Подготовка к экспорту...", "Отмена", 0, 1000, self)
         self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
         self.progress_dialog.setMinimumDuration(0)
         self.progress_dialog.setValue(0)
+        self._export_header = ""
+        self._export_jobs = {}
+        self._export_batch_eta = -1.0
         
         # Запускаем поток
         self.export_thread = ExportThread(export_items, output_dir)
         self.export_thread.progress_update.connect(self.on_export_progress)
+        self.export_thread.job_progress.connect(self.on_export_job_progress)
+        self.export_thread.batch_progress.connect(self.on_export_batch_progress)
         self.export_thread.finished_all.connect(self.on_export_finished)
         self.export_thread.log_message.connect(lambda msg: print(f"Export Log: {msg}")) 
         
@@ -695,8 +704,27 @@ class MainWindow(QMainWindow):
         self.export_thread.start()
 
     def on_export_progress(self, current, total, filename):
-        self.progress_dialog.setValue(current)
-        self.progress_dialog.setLabelText(f"Экспорт ({current + 1}/{total}):\n{filename}")
+        self._export_header = f"Экспорт ({min(current + 1, total)}/{total}):\n{filename}"
+        self._refresh_export_label()
+
+    def on_export_job_progress(self, path, fraction, mbps, eta):
+        # По пути: одноименные клипы с разных карт — разные строки
+        if fraction >= 1.0:
+            self._export_jobs.pop(path, None)
+        else:
+            self._export_jobs[path] = (f"{os.path.basename(path)}: {fraction * 100:.0f}% · {mbps:.1f} MB/s · "
+                                       f"ETA {format_duration(eta)}")
+        self._refresh_export_label()
+
+    def on_export_batch_progress(self, fraction, eta):
+        self.progress_dialog.setValue(int(fraction * 1000))
+        self._export_batch_eta = eta
+        self._refresh_export_label()
+
+    def _refresh_export_label(self):
+        lines = [self._export_header, ""] + list(self._export_jobs.values())
+        lines.append(LanguageManager.instance().tr("lbl_export_eta").format(eta=format_duration(self._export_batch_eta)))
+        self.progress_dialog.setLabelText("\n".join(lines))
 
     def on_export_finished(self):
         self.progress_dialog.setValue(self.progress_dialog.maximum())
@@ -706,20 +734,113 @@ class MainWindow(QMainWindow):
 
     def cancel_export(self):
         if self.export_thread:
-            self.export_thread.is_running = False
+            self.export_thread.cancel()
             self.export_thread.wait()
             self.export_thread = None
 
+    # --- ПРОЕКТ ---
+
+    def default_project_path(self):
+        return os.path.join(SettingsManager.instance().config_dir(), "session" + ProjectStore.EXTENSION)
+
+    def restore_last_project(self):
+        last = SettingsManager.instance().get("last_project")
+        if last and os.path.exists(last) and self.open_project(last, quiet=True):
+            return
+        if not self.open_project(self.default_project_path(), quiet=True):
+            print("Autosave disabled: session project could not be opened")
+
+    def open_project(self, path, quiet=False):
+        store = ProjectStore(path)
+        try:
+            layout, meta = store.load()
+        except ProjectError as e:
+            store.close()
+            if not quiet:
+                QMessageBox.warning(self, LanguageManager.instance().tr("action_open_project"), str(e))
+            else:
+                print(e)
+            return False
+
+        # Досохраняем текущий проект и заменяем очередь содержимым нового
+        self.save_project()
+        if self.project:
+            self.project.close()
+        self.discard_ingest() # Файлы, добавляемые в старый проект, в новый не попадут
+        self.project = store
+        self.populate_queue(layout, meta)
+        SettingsManager.instance().set("last_project", path)
+        return True
+
+    def populate_queue(self, layout, meta):
+        # Один сброс модели вместо тысяч отдельных вставок
+        self.queue_model.set_layout(layout)
+        self.tree.expandAll()
+
+        self.export_panel.set_output_path(meta.get("output_dir", ""))
+        self.group_counter = meta.get("group_counter", 1)
+
+    def collect_project_layout(self):
+        return self.queue_model.layout()
+
+    def mark_project_dirty(self):
+        if self.project:
+            self._autosave_timer.start() # Перезапуск: пишем после паузы в правках
+
+    def save_project(self):
+        self._autosave_timer.stop()
+        if not self.project: return
+        meta = {"output_dir": self.export_panel.get_output_path(), "group_counter": self.group_counter}
+        try:
+            self.project.sync(self.collect_project_layout(), meta)
+        except ProjectError as e:
+            print(f"Autosave error: {e}")
+
+    def open_project_dialog(self):
+        lm = LanguageManager.instance()
+        path, _ = QFileDialog.getOpenFileName(self, lm.tr("action_open_project"), "", lm.tr("lbl_project_filter"))
+        if path:
+            self.open_project(path)
+
+    def save_project_as_dialog(self):
+        lm = LanguageManager.instance()
+        path, _ = QFileDialog.getSaveFileName(self, lm.tr("action_save_project_as"), "", lm.tr("lbl_project_filter"))
+        if not path or not self.project: return
+        if not path.lower().endswith(ProjectStore.EXTENSION):
+            path += ProjectStore.EXTENSION
+        self.save_project()
+        try:
+            self.project.save_as(path)
+        except ProjectError as e:
+            QMessageBox.warning(self, lm.tr("action_save_project_as"), str(e))
+            return
+        SettingsManager.instance().set("last_project", path)
+
+    def closeEvent(self, event):
+        self.save_project()
+        self.timeline.shutdown()
+        if self.preload_thread:
+            self.preload_thread.cancel()
+        self.cancel_keyframe_scan()
+        self.cancel_ingest()
+        if self.ingest_thread:
+            self.ingest_thread.wait()
+        for thread in list(self._stale_probe_threads):
+            thread.wait()
+        super().closeEvent(event)
+
     # --- NEW METHODS ---
 
     def on_selection_changed(self):
-        if not self.tree.selectedItems():
+        if not self.tree.selectionModel().hasSelection():
             # Clear player and timeline
+            self.cancel_keyframe_scan()
             self.player.loadfile("")
             self.timeline.set_duration(0)
             self.timeline.start_marker = 0
             self.timeline.end_marker = 0
-            self.timeline.keyframes = []
+            self.timeline.set_keyframes([])
+            self.timeline.set_source(None)
             self.timeline.update_all()
             # Check export readiness instead of unconditionally disabling
             self.check_export_readiness()
@@ -729,6 +850,7 @@ class MainWindow(QMainWindow):
         lm = LanguageManager.instance()
         self.setWindowTitle(lm.tr("app_title"))
         self.lbl_queue.setText(f"<b>{lm.tr('lbl_queue')}</b>")
+        self.update_readiness_summary()
         
         # Update player buttons tooltips
         if hasattr(self, 'player_btns'):
@@ -736,15 +858,8 @@ class MainWindow(QMainWindow):
                 key = b.property("tip_key")
                 if key: b.setToolTip(lm.tr(key))
         
-        # Update tree items
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            data = item.data(0, Qt.ItemDataRole.UserRole)
-            if isinstance(data, GroupItem):
-                 w = self.tree.itemWidget(item, 0)
-                 if w: w.set_info(lm.tr("lbl_bulk_marking"))
-            iterator += 1
+        # Карточки рисует делегат — достаточно перерисовать видимые
+        self.tree.viewport().update()
 
     def update_theme(self, theme):
         ThemeManager.apply_theme(QApplication.instance(), theme)
@@ -0,0 +1,77 @@
+import threading
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+class PositionBridge(QObject):
+    """Carries mpv's time-pos/duration from its event thread to the GUI thread.
+
+    mpv calls post_time()/post_duration() once per decoded frame. Only the
+    latest value is kept, and the GUI is woken at most once per display
+    refresh: a queued signal starts a timer at the screen's refresh rate,
+    which emits position_changed/duration_changed if the value moved and
+    stops itself once playback goes quiet.
+    """
+    position_changed = pyqtSignal(float)
+    duration_changed = pyqtSignal(float)
+    _wake = pyqtSignal() # Испускается из потока mpv, доставляется в GUI (QueuedConnection)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._time = self._duration = None
+        self._armed = False
+        self._duration_dirty = False # Длительность шлем всегда (новый файл может совпасть по длине)
+        self._sent_time = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.refresh_interval_ms())
+        self._timer.timeout.connect(self._flush)
+        self._wake.connect(self._on_wake)
+
+    @staticmethod
+    def refresh_interval_ms():
+        screen = QApplication.primaryScreen() if QApplication.instance() else None
+        rate = screen.refreshRate() if screen else 0
+        return max(4, int(1000 / (rate if rate > 0 else 60)))
+
+    # --- Поток mpv ---
+
+    def post_time(self, value):
+        self._post('_time', value)
+
+    def post_duration(self, value):
+        self._post('_duration', value)
+
+    def _post(self, attr, value):
+        with self._lock:
+            setattr(self, attr, value)
+            if attr == '_duration':
+                self._duration_dirty = True
+            if self._armed: return # Кадр уже ожидает отрисовки — просто обновили значение
+            self._armed = True
+        self._wake.emit()
+
+    # --- GUI ---
+
+    def _on_wake(self):
+        if not self._timer.isActive():
+            self._flush()
+            self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            self._armed = False
+            t, d = self._time, self._duration
+            duration_dirty, self._duration_dirty = self._duration_dirty, False
+
+        changed = False
+        if duration_dirty and d is not None:
+            self.duration_changed.emit(d)
+            changed = True
+        if t is not None and t != self._sent_time:
+            self._sent_time = t
+            self.position_changed.emit(t)
+            changed = True
+
+        if not changed:
+            self._timer.stop() # Воспроизведение стоит — не тикаем впустую
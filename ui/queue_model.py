@@ -0,0 +1,393 @@
+from itertools import chain, islice
+
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, QMimeData, QTimer, pyqtSignal
+
+from core.models import MediaItem, GroupItem
+from core.media_store import MediaStore
+from utils.helpers import format_time_hmsf
+from utils.language_manager import LanguageManager
+
+# Роли для делегата карточек
+InfoRole = Qt.ItemDataRole.UserRole + 1
+MarkerRole = Qt.ItemDataRole.UserRole + 2
+ReadyRole = Qt.ItemDataRole.UserRole + 3
+
+QUEUE_MIME_TYPE = "application/x-clipflow-queue"
+
+class QueueModel(QAbstractItemModel):
+    """Export queue as a two-level model: top-level MediaItems and GroupItems,
+    with each group's clips in GroupItem.items.
+
+    Indexes carry the MediaStore id of their object (internalId), and
+    UserRole resolves it back to the MediaItem/GroupItem; a clip's group is
+    kept in MediaItem.group. Card text is produced on demand for the
+    rows the view actually paints.
+
+    Structural edits work on contiguous runs: a bulk add, a group or an
+    ungroup of N rows is a handful of begin/end notifications and one
+    structure_changed, not N of each.
+
+    Ready/total clip counters are kept up to date on add, remove and
+    refresh(), so export readiness is O(1); readiness_changed is emitted once
+    per event-loop pass however many clips changed.
+    """
+    structure_changed = pyqtSignal()
+    readiness_changed = pyqtSignal(int, int) # ready, total (MediaItem)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._top = []
+        self.store = MediaStore()
+        # obj.id -> строка в своем списке; проверяется при чтении и пересчитывается списком целиком
+        self._rows = {}
+        # obj.id размеченных MediaItem: счетчик готовности без обхода очереди
+        self._ready_ids = set()
+        self._readiness_timer = QTimer(self)
+        self._readiness_timer.setSingleShot(True)
+        self._readiness_timer.setInterval(0)
+        self._readiness_timer.timeout.connect(self._emit_readiness)
+
+    # --- Qt model API ---
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        if not parent.isValid():
+            if row < len(self._top):
+                return self.createIndex(row, 0, self._top[row].id)
+            return QModelIndex()
+        group = self.object_at(parent)
+        if isinstance(group, GroupItem) and row < len(group.items):
+            return self.createIndex(row, 0, group.items[row].id)
+        return QModelIndex()
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        group = getattr(self.object_at(index), 'group', None)
+        if group is None:
+            return QModelIndex()
+        return self.createIndex(self._row_of(group), 0, group.id)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._top)
+        obj = self.object_at(parent)
+        return len(obj.items) if isinstance(obj, GroupItem) else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
+        # Бросать можно только в группу (вложение в видео запрещено)
+        if isinstance(self.object_at(index), GroupItem):
+            flags |= Qt.ItemFlag.ItemIsDropEnabled
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        obj = self.object_at(index)
+        if obj is None:
+            return None
+        if role == Qt.ItemDataRole.UserRole:
+            return obj
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"📁 {obj.name}" if isinstance(obj, GroupItem) else obj.filename
+        if role == InfoRole:
+            if isinstance(obj, GroupItem):
+                return LanguageManager.instance().tr("lbl_bulk_marking")
+            return f"{obj.fps} fps | {obj.filename.split('.')[-1].upper()}"
+        if role == ReadyRole:
+            return obj.is_ready
+        if role == MarkerRole:
+            return self.marker_text(obj)
+        return None
+
+    @staticmethod
+    def marker_text(obj):
+        if not obj.is_ready:
+            return LanguageManager.instance().tr("lbl_need_marking")
+        fps = getattr(obj, 'fps', 25)
+        duration = getattr(obj, 'duration', 0)
+        if isinstance(obj, GroupItem) and obj.items:
+            # Группа показывает метки относительно своего первого клипа (Master)
+            fps, duration = obj.items[0].fps, obj.items[0].duration
+        start_str = format_time_hmsf(obj.start_time, fps)
+        # Format END (Relative if duration > 0)
+        if duration > 0:
+            end_str = f"-{format_time_hmsf(max(0, duration - obj.end_time), fps)}"
+        else:
+            end_str = format_time_hmsf(obj.end_time, fps)
+        ranges = getattr(obj, 'ranges', None)
+        if ranges:
+            # Экспортируются сохраненные отрезки, а не текущие IN/OUT
+            return f"IN: {start_str} | OUT: {end_str} | ✂ {len(ranges)}"
+        return f"IN: {start_str} | OUT: {end_str}"
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return [QUEUE_MIME_TYPE]
+
+    def mimeData(self, indexes):
+        # Перемещение внутреннее: view берет состав из выделения, данные не сериализуем
+        mime = QMimeData()
+        mime.setData(QUEUE_MIME_TYPE, b"")
+        return mime
+
+    # --- Доступ к данным ---
+
+    def object_at(self, index):
+        return self.store.get(index.internalId()) if index.isValid() else None
+
+    def _siblings(self, obj):
+        group = getattr(obj, 'group', None)
+        return self._top if group is None else group.items
+
+    def _row_of(self, obj):
+        siblings = self._siblings(obj)
+        row = self._rows.get(obj.id)
+        if row is None or row >= len(siblings) or siblings[row] is not obj:
+            # Кэш устарел — пересчитываем весь список разом (амортизированно O(1) на запрос)
+            for i, sibling in enumerate(siblings):
+                self._rows[sibling.id] = i
+            row = self._rows[obj.id]
+        return row
+
+    def _parent_index(self, group):
+        return QModelIndex() if group is None else self.createIndex(self._row_of(group), 0, group.id)
+
+    def index_of(self, obj):
+        return self.createIndex(self._row_of(obj), 0, obj.id)
+
+    def layout(self):
+        """Top-level objects in order; GroupItem.items are their clips (see ProjectStore)."""
+        return list(self._top)
+
+    def all_media(self):
+        """Every MediaItem in queue order (groups expanded in place)."""
+        result = []
+        for obj in self._top:
+            if isinstance(obj, GroupItem):
+                result.extend(obj.items)
+            else:
+                result.append(obj)
+        return result
+
+    def media_after(self, obj, count):
+        """Up to count clips after obj in queue order (groups expanded), skipping obj's
+        own file. A group plays its first clip, so for a group this starts at its second."""
+        if isinstance(obj, GroupItem):
+            following = chain(obj.items[1:], self._media_from(self._row_of(obj) + 1))
+            current = obj.items[0].path if obj.items else None
+        elif obj.group is not None:
+            following = chain(obj.group.items[self._row_of(obj) + 1:], self._media_from(self._row_of(obj.group) + 1))
+            current = obj.path
+        else:
+            following = self._media_from(self._row_of(obj) + 1)
+            current = obj.path
+
+        result = []
+        seen = {current}
+        for media in following:
+            if len(result) >= count:
+                break
+            if media.path not in seen:
+                seen.add(media.path)
+                result.append(media)
+        return result
+
+    def _media_from(self, row):
+        for obj in islice(self._top, row, None):
+            if isinstance(obj, GroupItem):
+                yield from obj.items
+            else:
+                yield obj
+
+    def refresh(self, obj):
+        """Repaints the card of obj after its fields changed (and recounts its readiness)."""
+        if isinstance(obj, MediaItem):
+            self._track_ready(obj)
+        if self.store.resize(obj):
+            self._readiness_timer.start() # Сводка очереди показывает и занятую память
+        index = self.index_of(obj)
+        self.dataChanged.emit(index, index)
+
+    def refresh_group(self, group):
+        """refresh() for a group and all its clips: one dataChanged for the whole child range."""
+        for media in group.items:
+            self._track_ready(media)
+        index = self.index_of(group)
+        self.dataChanged.emit(index, index)
+        if group.items:
+            self.dataChanged.emit(self.index(0, 0, index), self.index(len(group.items) - 1, 0, index))
+
+    # --- Готовность к экспорту ---
+
+    def media_count(self):
+        return len(self.store)
+
+    def ready_count(self):
+        return len(self._ready_ids)
+
+    def is_export_ready(self):
+        """At least one clip and every clip marked."""
+        return 0 < len(self.store) == len(self._ready_ids)
+
+    def _track_ready(self, media):
+        key = media.id
+        if media.is_ready == (key in self._ready_ids):
+            return
+        if media.is_ready:
+            self._ready_ids.add(key)
+        else:
+            self._ready_ids.discard(key)
+        self._readiness_timer.start()
+
+    def _untrack(self, media):
+        self._ready_ids.discard(media.id)
+        self._readiness_timer.start()
+
+    def _emit_readiness(self):
+        self.readiness_changed.emit(len(self._ready_ids), len(self.store))
+
+    # --- Изменение структуры ---
+
+    def clear(self):
+        self.beginResetModel()
+        self._top = []
+        self.store.clear()
+        self._rows.clear()
+        self._ready_ids.clear()
+        self.endResetModel()
+        self._readiness_timer.start()
+        self.structure_changed.emit()
+
+    def set_layout(self, layout):
+        self.beginResetModel()
+        self._top = list(layout)
+        self.store.clear()
+        self._rows.clear()
+        self._ready_ids.clear()
+        for obj in self._top:
+            self.store.add(obj)
+            if isinstance(obj, GroupItem):
+                for media in obj.items:
+                    media.group = obj
+                    self.store.add(media)
+            else:
+                obj.group = None
+        self._ready_ids.update(media.id for media in self.store.media() if media.is_ready)
+        self.endResetModel()
+        self._readiness_timer.start()
+        self.structure_changed.emit()
+
+    def append_media(self, media):
+        self.extend_media([media])
+
+    def extend_media(self, medias):
+        """Appends clips at the top level as one insertion; paths already queued are skipped."""
+        fresh = []
+        for media in medias:
+            if media.path not in self.store:
+                self.store.add(media)
+                fresh.append(media)
+        if not fresh: return
+        for media in fresh:
+            media.group = None
+            if media.is_ready:
+                self._ready_ids.add(media.id)
+        self._insert_run(fresh, None, -1)
+        self._readiness_timer.start()
+        self.structure_changed.emit()
+
+    def _take_all(self, objs):
+        """Detaches objs from their lists, one removal per contiguous run of rows."""
+        by_list = {}
+        for obj in objs:
+            group = getattr(obj, 'group', None)
+            by_list.setdefault(id(group), (group, []))[1].append(self._row_of(obj))
+        for group, rows in by_list.values():
+            siblings = self._top if group is None else group.items
+            parent = self._parent_index(group)
+            rows.sort()
+            # Снизу вверх: удаление не сдвигает еще не удаленные строки
+            end = len(rows) - 1
+            while end >= 0:
+                start = end
+                while start > 0 and rows[start - 1] == rows[start] - 1:
+                    start -= 1
+                first, last = rows[start], rows[end]
+                self.beginRemoveRows(parent, first, last)
+                for obj in siblings[first:last + 1]:
+                    if isinstance(obj, MediaItem):
+                        obj.group = None
+                    self._rows.pop(obj.id, None)
+                del siblings[first:last + 1]
+                self.endRemoveRows()
+                end = start - 1
+            if group is not None:
+                self.store.resize(group)
+
+    def _insert_run(self, objs, group, row):
+        if not objs: return
+        siblings = self._top if group is None else group.items
+        row = len(siblings) if row < 0 else min(row, len(siblings))
+        self.beginInsertRows(self._parent_index(group), row, row + len(objs) - 1)
+        siblings[row:row] = objs
+        for obj in objs:
+            if isinstance(obj, MediaItem):
+                obj.group = group
+        # Строки после вставки сдвинулись — пересчет при следующем обращении
+        for i in range(row, len(siblings)):
+            self._rows[siblings[i].id] = i
+        self.endInsertRows()
+        if group is not None:
+            self.store.resize(group)
+
+    def move_items(self, objs, group, row):
+        """Moves objs (in order) under group (None = top level) starting at row (-1 = end)."""
+        if group is not None:
+            objs = [obj for obj in objs if not isinstance(obj, GroupItem)] # Группы не вкладываются
+        if not objs: return
+        if row >= 0:
+            # Точка вставки сдвигается на число уходящих из-под нее строк того же списка
+            row -= sum(1 for obj in objs if getattr(obj, 'group', None) is group and self._row_of(obj) < row)
+        self._take_all(objs)
+        self._insert_run(objs, group, row)
+        self.structure_changed.emit()
+
+    def create_group(self, group, objs):
+        """Appends group at the top level and moves the clips in objs into it."""
+        self.store.add(group)
+        self._insert_run([group], None, -1)
+        self.move_items([obj for obj in objs if isinstance(obj, MediaItem)], group, -1)
+        return group
+
+    def remove_items(self, objs):
+        """Removes clips; a removed group releases its clips to the end of the top level."""
+        groups = [obj for obj in objs if isinstance(obj, GroupItem) and self._contains(obj)]
+        media = [obj for obj in objs if isinstance(obj, MediaItem) and self.store.by_path(obj.path) is obj]
+        removed = {obj.id for obj in media}
+        released = [child for g in groups for child in g.items if child.id not in removed]
+
+        self._take_all(media)
+        for obj in media:
+            self._untrack(obj)
+            self.store.discard(obj)
+        if released:
+            self._take_all(released)
+            self._insert_run(released, None, -1)
+        if groups:
+            self._take_all(groups)
+            for group in groups:
+                self.store.discard(group)
+        self.structure_changed.emit()
+
+    def _contains(self, group):
+        return self.store.get(group.id) is group
@@ -1,6 +1,7 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QCheckBox
 from PyQt6.QtCore import pyqtSignal
 from utils.language_manager import LanguageManager
+from utils.settings import SettingsManager
 
 class ExportPanel(QWidget):
     select_dir_clicked = pyqtSignal()
@@ -28,6 +29,18 @@ class ExportPanel(QWidget):
         path_layout.addWidget(self.btn_browse)
         
         layout.addLayout(path_layout)
+
+        # Режим экспорта: копирование от ключевого кадра или smart render (точно по кадрам)
+        self.chk_smart = QCheckBox()
+        self.chk_smart.setChecked(SettingsManager.instance().get("export_mode", "copy") == "smart")
+        self.chk_smart.toggled.connect(self.on_smart_toggled)
+        layout.addWidget(self.chk_smart)
+
+        # Повторный экспорт: клипы, чей результат уже лежит с тем же ключом задания, пропускаются
+        self.chk_skip_existing = QCheckBox()
+        self.chk_skip_existing.setChecked(SettingsManager.instance().get("export_skip_existing", True))
+        self.chk_skip_existing.toggled.connect(self.on_skip_existing_toggled)
+        layout.addWidget(self.chk_skip_existing)
         
         # Export Button
         self.btn_export = QPushButton()
@@ -55,6 +68,16 @@ class ExportPanel(QWidget):
         lm = LanguageManager.instance()
         self.path_edit.setPlaceholderText(lm.tr("lbl_output_folder"))
         self.btn_export.setText("🚀 " + lm.tr("btn_export"))
+        self.chk_smart.setText(lm.tr("chk_smart_render"))
+        self.chk_smart.setToolTip(lm.tr("tip_smart_render"))
+        self.chk_skip_existing.setText(lm.tr("chk_skip_existing"))
+        self.chk_skip_existing.setToolTip(lm.tr("tip_skip_existing"))
+
+    def on_smart_toggled(self, checked):
+        SettingsManager.instance().set("export_mode", "smart" if checked else "copy")
+
+    def on_skip_existing_toggled(self, checked):
+        SettingsManager.instance().set("export_skip_existing", checked)
 
     def set_output_path(self, path):
         self.path_edit.setText(path)
@@ -1,95 +1,69 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QFrame
-from PyQt6.QtCore import Qt
-from utils.helpers import format_time_hmsf
-from utils.language_manager import LanguageManager
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QRect, QSize
+from PyQt6.QtGui import QColor, QPen, QFont, QFontMetrics
 
-class ItemCardWidget(QWidget):
-    def __init__(self, title, info_str, parent=None):
-        super().__init__(parent)
-        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
-        
-        # Store initial data for updates (title/info might be updated externally or need handling)
-        self.title_text = title
-        self.info_text = info_str
-        
-        # Store status for re-rendering on lang change
-        self.status_data = (False, 0, 0, 25, 0) # is_ready, start, end, fps, duration
+from ui.queue_model import InfoRole, MarkerRole, ReadyRole
 
-        # Внешний лейаут для отступов между карточками
-        outer_layout = QVBoxLayout(self)
-        outer_layout.setContentsMargins(0, 2, 0, 2)  # Отступы сверху и снизу
-        outer_layout.setSpacing(0)
-        
-        # Внутренняя рамка с контентом
-        self.frame = QFrame()
-        self.frame.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
-        # Стандартный стиль (Red / Muted)
-        self.default_style = """
-            QFrame {
-                background-color: #8e0000; 
-                border: 1px solid #b71c1c; 
-                border-radius: 4px;
-            }
-            QLabel { color: #e0e0e0; border: none; background: transparent; }
-        """
-        self.ready_style = """
-            QFrame {
-                background-color: #1b5e20; 
-                border: 1px solid #2e7d32; 
-                border-radius: 4px;
-            }
-            QLabel { color: #fff; border: none; background: transparent; }
-        """
-        self.frame.setStyleSheet(self.default_style)
-        
-        inner_layout = QVBoxLayout(self.frame)
-        inner_layout.setContentsMargins(8, 6, 8, 6)
-        inner_layout.setSpacing(2)
+class ItemCardDelegate(QStyledItemDelegate):
+    """Paints queue rows as cards (title, info, IN/OUT markers).
 
-        self.title_label = QLabel(f"<b>{title}</b>")
-        self.info_label = QLabel(info_str)
-        self.info_label.setStyleSheet("font-size: 11px; color: #ccc;")
-        
-        self.marker_label = QLabel()
-        self.marker_label.setStyleSheet("font-size: 11px; font-weight: bold; color: #ffcdd2;")
+    No widget exists per row: off-screen rows cost nothing, and a language
+    switch is just a repaint of the visible ones.
+    """
+    MARGIN_V = 2   # Отступы между карточками
+    PAD_H, PAD_V = 8, 6
+    SPACING = 2
+    RADIUS = 4
 
-        inner_layout.addWidget(self.title_label)
-        inner_layout.addWidget(self.info_label)
-        inner_layout.addWidget(self.marker_label)
-        
-        outer_layout.addWidget(self.frame)
-        
-        LanguageManager.instance().language_changed.connect(self.update_texts)
-        self.update_texts()
+    # is_ready -> (фон, рамка, заголовок, метки)
+    COLORS = {
+        False: (QColor("#8e0000"), QColor("#b71c1c"), QColor("#e0e0e0"), QColor("#ffcdd2")),
+        True: (QColor("#1b5e20"), QColor("#2e7d32"), QColor("#ffffff"), QColor("#c8e6c9")),
+    }
+    INFO_COLOR = QColor("#cccccc")
 
-    def set_status(self, is_ready, start=0, end=0, fps=25, duration=0):
-        self.status_data = (is_ready, start, end, fps, duration)
-        self.update_texts()
+    def _fonts(self, option):
+        title = QFont(option.font)
+        title.setBold(True)
+        small = QFont(option.font)
+        small.setPixelSize(11)
+        small_bold = QFont(small)
+        small_bold.setBold(True)
+        return title, small, small_bold
 
-    def update_texts(self):
-        lm = LanguageManager.instance()
-        is_ready, start, end, fps, duration = self.status_data
-        
-        if is_ready:
-            self.frame.setStyleSheet(self.ready_style)
-            self.marker_label.setStyleSheet("font-size: 11px; font-weight: bold; color: #c8e6c9;")
-            
-            # Format START
-            start_str = format_time_hmsf(start, fps)
-            
-            # Format END (Relative if duration > 0)
-            if duration > 0:
-                offset = max(0, duration - end)
-                end_str = f"-{format_time_hmsf(offset, fps)}"
-            else:
-                end_str = format_time_hmsf(end, fps)
-                
-            self.marker_label.setText(f"IN: {start_str} | OUT: {end_str}")
+    def sizeHint(self, option, index):
+        title, small, small_bold = self._fonts(option)
+        height = (QFontMetrics(title).height() + QFontMetrics(small).height() + QFontMetrics(small_bold).height()
+                  + 2 * self.SPACING + 2 * self.PAD_V + 2 * self.MARGIN_V)
+        return QSize(option.rect.width(), height)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+
+        title_font, small, small_bold = self._fonts(option)
+        bg, border, text_color, marker_color = self.COLORS[bool(index.data(ReadyRole))]
+
+        card = QRect(option.rect).adjusted(0, self.MARGIN_V, -1, -self.MARGIN_V)
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.setPen(QPen(option.palette.highlight().color(), 2))
         else:
-            self.frame.setStyleSheet(self.default_style)
-            self.marker_label.setStyleSheet("font-size: 11px; font-weight: bold; color: #ffcdd2;")
-            self.marker_label.setText(lm.tr("lbl_need_marking"))
-            
-    def set_info(self, text):
-        self.info_text = text
-        self.info_label.setText(text)
+            painter.setPen(QPen(border, 1))
+        painter.setBrush(bg)
+        painter.drawRoundedRect(card, self.RADIUS, self.RADIUS)
+
+        x = card.left() + self.PAD_H
+        w = card.width() - 2 * self.PAD_H
+        y = card.top() + self.PAD_V
+        align = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+
+        for text, font, color in ((index.data(Qt.ItemDataRole.DisplayRole), title_font, text_color),
+                                  (index.data(InfoRole), small, self.INFO_COLOR),
+                                  (index.data(MarkerRole), small_bold, marker_color)):
+            fm = QFontMetrics(font)
+            painter.setFont(font)
+            painter.setPen(color)
+            painter.drawText(QRect(x, y, w, fm.height()), align, fm.elidedText(text or "", Qt.TextElideMode.ElideRight, w))
+            y += fm.height() + self.SPACING
+
+        painter.restore()
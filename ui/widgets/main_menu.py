@@ -7,6 +7,8 @@ from utils.settings import SettingsManager
 class MainMenu(QMenuBar):
     # File
     add_video_triggered = pyqtSignal()
+    open_project_triggered = pyqtSignal()
+    save_project_as_triggered = pyqtSignal()
     
     # Edit
     delete_triggered = pyqtSignal()
@@ -16,6 +18,8 @@ class MainMenu(QMenuBar):
     # View
     theme_changed = pyqtSignal(str) # 'dark', 'light', 'auto'
     language_changed = pyqtSignal(str) # 'en', 'ru'
+    thumbnails_toggled = pyqtSignal(bool)
+    waveform_toggled = pyqtSignal(bool)
     
     # Info
     about_triggered = pyqtSignal()
@@ -31,6 +35,13 @@ class MainMenu(QMenuBar):
         self.act_add = QAction("Add Video", self)
         self.act_add.triggered.connect(self.add_video_triggered)
         self.menu_file.addAction(self.act_add)
+        self.menu_file.addSeparator()
+        self.act_open_project = QAction("Open Project...", self)
+        self.act_open_project.triggered.connect(self.open_project_triggered)
+        self.act_save_project_as = QAction("Save Project As...", self)
+        self.act_save_project_as.triggered.connect(self.save_project_as_triggered)
+        self.menu_file.addAction(self.act_open_project)
+        self.menu_file.addAction(self.act_save_project_as)
 
         # Edit
         self.menu_edit = self.addMenu("Edit")
@@ -88,6 +99,16 @@ class MainMenu(QMenuBar):
             self.menu_lang.addAction(act)
         lang_group.triggered.connect(lambda a: self.on_language_triggered(a.data()))
 
+        self.act_thumbnails = QAction("Timeline Thumbnails", self, checkable=True)
+        self.act_thumbnails.setChecked(bool(SettingsManager.instance().get("timeline_thumbnails", True)))
+        self.act_thumbnails.toggled.connect(self.on_thumbnails_toggled)
+        self.menu_view.addAction(self.act_thumbnails)
+
+        self.act_waveform = QAction("Audio Waveform", self, checkable=True)
+        self.act_waveform.setChecked(bool(SettingsManager.instance().get("timeline_waveform", True)))
+        self.act_waveform.toggled.connect(self.on_waveform_toggled)
+        self.menu_view.addAction(self.act_waveform)
+
         # Info
         self.menu_info = self.addMenu("Info")
         self.act_about = QAction("About", self)
@@ -101,6 +122,14 @@ class MainMenu(QMenuBar):
         SettingsManager.instance().set("theme", theme_code)
         self.theme_changed.emit(theme_code)
 
+    def on_thumbnails_toggled(self, checked):
+        SettingsManager.instance().set("timeline_thumbnails", checked)
+        self.thumbnails_toggled.emit(checked)
+
+    def on_waveform_toggled(self, checked):
+        SettingsManager.instance().set("timeline_waveform", checked)
+        self.waveform_toggled.emit(checked)
+
     def on_language_triggered(self, lang_code):
         LanguageManager.instance().set_language(lang_code)
         # Settings are saved inside LanguageManager, so we don't need to save here, or we can double check.
@@ -113,6 +142,8 @@ class MainMenu(QMenuBar):
         
         self.menu_file.setTitle(lm.tr("menu_file"))
         self.act_add.setText(lm.tr("action_add_video"))
+        self.act_open_project.setText(lm.tr("action_open_project"))
+        self.act_save_project_as.setText(lm.tr("action_save_project_as"))
         
         self.menu_edit.setTitle(lm.tr("menu_edit"))
         self.act_delete.setText(lm.tr("action_delete"))
@@ -129,6 +160,8 @@ class MainMenu(QMenuBar):
         self.menu_lang.setTitle(lm.tr("menu_lang_title"))
         self.act_lang_en.setText(lm.tr("action_lang_en"))
         self.act_lang_ru.setText(lm.tr("action_lang_ru"))
+        self.act_thumbnails.setText(lm.tr("action_timeline_thumbnails"))
+        self.act_waveform.setText(lm.tr("action_audio_waveform"))
         
         self.menu_info.setTitle(lm.tr("menu_info"))
         self.act_about.setText(lm.tr("action_about"))
@@ -1,7 +1,31 @@
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer
-from PyQt6.QtGui import QPainter, QColor, QPen, QFont, QWheelEvent, QMouseEvent
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QRect, QLineF
+from collections import OrderedDict
+from PyQt6.QtGui import QPainter, QColor, QPen, QFont, QWheelEvent, QMouseEvent, QPixmap
 from utils.helpers import format_time_hmsf
+from utils.settings import SettingsManager
+from core.keyframe_index import KeyframeIndex
+from core.thumbnail_thread import ThumbnailThread
+from core.waveform_thread import WaveformThread
+
+RULER_H = 30
+# Больше стольких ключевых кадров на пиксель видимой области — рисуем плотность по колонкам
+KEYFRAME_LOD_DENSITY = 0.5
+# Уровни прозрачности для колонок плотности (меньше смен пера)
+KEYFRAME_DENSITY_LEVELS = 6
+
+# Дорожка миниатюр под линейкой
+THUMB_STRIP_H = 40
+THUMB_ASPECT = 16 / 9
+# Высоты извлекаемых кадров (px); берем ближайшую к реальной высоте дорожки
+THUMB_TIERS = (36, 72, 144)
+# Если одна миниатюра покрывает больше стольких секунд — это обзор, хватит уровня пониже
+THUMB_LOW_RES_SLOT_S = 30
+# Сколько декодированных миниатюр держим в виджете
+THUMB_PIXMAP_LIMIT = 256
+
+# Дорожка формы волны внизу виджета
+WAVE_LANE_H = 40
 
 class TimelineWidget(QWidget):
     time_changed = pyqtSignal(float)
@@ -13,12 +37,13 @@ class TimelineWidget(QWidget):
 
     def __init__(self):
         super().__init__()
-        self.setMinimumHeight(120)
+        self.setMinimumHeight(160)
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         
         self.duration = self.current_time = 0.0
         self.start_marker = self.end_marker = 0.0
-        self.keyframes = []
+        self.keyframes = KeyframeIndex()
+        self._keyframes_version = 0
         self.fps = 25.0
         self.zoom = 1.0   
         self.offset_s = 0.0 
@@ -38,7 +63,8 @@ class TimelineWidget(QWidget):
                 'keyframe': QColor(100, 100, 100, 150),
                 'cut_zone': QColor(0, 255, 0, 20),
                 'cursor_color': QColor(0, 180, 255),
-                'cursor_text': Qt.GlobalColor.white
+                'cursor_text': Qt.GlobalColor.white,
+                'waveform': QColor(80, 170, 255, 170)
             },
             'light': {
                 'bg': QColor(240, 240, 240),
@@ -49,7 +75,8 @@ class TimelineWidget(QWidget):
                 'keyframe': QColor(100, 100, 100, 100),
                 'cut_zone': QColor(0, 255, 0, 40),
                 'cursor_color': QColor(0, 120, 215),
-                'cursor_text': Qt.GlobalColor.black
+                'cursor_text': Qt.GlobalColor.black,
+                'waveform': QColor(0, 90, 180, 170)
             }
         }
         
@@ -59,6 +86,32 @@ class TimelineWidget(QWidget):
         self.edge_scroll_timer.timeout.connect(self.check_edge_scroll)
         self.scroll_direction = 0 # -1 влево, 1 вправо
 
+        # Статичные слои (линейка, ключевые кадры, зона обрезки) кешируются в pixmap
+        # и перестраиваются только при смене масштаба, смещения, маркеров и т.п.
+        self._static_layer = None
+        self._static_key = None
+        self._cursor_rect = QRect()
+
+        # Миниатюры: извлекаются в фоне по ключевым кадрам, хранятся в ThumbnailCache
+        self.show_thumbnails = bool(SettingsManager.instance().get("timeline_thumbnails", True))
+        self.source_path = None
+        self._thumb_pixmaps = OrderedDict() # (время в мс, высота) -> QPixmap
+        self._thumb_thread = None
+        self._thumb_requested = None
+
+        # Форма волны: пирамида пиков, строится в фоне потоковым декодированием звука
+        self.show_waveform = bool(SettingsManager.instance().get("timeline_waveform", True))
+        self.waveform = None
+        self._waveform_thread = None
+        self._stale_waveform_threads = set()
+
+        # Данные, приходящие из фоновых потоков, перерисовываем пачкой
+        self._async_version = 0
+        self._async_refresh = QTimer(self)
+        self._async_refresh.setSingleShot(True)
+        self._async_refresh.setInterval(50)
+        self._async_refresh.timeout.connect(self._on_async_refresh)
+
     def set_theme(self, theme_name):
         self.theme = theme_name if theme_name in ['dark', 'light'] else 'dark'
         self.update()
@@ -70,6 +123,171 @@ class TimelineWidget(QWidget):
         self.offset_s = 0
         self.update_all()
 
+    def set_keyframes(self, keyframes):
+        self.keyframes = keyframes if isinstance(keyframes, KeyframeIndex) else KeyframeIndex(keyframes)
+        self._keyframes_version += 1
+        self.update()
+
+    def add_keyframes(self, batch):
+        """Appends a batch from a running scan; packets arrive almost sorted."""
+        if not batch: return
+        self.keyframes.extend(batch)
+        self._keyframes_version += 1
+        self.update()
+
+    def set_source(self, path):
+        """File whose thumbnails are shown (None to clear)."""
+        if path == self.source_path: return
+        self.source_path = path
+        self._thumb_pixmaps.clear()
+        self._thumb_requested = None
+        if self._thumb_thread:
+            self._thumb_thread.request(None, [], 0)
+        self._set_waveform(None)
+        self._start_waveform()
+        self._async_version += 1
+        self.update()
+
+    def set_thumbnails_enabled(self, enabled):
+        self.show_thumbnails = enabled
+        if not enabled and self._thumb_thread:
+            self._thumb_thread.request(None, [], 0)
+        self._thumb_requested = None
+        self.update()
+
+    def set_waveform_enabled(self, enabled):
+        self.show_waveform = enabled
+        if enabled and self.waveform is None:
+            self._start_waveform()
+        elif not enabled:
+            self._cancel_waveform()
+        self.update()
+
+    def shutdown(self):
+        if self._thumb_thread:
+            self._thumb_thread.stop()
+            self._thumb_thread.wait()
+            self._thumb_thread = None
+        self._cancel_waveform()
+        for thread in list(self._stale_waveform_threads):
+            thread.wait()
+        self._set_waveform(None)
+
+    def _start_waveform(self):
+        self._cancel_waveform()
+        if not (self.show_waveform and self.source_path): return
+        thread = WaveformThread(self.source_path)
+        thread.waveform_updated.connect(self._on_waveform)
+        thread.waveform_ready.connect(self._on_waveform)
+        thread.finished.connect(lambda t=thread: self._stale_waveform_threads.discard(t))
+        self._stale_waveform_threads.add(thread) # Держим ссылку, пока поток не завершится
+        self._waveform_thread = thread
+        thread.start()
+
+    def _cancel_waveform(self):
+        if self._waveform_thread:
+            self._waveform_thread.cancel()
+            self._waveform_thread = None
+
+    def _on_waveform(self, path, pyramid):
+        if path != self.source_path or not self.show_waveform:
+            if pyramid is not None and pyramid is not self.waveform:
+                pyramid.close() # Опоздавший результат прежнего файла
+            return
+        self._set_waveform(pyramid)
+        self._schedule_async_refresh()
+
+    def _set_waveform(self, pyramid):
+        # Пирамида из кэша держит mmap и дескриптор файла — закрываем, как только она не показывается
+        if self.waveform is not None and self.waveform is not pyramid:
+            self.waveform.close()
+        self.waveform = pyramid
+
+    def _schedule_async_refresh(self):
+        if not self._async_refresh.isActive():
+            self._async_refresh.start()
+
+    def _on_async_refresh(self):
+        self._async_version += 1
+        self.update()
+
+    def _thumbnail_height(self, slot_seconds):
+        needed = THUMB_STRIP_H * self.devicePixelRatioF()
+        tier = next((i for i, h in enumerate(THUMB_TIERS) if h >= needed), len(THUMB_TIERS) - 1)
+        if slot_seconds > THUMB_LOW_RES_SLOT_S:
+            tier = max(0, tier - 1)
+        return THUMB_TIERS[tier]
+
+    def _thumbnail_slots(self, w):
+        """[(x, time)] for the visible window; times snap to keyframes, which decode cheaply."""
+        slot_w = int(THUMB_STRIP_H * THUMB_ASPECT)
+        slots = []
+        for x in range(0, w, slot_w):
+            t = self.offset_s + (x + slot_w / 2) / self.zoom
+            if t >= self.duration: break
+            kf = self.keyframes.before(t)
+            if kf is None:
+                kf = self.keyframes.after(t, strict=False)
+            slots.append((x, kf if kf is not None else t))
+        return slots, slot_w
+
+    def _thumbnail_pixmap(self, t, height):
+        t_ms = int(round(t * 1000))
+        pixmap = self._thumb_pixmaps.get((t_ms, height))
+        if pixmap is not None:
+            self._thumb_pixmaps.move_to_end((t_ms, height))
+            return pixmap, True
+        # Пока нужный уровень не готов — показываем тот же кадр в другом разрешении
+        for other in THUMB_TIERS:
+            pixmap = self._thumb_pixmaps.get((t_ms, other))
+            if pixmap is not None:
+                return pixmap, False
+        return None, False
+
+    def _on_thumbnail_ready(self, path, t, height, data):
+        if path != self.source_path: return
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data): return
+        self._thumb_pixmaps[(int(round(t * 1000)), height)] = pixmap
+        while len(self._thumb_pixmaps) > THUMB_PIXMAP_LIMIT:
+            self._thumb_pixmaps.popitem(last=False)
+        self._schedule_async_refresh()
+
+    def _request_thumbnails(self, times, height):
+        request = (self.source_path, tuple(times), height)
+        if request == self._thumb_requested: return
+        self._thumb_requested = request
+        if self._thumb_thread is None:
+            self._thumb_thread = ThumbnailThread()
+            self._thumb_thread.thumbnail_ready.connect(self._on_thumbnail_ready)
+            self._thumb_thread.start()
+        self._thumb_thread.request(self.source_path, times, height)
+
+    def set_current_time(self, t):
+        """Moves the playhead, repainting only the old and new cursor areas."""
+        if t == self.current_time: return
+        self.current_time = t
+        self.update(self._cursor_rect)
+        self._cursor_rect = self._cursor_geometry()[0]
+        self.update(self._cursor_rect)
+
+    def _cursor_label(self):
+        return f"{format_time_hmsf(self.current_time, self.fps)} | F: {int(self.current_time * self.fps)}"
+
+    def _cursor_geometry(self):
+        """(bounding rect, x, label, label x) of the playhead; empty rect when off-screen."""
+        w, h = self.width(), self.height()
+        curr_x = int((self.current_time - self.offset_s) * self.zoom)
+        if self.duration <= 0 or not 0 <= curr_x <= w:
+            return QRect(), curr_x, "", 0
+        # Умное отображение времени (влево или вправо)
+        label = self._cursor_label()
+        text_w = self.fontMetrics().horizontalAdvance(label)
+        text_x = curr_x + 10 if curr_x + text_w + 20 < w else curr_x - text_w - 10
+        left = min(curr_x - 6, text_x)
+        right = max(curr_x + 6, text_x + text_w + 2)
+        return QRect(left, 0, right - left + 1, h), curr_x, label, text_x
+
     def update_all(self):
         min_zoom = self.width() / max(0.001, self.duration)
         self.zoom = max(self.zoom, min_zoom)
@@ -78,74 +296,177 @@ class TimelineWidget(QWidget):
         self.ui_updated.emit(int(self.offset_s * self.zoom), int(self.duration * self.zoom), self.width())
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
+    def _static_layer_key(self):
+        return (self.width(), self.height(), self.devicePixelRatioF(), self.theme, self.hasFocus(),
+                self.duration, self.zoom, self.offset_s, self.fps,
+                self.start_marker, self.end_marker, self._keyframes_version,
+                self.show_thumbnails, self.show_waveform, self.source_path, self._async_version)
+
+    def _render_static_layer(self):
+        dpr = self.devicePixelRatioF()
         w, h = self.width(), self.height()
-        ruler_h = 30
-        
+        pixmap = QPixmap(max(1, int(w * dpr)), max(1, int(h * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+
+        painter = QPainter(pixmap)
+        painter.setFont(self.font())
         c = self.colors.get(self.theme, self.colors['dark'])
-        
+
         painter.fillRect(0, 0, w, h, c['bg'])
-        painter.fillRect(0, 0, w, ruler_h, c['ruler_bg'])
+        painter.fillRect(0, 0, w, RULER_H, c['ruler_bg'])
 
         if self.hasFocus():
             painter.setPen(QPen(c['border'], 1))
             painter.drawRect(0, 0, w-1, h-1)
 
-        if self.duration <= 0: return
+        if self.duration > 0:
+            self._paint_ruler(painter, c, w)
+            if self._thumbnails_visible():
+                self._paint_thumbnails(painter, c, w)
+            self._paint_keyframes(painter, c, w, h)
+            if self.show_waveform and self.waveform is not None:
+                self._paint_waveform(painter, c, w, h)
+            self._paint_cut_zone(painter, c, w, h)
+
+        painter.end()
+        return pixmap
 
-        # Линейка
-        intervals = [1/self.fps, 5/self.fps, 1, 2, 5, 10, 30, 60, 300]
+    def _paint_ruler(self, painter, c, w):
+        # Крупные шаги — чтобы на длинных файлах подписи не налезали друг на друга
+        intervals = [1/self.fps, 5/self.fps, 1, 2, 5, 10, 30, 60, 300, 600, 1800, 3600, 7200, 21600, 43200]
         chosen = next((i for i in intervals if i * self.zoom > 80), intervals[-1])
         t = (self.offset_s // chosen) * chosen
-        
-        painter.setPen(QPen(c['tick'], 1))
-        
+
+        ticks, labels = [], []
         while t < self.offset_s + (w / self.zoom) + chosen:
             x = int((t - self.offset_s) * self.zoom)
             if 0 <= x <= w:
-                painter.drawLine(x, ruler_h - 10, x, ruler_h)
-                
-                # Текст всегда рисовать после установки ручки
-                painter.setPen(c['text'])
-                painter.drawText(x + 3, ruler_h - 5, format_time_hmsf(t, self.fps))
-                painter.setPen(QPen(c['tick'], 1)) # Возврат к цвету рисок
+                ticks.append(QLineF(x, RULER_H - 10, x, RULER_H))
+                labels.append((x + 3, format_time_hmsf(t, self.fps)))
             t += chosen
 
-        # Ключевые кадры
-        painter.setPen(QPen(c['keyframe'], 1))
-        for kf in self.keyframes:
-            kx = int((kf - self.offset_s) * self.zoom)
-            if 0 <= kx <= w: painter.drawLine(kx, ruler_h + 5, kx, h)
+        painter.setPen(QPen(c['tick'], 1))
+        painter.drawLines(ticks)
+        painter.setPen(c['text'])
+        for x, text in labels:
+            painter.drawText(x, RULER_H - 5, text)
+
+    def _thumbnails_visible(self):
+        return self.show_thumbnails and bool(self.source_path)
 
-        # Зона обрезки
+    def _paint_thumbnails(self, painter, c, w):
+        slots, slot_w = self._thumbnail_slots(w)
+        if not slots: return
+        height = self._thumbnail_height(slot_w / self.zoom)
+
+        missing = []
+        painter.setPen(QPen(c['ruler_bg'], 1))
+        for x, t in slots:
+            target = QRect(x, RULER_H, slot_w, THUMB_STRIP_H)
+            pixmap, exact = self._thumbnail_pixmap(t, height)
+            painter.fillRect(target, c['ruler_bg'])
+            if pixmap is not None and pixmap.height() > 0:
+                # Сохраняем пропорции кадра, лишнее по ширине обрезается слотом
+                pw = min(slot_w, int(THUMB_STRIP_H * pixmap.width() / pixmap.height()))
+                painter.drawPixmap(QRect(x + (slot_w - pw) // 2, RULER_H, pw, THUMB_STRIP_H), pixmap)
+            painter.drawRect(target)
+            if not exact and t not in missing:
+                missing.append(t)
+
+        # Сначала центр окна — туда обычно и смотрят
+        center = self.offset_s + w / self.zoom / 2
+        missing.sort(key=lambda t: abs(t - center))
+        self._request_thumbnails(missing, height)
+
+    def _paint_keyframes(self, painter, c, w, h):
+        t0 = self.offset_s
+        t1 = self.offset_s + w / self.zoom
+        kfs = self.keyframes
+        visible = kfs.count_le(t1) - kfs.count_lt(t0)
+        if not visible: return
+
+        top = RULER_H + (THUMB_STRIP_H if self._thumbnails_visible() else 0) + 5
+        if visible <= w * KEYFRAME_LOD_DENSITY:
+            # Мало кадров: по линии на кадр, одним вызовом
+            lines = [QLineF(kx, top, kx, h) for kx in
+                     (int((kf - t0) * self.zoom) for kf in kfs.range(t0, t1))]
+            painter.setPen(QPen(c['keyframe'], 1))
+            painter.drawLines(lines)
+            return
+
+        # Много кадров: считаем их число в каждой колонке пикселя бинарным поиском (O(w log n)),
+        # не перебирая сами кадры, и рисуем колонку тем плотнее, чем больше в ней кадров
+        levels = [[] for _ in range(KEYFRAME_DENSITY_LEVELS)]
+        prev = kfs.count_lt(t0)
+        peak = 1
+        counts = []
+        for x in range(w + 1):
+            nxt = kfs.count_lt(t0 + (x + 1) / self.zoom) if x < w else kfs.count_le(t1)
+            counts.append(nxt - prev)
+            peak = max(peak, nxt - prev)
+            prev = nxt
+        for x, n in enumerate(counts):
+            if n:
+                level = min(KEYFRAME_DENSITY_LEVELS - 1, int((KEYFRAME_DENSITY_LEVELS - 1) * n / peak))
+                levels[level].append(QLineF(x, top, x, h))
+
+        base = QColor(c['keyframe'])
+        for level, lines in enumerate(levels):
+            if not lines: continue
+            color = QColor(base)
+            color.setAlpha(min(255, base.alpha() + (255 - base.alpha()) * level // (KEYFRAME_DENSITY_LEVELS - 1)))
+            painter.setPen(QPen(color, 1))
+            painter.drawLines(lines)
+
+    def _paint_waveform(self, painter, c, w, h):
+        # Из пирамиды берутся только корзины под видимыми колонками, сырые сэмплы не читаются
+        half = WAVE_LANE_H / 2 - 1
+        mid = h - WAVE_LANE_H / 2
+        lines = []
+        for x, peak in enumerate(self.waveform.columns(self.offset_s, 1 / self.zoom, w)):
+            if peak is None: continue
+            lo, hi = peak
+            lines.append(QLineF(x, mid - hi * half, x, mid - lo * half + 0.5))
+        painter.setPen(QPen(c['tick'], 1))
+        painter.drawLine(0, int(mid), w, int(mid))
+        painter.setPen(QPen(c['waveform'], 1))
+        painter.drawLines(lines)
+
+    def _paint_cut_zone(self, painter, c, w, h):
         x_s, x_e = int((self.start_marker - self.offset_s) * self.zoom), int((self.end_marker - self.offset_s) * self.zoom)
-        painter.fillRect(max(0, x_s), ruler_h, min(w, x_e) - max(0, x_s), h, c['cut_zone'])
+        painter.fillRect(max(0, x_s), RULER_H, min(w, x_e) - max(0, x_s), h, c['cut_zone'])
         
         # Линии маркеров
         # Start (Зеленая линия)
         if 0 <= x_s <= w:
              painter.setPen(QPen(QColor(0, 200, 0), 2))
-             painter.drawLine(x_s, ruler_h, x_s, h)
+             painter.drawLine(x_s, RULER_H, x_s, h)
         
         # End (Красная линия)
         if 0 <= x_e <= w:
              painter.setPen(QPen(QColor(255, 50, 50), 2))
-             painter.drawLine(x_e, ruler_h, x_e, h)
+             painter.drawLine(x_e, RULER_H, x_e, h)
+
+    def paintEvent(self, event):
+        key = self._static_layer_key()
+        if key != self._static_key or self._static_layer is None:
+            self._static_layer = self._render_static_layer()
+            self._static_key = key
+
+        painter = QPainter(self)
+        # Отсечение по event.rect(): при движении курсора копируется только его полоса
+        painter.drawPixmap(0, 0, self._static_layer)
 
         # Курсор
-        curr_x = int((self.current_time - self.offset_s) * self.zoom)
-        if 0 <= curr_x <= w:
-            painter.setPen(QPen(c['cursor_color'], 1)); painter.drawLine(curr_x, 0, curr_x, h)
-            painter.setBrush(c['cursor_color']); painter.drawRect(curr_x - 5, 0, 10, 15)
-            
-            # Умное отображение времени (влево или вправо)
-            time_str = f"{format_time_hmsf(self.current_time, self.fps)} | F: {int(self.current_time * self.fps)}"
-            text_w = painter.fontMetrics().horizontalAdvance(time_str)
-            text_x = curr_x + 10 if curr_x + text_w + 20 < w else curr_x - text_w - 10
-            
-            painter.setPen(c['cursor_text'])
-            painter.drawText(text_x, 15, time_str)
+        rect, curr_x, label, text_x = self._cursor_geometry()
+        self._cursor_rect = rect
+        if rect.isEmpty(): return
+        c = self.colors.get(self.theme, self.colors['dark'])
+        h = self.height()
+        painter.setPen(QPen(c['cursor_color'], 1)); painter.drawLine(curr_x, 0, curr_x, h)
+        painter.setBrush(c['cursor_color']); painter.drawRect(curr_x - 5, 0, 10, 15)
+        painter.setPen(c['cursor_text'])
+        painter.drawText(text_x, 15, label)
 
     def mouseMoveEvent(self, event: QMouseEvent):
         x = event.position().x()
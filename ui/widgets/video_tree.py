@@ -1,19 +1,46 @@
 import os
-from PyQt6.QtWidgets import QTreeWidget
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import QTreeView, QAbstractItemView
+from PyQt6.QtCore import Qt, pyqtSignal, QItemSelection, QItemSelectionModel
 
-class VideoTreeWidget(QTreeWidget):
+from core.models import GroupItem
+from utils.language_manager import LanguageManager
+
+class VideoTreeView(QTreeView):
     files_dropped = pyqtSignal(list)
-    
+
     ACCEPTED_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.flv', '.webm', '.wmv', '.mpeg', '.mpg'}
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAcceptDrops(True)
+        self.setHeaderHidden(True)
+        self.setIndentation(20)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.setDropIndicatorShown(True)
+        # Карточки одной высоты — view не опрашивает sizeHint каждой строки
+        self.setUniformRowHeights(True)
+        LanguageManager.instance().language_changed.connect(self.viewport().update)
+
+    def selected_objects(self, for_move=False):
+        """Selected MediaItem/GroupItem objects in queue order.
+
+        for_move drops clips whose group is selected too (they travel with it).
+        """
+        rows = self.selectionModel().selectedRows()
+        def position(index):
+            parent = index.parent()
+            return (parent.row(), index.row()) if parent.isValid() else (index.row(), -1)
+        objs = [index.data(Qt.ItemDataRole.UserRole) for index in sorted(rows, key=position)]
+        if for_move:
+            groups = {id(obj) for obj in objs if isinstance(obj, GroupItem)}
+            objs = [obj for obj in objs if id(getattr(obj, 'group', None)) not in groups]
+        return objs
 
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
-        if not self.itemAt(event.position().toPoint()):
+        if not self.indexAt(event.position().toPoint()).isValid():
             self.clearSelection()
 
     def dragEnterEvent(self, event):
@@ -28,7 +55,7 @@ class VideoTreeWidget(QTreeWidget):
                     if ext in self.ACCEPTED_EXTENSIONS:
                         has_video = True
                         break
-            
+
             if has_video:
                 event.acceptProposedAction()
             else:
@@ -55,10 +82,52 @@ class VideoTreeWidget(QTreeWidget):
                     ext = os.path.splitext(path)[1].lower()
                     if ext in self.ACCEPTED_EXTENSIONS:
                         files.append(path)
-            
+
             if files:
                 self.files_dropped.emit(files)
                 event.acceptProposedAction()
+        elif event.source() is self:
+            # Internal move: переносим сами, view не должен удалять исходные строки
+            self.move_selection_to(event.position().toPoint())
+            event.setDropAction(Qt.DropAction.IgnoreAction)
+            event.accept()
+            self.stopAutoScroll()
+            self.setState(QAbstractItemView.State.NoState)
+            self.viewport().update()
         else:
-            # Internal move
-            super().dropEvent(event)
+            event.ignore()
+
+    def move_selection_to(self, pos):
+        model = self.model()
+        index = self.indexAt(pos)
+        indicator = self.dropIndicatorPosition()
+        target = index.data(Qt.ItemDataRole.UserRole) if index.isValid() else None
+        Position = QAbstractItemView.DropIndicatorPosition
+
+        if target is None or indicator == Position.OnViewport:
+            group, row = None, -1
+        elif indicator == Position.OnItem and isinstance(target, GroupItem):
+            group, row = target, -1
+        else:
+            group = getattr(target, 'group', None)
+            row = index.row() + (0 if indicator == Position.AboveItem else 1)
+
+        objs = self.selected_objects(for_move=True)
+        if group is not None and any(isinstance(obj, GroupItem) for obj in objs):
+            # Группы живут только в корне — ставим их рядом с целевой группой
+            row = model.index_of(group).row() + 1
+            group = None
+        if target is not None and target in objs:
+            return
+        model.move_items(objs, group, row)
+
+        # Перенос — это удаление и вставка строк: раскрытие и выделение возвращаем одним проходом
+        selection = QItemSelection()
+        for obj in objs:
+            index = model.index_of(obj)
+            selection.select(index, index)
+            if isinstance(obj, GroupItem):
+                self.expand(index)
+        if group is not None:
+            self.expand(model.index_of(group))
+        self.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
@@ -5,4 +5,13 @@ def format_time_hmsf(seconds, fps=25.0):
     s = int(seconds % 60)
     f = int(round((seconds - int(seconds)) * fps))
     if f >= int(fps): f = 0
-    return f"{h:02}:{m:02}:{s:02}:{f:02}"
\ No newline at end of file
+    return f"{h:02}:{m:02}:{s:02}:{f:02}"
+
+def format_duration(seconds):
+    """Превращает секунды в H:MM:SS (или M:SS) для ETA"""
+    if seconds is None or seconds < 0:
+        return "--:--"
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02}:{s:02}" if h else f"{m}:{s:02}"
@@ -7,7 +7,20 @@ class SettingsManager:
     def __init__(self):
         self._settings = {
             "language": "ru",
-            "theme": "auto"
+            "theme": "auto",
+            "probe_cache_max_mb": 256,
+            "ingest_workers": 4,
+            "export_workers": 2,
+            "export_mode": "copy",
+            "export_skip_existing": True,
+            "preload_items": 2,
+            "preload_mb": 32,
+            "last_project": "",
+            "timeline_thumbnails": True,
+            "thumbnail_cache_mb": 64,
+            "thumbnail_disk_mb": 512,
+            "timeline_waveform": True,
+            "waveform_disk_mb": 256
         }
         # Config folder next to main.py (parent of utils)
         base_dir = os.path.dirname(os.path.dirname(__file__))
@@ -47,6 +60,9 @@ class SettingsManager:
         except Exception as e:
             print(f"Error saving settings: {e}")
 
+    def config_dir(self):
+        return self._config_dir
+
     def get(self, key, default=None):
         return self._settings.get(key, default)
 